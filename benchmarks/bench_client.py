@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the pywiremock client and serialization hot paths
+
+Runs offline against the in-process pywiremock.server stand-in and prints (or writes) machine-readable JSON.
+Pass --compare with an earlier result file to report the change per benchmark and fail on regressions:
+
+    python benchmarks/bench_client.py --output before.json
+    python benchmarks/bench_client.py --compare before.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import uuid
+
+from pywiremock import mappings
+from pywiremock.matching import MatchableRequest
+from pywiremock.server import WireMockServer
+
+
+def _stub(index):
+    request = mappings.RequestPattern('POST', mappings.UrlPattern('/bench/{}'.format(index)))
+    request.with_header('Content-Type', 'application/json')
+    request.with_request_body(mappings.RequestBodyPattern('"id": {}'.format(index), 'contains'))
+    response = mappings.ResponseDefinition(200, '{"id": %d, "name": "item %d"}' % (index, index),
+                                           {'Content-Type': 'application/json'})
+    return mappings.Stub(request).will_return(response)
+
+
+def _fill_journal(server, entries):
+    now = int(time.time() * 1000)
+    for index in range(entries):
+        url = '/bench/{}'.format(index % 1000)
+        logged_request = {'url': url, 'absoluteUrl': 'http://localhost' + url, 'method': 'GET',
+                          'clientIp': '127.0.0.1', 'headers': {'Accept': 'application/json', 'Host': 'localhost'},
+                          'cookies': {}, 'browserProxyRequest': False, 'loggedDate': now,
+                          'loggedDateString': '', 'body': '', 'bodyAsBase64': ''}
+        event = {'id': str(uuid.uuid4()), 'request': logged_request, 'wasMatched': True,
+                 'responseDefinition': {'status': 200, 'body': '{"id": %d}' % index}}
+        server.journal.log(event, MatchableRequest.from_logged_request(logged_request))
+
+
+def _timed(function, number, setup=None):
+    # setup runs before every call but outside the timed region
+    total = 0.0
+    for _ in range(number):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        total += time.perf_counter() - start
+    return total
+
+
+def _measure(function, repeat, setup=None, min_time=0.2):
+    """
+    Time function the way timeit does: double the calls per sample until a sample takes at least min_time
+    seconds (which also warms up), then take repeat samples; timings are per call
+    """
+    number = 1
+    while _timed(function, number, setup) < min_time:
+        number *= 2
+    timings = [_timed(function, number, setup) / number for _ in range(repeat)]
+    return {'repeat': repeat, 'number': number, 'min': min(timings), 'median': statistics.median(timings),
+            'mean': statistics.mean(timings)}
+
+
+def run(quick=False):
+    repeat = 3 if quick else 7
+    min_time = 0.05 if quick else 0.2
+    count = 200 if quick else 1000
+    journal_sizes = [1000, 10000] if quick else [1000, 10000, 100000]
+    results = {}
+    stubs = [_stub(index) for index in range(count)]
+    frozen = [stub.freeze() for stub in stubs]
+    serialized = [stub.serialize() for stub in stubs]
+
+    def record(name, function, operations, setup=None, samples=repeat):
+        measurement = _measure(function, samples, setup, min_time)
+        measurement['operations'] = operations
+        measurement['ops_per_second'] = operations / measurement['min'] if measurement['min'] else None
+        results[name] = measurement
+
+    record('stub.serialize', lambda: [stub.serialize() for stub in stubs], count)
+    record('stub.to_json', lambda: [stub.to_json() for stub in stubs], count)
+    record('stub.to_bytes', lambda: [stub.to_bytes() for stub in stubs], count)
+    record('frozen_stub.to_bytes', lambda: [stub.to_bytes() for stub in frozen], count)
+    record('stub.deserialize', lambda: [mappings.Stub.deserialize(m) for m in serialized], count)
+
+    with WireMockServer() as server:
+        with server.client() as client:
+            record('register.single', lambda: [client.add_stub_mapping(stub) for stub in stubs], count,
+                   client.reset_mappings)
+            record('register.bulk', lambda: client.add_stub_mappings(stubs), count, client.reset_mappings)
+
+            pattern = mappings.RequestPattern('GET', mappings.UrlPattern('/bench/1'))
+            _fill_journal(server, 1000)
+            record('verify', lambda: client.verify(1, pattern), 1)
+            record('verify_all.10', lambda: client.verify_all([(1, pattern)] * 10), 10)
+
+            for size in journal_sizes:
+                client.reset_requests()
+                _fill_journal(server, size)
+                # the largest journals take seconds per call, so they get fewer (but never under three) samples
+                record('journal.get_all_requests.{}'.format(size), client.get_all_requests, size,
+                       samples=max(3, repeat // (size // 10000 or 1)))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of each benchmark against a baseline and return the names that slowed down beyond threshold
+
+    Runs are compared on their fastest sample: noise from the rest of the machine only ever adds time, so the
+    minimum is the most repeatable figure.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            print('{:40} {:>12.6f}s  (new)'.format(name, result['min']))
+            continue
+        change = (result['min'] - before['min']) / before['min']
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print('{:40} {:>12.6f}s  {:+7.1%}{}'.format(name, result['min'], change, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer repeats')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    document = {'meta': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                         'platform': platform.platform(), 'timestamp': int(time.time()), 'quick': args.quick},
+                'results': run(args.quick)}
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(document, output_file, indent=2, sort_keys=True)
+    elif not args.compare:
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        print()
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(document['results'], baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
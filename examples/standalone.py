@@ -20,7 +20,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'More content\n')
+        self.assertEqual(result.text, 'More content\n')
 
         expected_request = get(url_matching('/api/default/get'))
         self._sample_server.verify(1, expected_request)
@@ -31,7 +31,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'More content\n')
+        self.assertEqual(result.text, 'More content\n')
 
         expected_request = post(url_matching('/api/default/post')).with_request_body(matching('some content'))
         self._sample_server.verify(1, expected_request)
@@ -42,7 +42,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'More content\n')
+        self.assertEqual(result.text, 'More content\n')
 
         expected_request = put(url_matching('/api/default/put')).with_request_body(matching('some content'))
         self._sample_server.verify(1, expected_request)
@@ -69,7 +69,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'defined content')
+        self.assertEqual(result.text, 'defined content')
 
         self._sample_server.verify(1, new_request)
 
@@ -85,7 +85,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'defined content')
+        self.assertEqual(result.text, 'defined content')
 
         self._sample_server.verify(1, new_request)
 
@@ -101,7 +101,7 @@ class StandaloneExample(unittest.TestCase):
 
         # Verify
         self.assertEqual(result.status_code, 200)
-        self.assertEqual(result.content, 'defined content')
+        self.assertEqual(result.text, 'defined content')
 
         self._sample_server.verify(1, new_request)
 
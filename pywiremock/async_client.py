@@ -0,0 +1,510 @@
+import asyncio
+import time
+import uuid
+
+from pywiremock.codec import default_codec
+from pywiremock.compression import CompressionStats, gzip_if_over
+from pywiremock.errors import BulkImportError, RequestsNotReceivedError, VerificationError, WireMockError
+from pywiremock.journal import backoff_intervals, format_since, journal_drop_keys
+from pywiremock.mappings import GlobalSettings
+from pywiremock.matching import JournalSnapshot
+from pywiremock.policy import CallPolicy
+from pywiremock.streaming import ArrayItemScanner
+from pywiremock.views import LoggedRequest, ServeEvent, StubMappingView
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class AsyncWireMock:
+    """
+    asyncio counterpart of pywiremock.client.WireMock
+
+    Every admin call is a coroutine running on aiohttp, so many stubs can be registered or verified
+    concurrently with asyncio.gather. Requires the 'async' extra (aiohttp).
+    """
+    def __init__(self, port, host=None, url_prefix=None, pool_size=100, keep_alive=True, session=None,
+                 codec=None, compress_requests_over=None, policy=None):
+        if aiohttp is None:
+            raise ImportError('AsyncWireMock requires aiohttp; install pywiremock[async]')
+        self._host = host if host else 'localhost'
+        self._port = port
+        self._url_prefix = url_prefix if url_prefix else ''
+        self._base_url = 'http://{}:{}/__admin'.format(self._host, self._port)
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._owns_session = session is None
+        self._session = session
+        self._codec = codec or default_codec()
+        self._compress_requests_over = compress_requests_over
+        self.compression_stats = CompressionStats()
+        self.policy = policy or CallPolicy()
+        self.circuit_breaker = self.policy.circuit_breaker()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Release pooled connections; a session passed in by the caller is left open
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # aiohttp sessions must be created inside a running event loop, so this is deferred to the first call
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _request(self, method, url, data=None, params=None):
+        _, body = await self._call(method, url, data, params)
+        return body
+
+    async def _call(self, method, url, data=None, params=None):
+        # (response, body) of a call whose body may be gzipped on the way out
+        headers = None
+        compressed = gzip_if_over(data, self._compress_requests_over)
+        if compressed is not None:
+            self.compression_stats.add_request(len(data), len(compressed))
+            data = compressed
+            headers = {'Content-Encoding': 'gzip'}
+        return await self._send(method, url, data, params, headers)
+
+    async def _response(self, method, url, data=None):
+        # the response itself, for the calls that hand it back like their WireMock counterparts do
+        response, _ = await self._call(method, url, data)
+        return response
+
+    async def _send(self, method, url, data=None, params=None, headers=None, stream=False):
+        """
+        Make an admin call under the call policy, returning (response, body)
+
+        With stream set the response comes back as soon as its status is in, with body None; the caller reads
+        and releases it, and the deadline and retries only cover the call up to that point.
+        """
+        attempts = self.policy.attempts(method, url, data, self.circuit_breaker)
+        while True:
+            timeouts = attempts.before_attempt()
+            try:
+                response, body = await self._attempt(method, url, data, params, headers, timeouts, stream)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not attempts.failed(e):
+                    raise
+            except BaseException:
+                attempts.aborted()
+                raise
+            else:
+                if not attempts.answered(response.status):
+                    return response, body
+                response.release()
+            await asyncio.sleep(attempts.pause())
+
+    async def _attempt(self, method, url, data, params, headers, timeouts, stream):
+        connect_timeout, read_timeout = timeouts
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        response = await self._get_session().request(method, url, data=data, params=params, headers=headers,
+                                                     timeout=timeout)
+        if stream:
+            return response, None
+        try:
+            body = await response.read()
+        finally:
+            response.release()
+        if response.headers.get('Content-Encoding') == 'gzip' and response.content_length is not None:
+            self.compression_stats.add_response(response.content_length, len(body))
+        return response, body
+
+    def _views(self, body, key, view_class):
+        return [view_class(raw, self._codec) for raw in ArrayItemScanner(key).feed(body)]
+
+    async def list_all_stub_mappings(self, limit=None, offset=None, lazy=False):
+        """
+        Get all stub mappings; with lazy set, a list of views.StubMappingView instead of the decoded response
+        """
+        url = '{}/mappings'.format(self._base_url)
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if offset is not None:
+            params['offset'] = offset
+        response = await self._request('GET', url, params=params)
+        if lazy:
+            return self._views(response, 'mappings', StubMappingView)
+        return self._codec.loads(response)
+
+    async def iter_stub_mappings(self, page_size=100, prefetch=False):
+        """
+        Lazily iterate over all stub mappings, fetching page_size mappings per request
+
+        With prefetch the next page is requested as a separate task while the current one is consumed.
+        """
+        offset = 0
+        page = await self.list_all_stub_mappings(page_size, offset)
+        next_page = None
+        try:
+            while True:
+                stub_mappings = page.get('mappings', [])
+                total = page.get('meta', {}).get('total')
+                offset += len(stub_mappings)
+                has_more = len(stub_mappings) == page_size and (total is None or offset < total)
+                if has_more and prefetch:
+                    next_page = asyncio.ensure_future(self.list_all_stub_mappings(page_size, offset))
+                for stub_mapping in stub_mappings:
+                    yield stub_mapping
+                if not has_more:
+                    return
+                if next_page:
+                    page, next_page = await next_page, None
+                else:
+                    page = await self.list_all_stub_mappings(page_size, offset)
+        finally:
+            if next_page:
+                next_page.cancel()
+
+    async def add_stub_mapping(self, stub_mapping):
+        """
+        Create a new stub mapping
+        """
+        url = '{}/mappings'.format(self._base_url)
+        response = await self._request('POST', url, stub_mapping.to_bytes(self._codec))
+        return self._codec.loads(response)
+
+    async def add_stub_mappings(self, stubs, chunk_size=500, duplicate_policy='OVERWRITE',
+                                delete_all_not_in_import=False):
+        """
+        Create many stub mappings through the bulk import endpoint, sending the chunks concurrently
+
+        Behaves like WireMock.add_stub_mappings: returns UUIDs in input order or raises BulkImportError.
+        """
+        url = '{}/mappings/import'.format(self._base_url)
+        ids = []
+        serialized = []
+        for stub in stubs:
+            mapping = dict(stub.serialize())
+            mapping['id'] = stub.id or str(uuid.uuid4())
+            ids.append(mapping['id'])
+            serialized.append(mapping)
+
+        async def send_chunk(start, delete_all):
+            import_options = {'duplicatePolicy': duplicate_policy, 'deleteAllNotInImport': delete_all}
+            body = self._codec.dumps({'mappings': serialized[start:start + chunk_size],
+                                      'importOptions': import_options})
+            try:
+                response, response_body = await self._call('POST', url, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError, WireMockError) as e:
+                return repr(e)
+            if response.status >= 400:
+                return 'HTTP {}: {}'.format(response.status, response_body.decode('utf-8', 'replace'))
+            return None
+
+        starts = list(range(0, len(serialized), chunk_size))
+        reasons = []
+        if starts and delete_all_not_in_import:
+            # the first chunk clears unlisted mappings, so it has to land before the others are sent
+            reasons.append(await send_chunk(starts[0], True))
+            starts_to_gather = starts[1:]
+        else:
+            starts_to_gather = starts
+        reasons.extend(await asyncio.gather(*[send_chunk(start, False) for start in starts_to_gather]))
+
+        failures = [(index, ids[start:start + chunk_size], reason)
+                    for index, (start, reason) in enumerate(zip(starts, reasons)) if reason]
+        if failures:
+            failed = set(i for _, chunk_ids, _ in failures for i in chunk_ids)
+            raise BulkImportError([None if i in failed else i for i in ids], failures, len(starts))
+        return ids
+
+    async def reset_mappings(self):
+        """
+        reset all mappings, including defaults
+        """
+        url = '{}/mappings'.format(self._base_url)
+        return await self._response('DELETE', url)
+
+    async def reset_to_default_mappings(self):
+        """
+        reset mappings to defaults loaded from json
+        """
+        url = '{}/mappings/reset'.format(self._base_url)
+        return await self._response('POST', url)
+
+    async def get_stub_mapping(self, mapping_id):
+        """
+        Get a single stub mapping
+        """
+        url = '{}/mappings/{}'.format(self._base_url, mapping_id)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def edit_stub_mapping(self, mapping_id, stub_mapping):
+        """
+        Update an existing stub mapping
+        """
+        url = '{}/mappings/{}'.format(self._base_url, mapping_id)
+        response = await self._request('PUT', url, stub_mapping.to_bytes(self._codec))
+        return self._codec.loads(response)
+
+    async def remove_stub_mapping(self, mapping_id):
+        """
+        Delete a stub mapping
+        """
+        url = '{}/mappings/{}'.format(self._base_url, mapping_id)
+        await self._request('DELETE', url)
+
+    async def save_mappings(self):
+        """
+        Save all persistent stub mappings to the backing store
+        """
+        url = '{}/mappings/save'.format(self._base_url)
+        return await self._response('POST', url)
+
+    async def get_all_requests(self, limit=None, since_date=None, lazy=False):
+        """
+        Get received requests; with lazy set, a list of views.ServeEvent instead of the decoded response
+        """
+        url = '{}/requests'.format(self._base_url)
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if since_date is not None:
+            params['since'] = format_since(since_date)
+        response = await self._request('GET', url, params=params)
+        if lazy:
+            return self._views(response, 'requests', ServeEvent)
+        return self._codec.loads(response)
+
+    async def iter_requests(self, limit=None, since_date=None, drop_bodies=False, drop_response=False, drop_keys=(),
+                            chunk_size=64 * 1024):
+        """
+        Lazily iterate over the request journal, decoding one entry at a time as the response streams in
+
+        drop_bodies skips request and response bodies and drop_response what each request was answered with;
+        skipped fields are never buffered or decoded and come back as None. drop_keys adds further dotted
+        paths, e.g. 'request.headers'.
+        """
+        url = '{}/requests'.format(self._base_url)
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if since_date is not None:
+            params['since'] = format_since(since_date)
+        scanner = ArrayItemScanner('requests', journal_drop_keys(drop_bodies, drop_response, drop_keys))
+        response, _ = await self._send('GET', url, params=params, stream=True)
+        try:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for raw_serve_event in scanner.feed(chunk):
+                    yield self._codec.loads(raw_serve_event)
+        finally:
+            response.release()
+
+    async def reset_requests(self):
+        """
+        Delete all received requests
+        """
+        url = '{}/requests'.format(self._base_url)
+        return await self._response('DELETE', url)
+
+    async def get_request(self, request_id):
+        """
+        Single logged request
+        """
+        url = '{}/requests/{}'.format(self._base_url, request_id)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def reset_all_requests(self):
+        """
+        Empty the request journal
+        """
+        url = '{}/requests/reset'.format(self._base_url)
+        return await self._response('POST', url)
+
+    async def count_requests_matching(self, request_pattern):
+        """
+        Count requests logged in the journal matching the specified criteria
+        """
+        url = '{}/requests/count'.format(self._base_url)
+        response = await self._request('POST', url, request_pattern.to_bytes(self._codec))
+        return self._codec.loads(response)
+
+    async def find_requests_matching(self, request_pattern, lazy=False):
+        """
+        Retrieve details of requests logged in the journal matching the specified criteria; with lazy set, a
+        list of views.LoggedRequest instead of the decoded response
+        """
+        url = '{}/requests/find'.format(self._base_url)
+        response = await self._request('POST', url, request_pattern.to_bytes(self._codec))
+        if lazy:
+            return self._views(response, 'requests', LoggedRequest)
+        return self._codec.loads(response)
+
+    async def find_unmatched_requests(self):
+        """
+        Get details of logged requests that weren't matched by any stub mapping
+        """
+        url = '{}/requests/unmatched'.format(self._base_url)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def find_near_misses_for_unmatched_results(self):
+        """
+        Retrieve near-misses for all unmatched requests
+        """
+        url = '{}/requests/unmatched/near-misses'.format(self._base_url)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def start_recording(self, record_spec):
+        """
+        Start recording stub mappings
+        """
+        url = '{}/recordings/start'.format(self._base_url)
+        await self._request('POST', url, record_spec.to_bytes(self._codec))
+
+    async def stop_recording(self):
+        """
+        Stop recording stub mappings
+        """
+        url = '{}/recordings/stop'.format(self._base_url)
+        response = await self._request('POST', url)
+        return self._codec.loads(response)
+
+    async def get_recording_status(self):
+        """
+        Get the recording status (started or stopped)
+        """
+        url = '{}/recordings/status'.format(self._base_url)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def snapshot_record(self, record_spec):
+        """
+        Take a snapshot recording
+        """
+        url = '{}/recordings/snapshot'.format(self._base_url)
+        response = await self._request('POST', url, record_spec.to_bytes(self._codec))
+        return self._codec.loads(response)
+
+    async def get_scenarios(self):
+        """
+        Get all scenarios
+        """
+        url = '{}/scenarios'.format(self._base_url)
+        response = await self._request('GET', url)
+        return self._codec.loads(response)
+
+    async def reset_scenarios(self):
+        """
+        Reset the state of all scenarios
+        """
+        url = '{}/scenarios/reset'.format(self._base_url)
+        return await self._response('POST', url)
+
+    async def find_top_near_misses_for(self, logged_request=None, request_pattern=None):
+        """
+        Find at most 3 near misses for closest stub mappings to the specified request or request pattern
+        """
+        if logged_request:
+            url = '{}/near-misses/request'.format(self._base_url)
+            # logged requests straight from the journal are plain dicts
+            body = self._codec.dumps(logged_request) if isinstance(logged_request, dict) else logged_request.to_json()
+            response = await self._request('POST', url, body)
+        elif request_pattern:
+            url = '{}/near-misses/request-pattern'.format(self._base_url)
+            response = await self._request('POST', url, request_pattern.to_bytes(self._codec))
+        else:
+            raise NotImplementedError
+        return self._codec.loads(response)
+
+    async def update_global_settings(self, global_settings):
+        """
+        Update global settings
+        """
+        url = '{}/settings'.format(self._base_url)
+        response = await self._request('POST', url, global_settings.to_bytes(self._codec))
+        return self._codec.loads(response) if response else None
+
+    async def shutdown(self):
+        """
+        Shutdown function
+        """
+        url = '{}/shutdown'.format(self._base_url)
+        await self._request('POST', url)
+
+    async def register(self, stub_mapping):
+        """
+        Create a new stub mapping, returning the aiohttp response just as WireMock.register returns the requests
+        one; its body has already been read, so await response.json() gives the created mapping
+        """
+        url = '{}/mappings/new'.format(self._base_url)
+        return await self._response('POST', url, stub_mapping.to_bytes(self._codec))
+
+    async def set_global_fixed_delay(self, milliseconds):
+        """
+        Delay the responses of every stub that has no fixed delay of its own by milliseconds
+        """
+        return await self.update_global_settings(GlobalSettings().with_fixed_delay(milliseconds))
+
+    async def add_delay_before_processing_requests(self, milliseconds):
+        """
+        Hold every incoming connection for milliseconds before its request is read
+        """
+        url = '{}/socket-delay'.format(self._base_url)
+        await self._request('POST', url, self._codec.dumps({'milliseconds': milliseconds}))
+
+    async def verify(self, count, request_pattern):
+        url = '{}/requests/count'.format(self._base_url)
+        response = await self._request('POST', url, request_pattern.to_bytes(self._codec))
+        response_count = int(self._codec.loads(response)['count'])
+        if count != response_count:
+            raise AssertionError('Assertion failed. Expected count: {} Actual count: {}'.format(count, response_count))
+
+    async def verify_all(self, expectations):
+        """
+        Check a list of (count, request_pattern) expectations against one snapshot of the journal
+
+        The journal is fetched once and matched locally; every mismatch is reported together in a
+        VerificationError.
+        """
+        expectations = list(expectations)
+        snapshot = JournalSnapshot.from_response(await self.get_all_requests())
+        actual_counts = snapshot.count_all([pattern for _, pattern in expectations])
+        failures = [(index, count, actual, pattern)
+                    for index, ((count, pattern), actual) in enumerate(zip(expectations, actual_counts))
+                    if count != actual]
+        if failures:
+            raise VerificationError(failures)
+
+    async def await_requests(self, request_pattern, count=1, timeout=5.0, initial_interval=0.005, max_interval=0.5):
+        """
+        Wait until at least count requests matching request_pattern have been received
+
+        Polls the request count with a backoff that starts at initial_interval and doubles up to max_interval,
+        returning the count as soon as it is reached. On timeout a RequestsNotReceivedError reports the last
+        count and the closest near misses.
+        """
+        start = time.monotonic()
+        polls = 0
+        for interval in backoff_intervals(initial_interval, max_interval):
+            actual = int((await self.count_requests_matching(request_pattern))['count'])
+            polls += 1
+            if actual >= count:
+                return actual
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(interval, remaining))
+        try:
+            near_misses = (await self.find_top_near_misses_for(request_pattern=request_pattern)).get('nearMisses', [])
+        except Exception:
+            near_misses = []
+        raise RequestsNotReceivedError(count, actual, time.monotonic() - start, polls, request_pattern, near_misses)
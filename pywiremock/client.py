@@ -1,181 +1,540 @@
-import json
+import hashlib
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
+from pywiremock.codec import default_codec
+from pywiremock.errors import BulkImportError, RequestsNotReceivedError, VerificationError, WireMockError
+from pywiremock.journal import JournalTail, backoff_intervals, format_since, journal_drop_keys
+from pywiremock.mappings import GlobalSettings
+from pywiremock.matching import JournalSnapshot
+from pywiremock.recording import SnapshotWriter
+from pywiremock.reports import unmatched_report
+from pywiremock.streaming import ArrayItemScanner, iter_array_items
+from pywiremock.sync import SyncResult, plan_sync
+from pywiremock.transport import PooledTransport
+from pywiremock.views import LoggedRequest, ServeEvent, StubMappingView
+
+
+def _sha256(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
 
 class WireMock:
-    def __init__(self, port, host=None, url_prefix=None):
+    def __init__(self, port, host=None, url_prefix=None, pool_size=10, pool_block=False, keep_alive=True,
+                 transport=None, codec=None, instrumentation=None, compress_requests_over=None, policy=None):
         self._host = host if host else 'localhost'
         self._port = port
         self._url_prefix = url_prefix if url_prefix else ''
         self._base_url = 'http://{}:{}/__admin'.format(self._host, self._port)
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = PooledTransport(pool_size=pool_size, pool_block=pool_block, keep_alive=keep_alive,
+                                        compress_requests_over=compress_requests_over, policy=policy)
+        if instrumentation is not None:
+            transport.instrumentation = instrumentation
+        self._transport = transport
+        self._codec = codec or default_codec()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def compression_stats(self):
+        """
+        Bytes saved by gzip on this client's admin calls; see compression.CompressionStats
+        """
+        return self._transport.compression_stats
+
+    @property
+    def instrumentation(self):
+        return self._transport.instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation):
+        self._transport.instrumentation = instrumentation
+
+    def close(self):
+        """
+        Release pooled connections; a transport passed in by the caller is left open
+        """
+        if self._owns_transport:
+            self._transport.close()
+
+    def _decode(self, response):
+        return self._codec.loads(response.content)
+
+    def _views(self, method, url, key, view_class, chunk_size=64 * 1024, **kwargs):
+        # split the array into raw elements as the response streams in, without decoding any of them
+        with self._transport.request(method, url, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            scanner = ArrayItemScanner(key)
+            return [view_class(raw, self._codec) for chunk in response.iter_content(chunk_size)
+                    for raw in scanner.feed(chunk)]
 
-    def list_all_stub_mappings(self, limit=None, offset=None):
+    def list_all_stub_mappings(self, limit=None, offset=None, lazy=False):
         """
-        Get all stub mappings
+        Get all stub mappings; with lazy set, a list of views.StubMappingView instead of the decoded response
         """
         url = '{}/mappings'.format(self._base_url)
-        response = requests.get(url)  # TODO support limit & offset
-        return response.json()
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if offset is not None:
+            params['offset'] = offset
+        if lazy:
+            return self._views('GET', url, 'mappings', StubMappingView, params=params)
+        response = self._transport.get(url, params=params)
+        return self._decode(response)
+
+    def iter_stub_mappings(self, page_size=100, prefetch=False):
+        """
+        Lazily iterate over all stub mappings, fetching page_size mappings per request
+
+        With prefetch the next page is requested on a background thread while the current one is consumed, so
+        at most two pages are held in memory at a time.
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = 0
+            page = self.list_all_stub_mappings(page_size, offset)
+            while True:
+                stub_mappings = page.get('mappings', [])
+                total = page.get('meta', {}).get('total')
+                offset += len(stub_mappings)
+                has_more = len(stub_mappings) == page_size and (total is None or offset < total)
+                next_page = None
+                if has_more and executor:
+                    next_page = executor.submit(self.list_all_stub_mappings, page_size, offset)
+                for stub_mapping in stub_mappings:
+                    yield stub_mapping
+                if not has_more:
+                    return
+                page = next_page.result() if next_page else self.list_all_stub_mappings(page_size, offset)
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
 
     def add_stub_mapping(self, stub_mapping):
         """
         Create a new stub mapping
         """
         url = '{}/mappings'.format(self._base_url)
-        response = requests.post(url, stub_mapping.to_json())
-        return response.json()
+        response = self._transport.post(url, stub_mapping.to_bytes(self._codec))
+        return self._decode(response)
+
+    def add_stub_mappings(self, stubs, chunk_size=500, duplicate_policy='OVERWRITE', delete_all_not_in_import=False):
+        """
+        Create many stub mappings through the bulk import endpoint, chunk_size stubs per request
+
+        Stubs without an id are given a fresh UUID; the UUIDs are returned in input order. Raises BulkImportError
+        listing the failed chunks if any chunk is rejected, after the remaining chunks have been sent.
+        """
+        url = '{}/mappings/import'.format(self._base_url)
+        ids = []
+        serialized = []
+        for stub in stubs:
+            mapping = dict(stub.serialize())
+            mapping['id'] = stub.id or str(uuid.uuid4())
+            ids.append(mapping['id'])
+            serialized.append(mapping)
+
+        failures = []
+        chunk_count = 0
+        for start in range(0, len(serialized), chunk_size):
+            chunk = serialized[start:start + chunk_size]
+            # deleting unlisted mappings is only meaningful for the first chunk, later ones would undo it
+            import_options = {'duplicatePolicy': duplicate_policy,
+                              'deleteAllNotInImport': delete_all_not_in_import and start == 0}
+            body = self._codec.dumps({'mappings': chunk, 'importOptions': import_options})
+            try:
+                response = self._transport.post(url, body)
+                reason = None if response.ok else 'HTTP {}: {}'.format(response.status_code, response.text)
+            except (requests.RequestException, WireMockError) as e:
+                reason = repr(e)
+            if reason:
+                failures.append((chunk_count, ids[start:start + chunk_size], reason))
+            chunk_count += 1
+
+        if failures:
+            failed = set(i for _, chunk_ids, _ in failures for i in chunk_ids)
+            raise BulkImportError([None if i in failed else i for i in ids], failures, chunk_count)
+        return ids
+
+    def sync_mappings(self, desired_stubs, remove_unlisted=True, page_size=500):
+        """
+        Bring the server's stub mappings in line with desired_stubs, sending only what changed
+
+        Stubs are compared by a content hash of their serialized form: new stubs are bulk-imported, changed
+        ones edited in place and, with remove_unlisted, mappings not in desired_stubs removed. Returns a
+        SyncResult of the added, updated, removed and unchanged mapping ids.
+        """
+        desired_stubs = list(desired_stubs)
+        current_mappings = list(self.iter_stub_mappings(page_size))
+        to_add, to_update, to_remove, unchanged = plan_sync(desired_stubs, current_mappings)
+        added = self.add_stub_mappings(to_add) if to_add else []
+        for mapping_id, stub in to_update:
+            self.edit_stub_mapping(mapping_id, stub)
+        if not remove_unlisted:
+            to_remove = []
+        for mapping_id in to_remove:
+            self.remove_stub_mapping(mapping_id)
+        return SyncResult(added, [mapping_id for mapping_id, _ in to_update], to_remove, unchanged)
 
     def reset_mappings(self):
         """
-        reset all mappings, including defaults
+        reset all mappings, including defaults; returns the response so callers can check its status
         """
         url = '{}/mappings'.format(self._base_url)
-        requests.delete(url)
+        return self._transport.delete(url)
 
     def reset_to_default_mappings(self):
         """
         reset mappings to defaults loaded from json
         """
         url = '{}/mappings/reset'.format(self._base_url)
-        requests.post(url)
+        return self._transport.post(url)
 
     def get_stub_mapping(self, mapping_id):
         """
         Get a single stub mapping
         """
         url = '{}/mappings/{}'.format(self._base_url, mapping_id)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
 
     def edit_stub_mapping(self, mapping_id, stub_mapping):
         """
         Update an existing stub mapping
         """
         url = '{}/mappings/{}'.format(self._base_url, mapping_id)
-        response = requests.put(url, stub_mapping.to_json())
-        return response.json()
+        response = self._transport.put(url, stub_mapping.to_bytes(self._codec))
+        return self._decode(response)
 
     def remove_stub_mapping(self, mapping_id):
         """
         Delete a stub mapping
         """
         url = '{}/mappings/{}'.format(self._base_url, mapping_id)
-        requests.delete(url)
+        self._transport.delete(url)
 
     def save_mappings(self):
         """
         Save all persistent stub mappings to the backing store
         """
         url = '{}/mappings/save'.format(self._base_url)
-        requests.post(url)
+        return self._transport.post(url)
+
+    def list_files(self):
+        """
+        Names of the files in the server's __files store
+        """
+        url = '{}/files'.format(self._base_url)
+        response = self._transport.get(url)
+        return self._decode(response)
+
+    def get_file_digest(self, file_name, chunk_size=64 * 1024):
+        """
+        SHA-256 hex digest of a file in the server's __files store, streamed rather than held in memory; None
+        if the server has no such file
+        """
+        url = '{}/files/{}'.format(self._base_url, file_name)
+        with self._transport.get(url, stream=True) as response:
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return _sha256(response.iter_content(chunk_size))
+
+    def get_file_size(self, file_name):
+        """
+        Size in bytes of a file in the server's __files store, from a HEAD request so nothing is downloaded;
+        None if the server has no such file or its answer does not tell
+        """
+        url = '{}/files/{}'.format(self._base_url, file_name)
+        response = self._transport.head(url)
+        length = response.headers.get('Content-Length')
+        if not response.ok or length is None or response.headers.get('Content-Encoding'):
+            return None
+        return int(length)
+
+    def upload_file(self, file_name, path, chunk_size=64 * 1024, force=False, server_files=None):
+        """
+        Stream a file from disk into the server's __files store under file_name, for use with with_body_file
+
+        Unless force is set, the upload is skipped if the server already holds identical content under that
+        name. Sizes are compared first, so a changed size is uploaded without fetching the server's copy; only
+        when the sizes match, or the server does not report one, are the local file and the server's copy
+        hashed. server_files, the names from a list_files() call, saves listing the store again; upload_files
+        passes it for a whole batch. Returns True if the file was uploaded.
+        """
+        if not force:
+            if server_files is None:
+                server_files = self.list_files()
+            if file_name in server_files:
+                server_size = self.get_file_size(file_name)
+                if server_size is None or server_size == os.path.getsize(path):
+                    with open(path, 'rb') as body_file:
+                        digest = _sha256(iter(lambda: body_file.read(chunk_size), b''))
+                    if self.get_file_digest(file_name, chunk_size) == digest:
+                        return False
+
+        url = '{}/files/{}'.format(self._base_url, file_name)
+        with open(path, 'rb') as body_file:
+            response = self._transport.put(url, iter(lambda: body_file.read(chunk_size), b''))
+        response.raise_for_status()
+        return True
+
+    def upload_files(self, files, chunk_size=64 * 1024, force=False):
+        """
+        Upload (name, path) pairs, such as loader.MappingDirectory.body_files(), listing the store only once
+
+        Returns the names that were uploaded; files the server already holds unchanged are skipped.
+        """
+        server_files = None if force else set(self.list_files())
+        return [file_name for file_name, path in files
+                if self.upload_file(file_name, path, chunk_size, force, server_files)]
 
-    def get_all_requests(self, limit=None, since_date=None):
+    def delete_file(self, file_name):
+        """
+        Remove a file from the server's __files store
         """
-        Get received requests
+        url = '{}/files/{}'.format(self._base_url, file_name)
+        self._transport.delete(url)
+
+    def get_all_requests(self, limit=None, since_date=None, lazy=False):
+        """
+        Get received requests; with lazy set, a list of views.ServeEvent instead of the decoded response
         """
         url = '{}/requests'.format(self._base_url)
-        response = requests.get(url)  # TODO support query params
-        return response.json()
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if since_date is not None:
+            params['since'] = format_since(since_date)
+        if lazy:
+            return self._views('GET', url, 'requests', ServeEvent, params=params)
+        response = self._transport.get(url, params=params)
+        return self._decode(response)
+
+    def iter_requests(self, limit=None, since_date=None, drop_bodies=False, drop_response=False, drop_keys=(),
+                      chunk_size=64 * 1024):
+        """
+        Lazily iterate over the request journal, decoding one entry at a time as the response streams in
+
+        drop_bodies skips request and response bodies and drop_response what each request was answered with;
+        skipped fields are never buffered or decoded and come back as None. drop_keys adds further dotted
+        paths, e.g. 'request.headers'.
+        """
+        url = '{}/requests'.format(self._base_url)
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if since_date is not None:
+            params['since'] = format_since(since_date)
+        with self._transport.get(url, params=params, stream=True) as response:
+            response.raise_for_status()
+            for serve_event in iter_array_items(response.iter_content(chunk_size), 'requests', self._codec.loads,
+                                                journal_drop_keys(drop_bodies, drop_response, drop_keys)):
+                yield serve_event
+
+    def tail_requests(self, poll_interval=1.0, since_date=None, limit=None, stop_event=None):
+        """
+        Follow the request journal, yielding only entries logged since the previous poll, oldest first
+
+        Polls every poll_interval seconds until stop_event (a threading.Event) is set; each poll only transfers
+        the requests newer than the last one seen.
+        """
+        return JournalTail(self, since_date, limit).follow(poll_interval, stop_event)
+
+    def count_all_requests(self):
+        """
+        Number of requests in the journal, without downloading it
+        """
+        return int(self.get_all_requests(limit=1).get('meta', {}).get('total', 0))
+
+    def save_all_requests(self, path, chunk_size=64 * 1024):
+        """
+        Stream the whole request journal, as returned by the server, into the file at path
+        """
+        url = '{}/requests'.format(self._base_url)
+        with self._transport.get(url, stream=True) as response:
+            response.raise_for_status()
+            with open(path, 'wb') as journal_file:
+                for chunk in response.iter_content(chunk_size):
+                    journal_file.write(chunk)
+
+    def remove_requests_matching(self, request_pattern):
+        """
+        Delete the logged requests matching the specified criteria, returning the removed requests
+        """
+        url = '{}/requests/remove'.format(self._base_url)
+        response = self._transport.post(url, request_pattern.to_bytes(self._codec))
+        return self._decode(response)
 
     def reset_requests(self):
         """
         Delete all received requests
         """
         url = '{}/requests'.format(self._base_url)
-        requests.delete(url)
+        return self._transport.delete(url)
 
     def get_request(self, request_id):
         """
         Single logged request
         """
         url = '{}/requests/{}'.format(self._base_url, request_id)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
 
     def reset_all_requests(self):
         """
         Empty the request journal
         """
         url = '{}/requests/reset'.format(self._base_url)
-        requests.post(url)
+        return self._transport.post(url)
 
     def count_requests_matching(self, request_pattern):
         """
         Count requests logged in the journal matching the specified criteria
         """
         url = '{}/requests/count'.format(self._base_url)
-        response = requests.post(url, request_pattern.to_json())
-        return response.json()
+        response = self._transport.post(url, request_pattern.to_bytes(self._codec))
+        return self._decode(response)
 
-    def find_requests_matching(self, request_pattern):
+    def find_requests_matching(self, request_pattern, lazy=False):
         """
-        Retrieve details of requests logged in the journal matching the specified criteria
+        Retrieve details of requests logged in the journal matching the specified criteria; with lazy set, a
+        list of views.LoggedRequest instead of the decoded response
         """
         url = '{}/requests/find'.format(self._base_url)
-        response = requests.post(url, request_pattern.to_json())
-        return response.json()
+        if lazy:
+            return self._views('POST', url, 'requests', LoggedRequest, data=request_pattern.to_bytes(self._codec))
+        response = self._transport.post(url, request_pattern.to_bytes(self._codec))
+        return self._decode(response)
 
     def find_unmatched_requests(self):
         """
         Get details of logged requests that weren't matched by any stub mapping
         """
         url = '{}/requests/unmatched'.format(self._base_url)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
+
+    def iter_unmatched_requests(self, chunk_size=64 * 1024):
+        """
+        Lazily iterate over the unmatched requests, decoding the response one request at a time
+        """
+        url = '{}/requests/unmatched'.format(self._base_url)
+        with self._transport.get(url, stream=True) as response:
+            response.raise_for_status()
+            for logged_request in iter_array_items(response.iter_content(chunk_size), 'requests', self._codec.loads):
+                yield logged_request
+
+    def unmatched_report(self, near_misses=True, max_near_miss_groups=50):
+        """
+        Unmatched requests grouped by method, url template and status; see pywiremock.reports
+        """
+        return unmatched_report(self, near_misses, max_near_miss_groups)
 
     def find_near_misses_for_unmatched_results(self):
         """
         Retrieve near-misses for all unmatched requests
         """
         url = '{}/requests/unmatched/near-misses'.format(self._base_url)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
 
     def start_recording(self, record_spec):
         """
         Start recording stub mappings
         """
         url = '{}/recordings/start'.format(self._base_url)
-        requests.post(url, record_spec.to_json())
+        self._transport.post(url, record_spec.to_bytes(self._codec))
 
     def stop_recording(self):
         """
         Stop recording stub mappings
         """
         url = '{}/recordings/stop'.format(self._base_url)
-        response = requests.post(url)
-        return response.json()
+        response = self._transport.post(url)
+        return self._decode(response)
 
     def get_recording_status(self):
         """
         Get the recording status (started or stopped)
         """
         url = '{}/recordings/status'.format(self._base_url)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
 
     def snapshot_record(self, record_spec):
         """
         Take a snapshot recording
         """
         url = '{}/recordings/snapshot'.format(self._base_url)
-        response = requests.post(url, record_spec.to_json())
-        return response.json()
+        response = self._transport.post(url, record_spec.to_bytes(self._codec))
+        return self._decode(response)
+
+    def snapshot_record_to_directory(self, record_spec, target_dir, extract_bodies_over=0, chunk_size=64 * 1024):
+        """
+        Take a snapshot recording, writing each mapping into target_dir as it is received
+
+        The response is parsed incrementally, so only one recorded mapping is in memory at a time; bodies over
+        extract_bodies_over bytes go to target_dir/__files. Returns the ids of the written mappings.
+        """
+        url = '{}/recordings/snapshot'.format(self._base_url)
+        response = self._transport.post(url, record_spec.to_bytes(self._codec), stream=True)
+        return self._write_recorded_mappings(response, target_dir, extract_bodies_over, chunk_size)
+
+    def stop_recording_to_directory(self, target_dir, extract_bodies_over=0, chunk_size=64 * 1024):
+        """
+        Stop recording, streaming the recorded mappings into target_dir like snapshot_record_to_directory
+        """
+        url = '{}/recordings/stop'.format(self._base_url)
+        response = self._transport.post(url, stream=True)
+        return self._write_recorded_mappings(response, target_dir, extract_bodies_over, chunk_size)
+
+    def _write_recorded_mappings(self, response, target_dir, extract_bodies_over, chunk_size):
+        writer = SnapshotWriter(target_dir, extract_bodies_over, self._codec)
+        mapping_ids = []
+        with response:
+            response.raise_for_status()
+            for mapping in iter_array_items(response.iter_content(chunk_size), 'mappings', self._codec.loads):
+                writer.write(mapping)
+                mapping_ids.append(mapping.get('id'))
+        return mapping_ids
 
     def get_scenarios(self):
         """
         Get all scenarios
         """
         url = '{}/scenarios'.format(self._base_url)
-        response = requests.get(url)
-        return response.json()
+        response = self._transport.get(url)
+        return self._decode(response)
 
     def reset_scenarios(self):
         """
         Reset the state of all scenarios
         """
         url = '{}/scenarios/reset'.format(self._base_url)
-        requests.post(url)
+        return self._transport.post(url)
 
     def find_top_near_misses_for(self, logged_request=None, request_pattern=None):
         """
@@ -184,49 +543,99 @@ class WireMock:
         response = None
         if logged_request:
             url = '{}/near-misses/request'.format(self._base_url)
-            response = requests.post(url, logged_request.to_json())
+            # logged requests straight from the journal are plain dicts
+            body = self._codec.dumps(logged_request) if isinstance(logged_request, dict) else logged_request.to_json()
+            response = self._transport.post(url, body)
 
         elif request_pattern:
             url = '{}/near-misses/request-pattern'.format(self._base_url)
-            response = requests.post(url, request_pattern.to_json())
+            response = self._transport.post(url, request_pattern.to_bytes(self._codec))
         else:
             raise NotImplementedError
-        return response.json()
+        return self._decode(response)
 
     def update_global_settings(self, global_settings):
         """
         Update global settings
         """
         url = '{}/settings'.format(self._base_url)
-        response = requests.post(url, global_settings.to_json())
-        return response.json()
+        response = self._transport.post(url, global_settings.to_bytes(self._codec))
+        return self._decode(response) if response.content else None
 
     def shutdown(self):
         """
         Shutdown function
         """
         url = '{}/shutdown'.format(self._base_url)
-        requests.post(url)
+        self._transport.post(url)
 
     def register(self, stub_mapping):
         url = 'http://{}:{}/__admin/mappings/new'.format(self._host, self._port)
-        result = requests.post(url, stub_mapping.to_json())
+        result = self._transport.post(url, stub_mapping.to_bytes(self._codec))
         # print(stub_mapping.to_json())
         # print(result)
         return result
 
     def set_global_fixed_delay(self, milliseconds):
-        raise NotImplementedError
+        """
+        Delay the responses of every stub that has no fixed delay of its own by milliseconds
+        """
+        return self.update_global_settings(GlobalSettings().with_fixed_delay(milliseconds))
 
     def add_delay_before_processing_requests(self, milliseconds):
-        raise NotImplementedError
+        """
+        Hold every incoming connection for milliseconds before its request is read
+        """
+        url = '{}/socket-delay'.format(self._base_url)
+        self._transport.post(url, self._codec.dumps({'milliseconds': milliseconds}))
 
     def verify(self, count, request_pattern):
         url = 'http://{}:{}/__admin/requests/count'.format(self._host, self._port)
-        request_body = request_pattern.to_json()
-        response = requests.post(url, request_body)
+        request_body = request_pattern.to_bytes(self._codec)
+        response = self._transport.post(url, request_body)
         # print(response.content)
-        response_content = json.loads(response.content)
+        response_content = self._decode(response)
         response_count = int(response_content['count'])
         if count != response_count:
             raise AssertionError('Assertion failed. Expected count: {} Actual count: {}'.format(count, response_count))
+
+    def verify_all(self, expectations):
+        """
+        Check a list of (count, request_pattern) expectations against one snapshot of the journal
+
+        The journal is fetched once and matched locally; every mismatch is reported together in a
+        VerificationError.
+        """
+        expectations = list(expectations)
+        snapshot = JournalSnapshot.from_response(self.get_all_requests())
+        actual_counts = snapshot.count_all([pattern for _, pattern in expectations])
+        failures = [(index, count, actual, pattern)
+                    for index, ((count, pattern), actual) in enumerate(zip(expectations, actual_counts))
+                    if count != actual]
+        if failures:
+            raise VerificationError(failures)
+
+    def await_requests(self, request_pattern, count=1, timeout=5.0, initial_interval=0.005, max_interval=0.5):
+        """
+        Wait until at least count requests matching request_pattern have been received
+
+        Polls the request count with a backoff that starts at initial_interval and doubles up to max_interval,
+        returning the count as soon as it is reached. On timeout a RequestsNotReceivedError reports the last
+        count and the closest near misses.
+        """
+        start = time.monotonic()
+        polls = 0
+        for interval in backoff_intervals(initial_interval, max_interval):
+            actual = int(self.count_requests_matching(request_pattern)['count'])
+            polls += 1
+            if actual >= count:
+                return actual
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+        try:
+            near_misses = self.find_top_near_misses_for(request_pattern=request_pattern).get('nearMisses', [])
+        except Exception:
+            near_misses = []
+        raise RequestsNotReceivedError(count, actual, time.monotonic() - start, polls, request_pattern, near_misses)
@@ -0,0 +1,138 @@
+import copy
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+from pywiremock.client import WireMock
+from pywiremock.errors import ClusterError
+from pywiremock.mappings import FrozenStub
+from pywiremock.policy import CallPolicy
+
+
+class WireMockCluster:
+    """
+    Fans admin calls out to several WireMock nodes at once
+
+    Every call runs on all nodes concurrently and waits at most timeout seconds for each of them. If any node
+    fails, answers with an error status or does not answer in time a ClusterError is raised that still carries
+    the results of the nodes that did answer. Extra keyword arguments are passed to each node's WireMock client.
+
+    The timeout is also set as the deadline of each node client's CallPolicy, so a call to a hung node gives up
+    on its own instead of holding on to a worker that the next fan-out would then queue behind.
+    """
+    def __init__(self, nodes, timeout=None, max_workers=None, **client_kwargs):
+        self._nodes = [(host, port) for host, port in nodes]
+        if timeout is not None:
+            policy = copy.copy(client_kwargs.get('policy') or CallPolicy())
+            policy.deadline = timeout if policy.deadline is None else min(policy.deadline, timeout)
+            client_kwargs['policy'] = policy
+        self._clients = [WireMock(port, host, **client_kwargs) for host, port in self._nodes]
+        self._timeout = timeout
+        # headroom so that calls still winding down on a timed-out node don't hold up healthy ones
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or 2 * len(self._nodes))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def nodes(self):
+        return list(self._nodes)
+
+    def close(self):
+        # a node that timed out may still hold a worker, so don't wait for it here
+        self._executor.shutdown(wait=False)
+        for client in self._clients:
+            client.close()
+
+    def _fan_out(self, operation, call):
+        futures = dict((self._executor.submit(call, client), node) for client, node in zip(self._clients, self._nodes))
+        done, not_done = wait(futures, timeout=self._timeout)
+        results = {}
+        failures = {}
+        for future in done:
+            try:
+                result = future.result()
+                if isinstance(result, requests.Response):
+                    result.raise_for_status()
+                results[futures[future]] = result
+            except Exception as e:
+                failures[futures[future]] = e
+        for future in not_done:
+            future.cancel()
+            failures[futures[future]] = TimeoutError('no response within {}s'.format(self._timeout))
+        if failures:
+            raise ClusterError(operation, results, failures)
+        return [results[node] for node in self._nodes]
+
+    def register(self, stub_mapping):
+        """
+        Register a stub on every node, returning the per-node responses in node order
+        """
+        return self._fan_out('register', lambda client: client.register(stub_mapping))
+
+    def add_stub_mapping(self, stub_mapping):
+        """
+        Create a stub mapping on every node, returning the created mappings in node order
+        """
+        return self._fan_out('add_stub_mapping', lambda client: client.add_stub_mapping(stub_mapping))
+
+    def add_stub_mappings(self, stubs, chunk_size=500, duplicate_policy='OVERWRITE'):
+        """
+        Bulk-import stubs on every node; stubs without an id get the same UUID on all nodes
+        """
+        with_ids = []
+        for stub in stubs:
+            mapping = dict(stub.serialize())
+            mapping['id'] = stub.id or str(uuid.uuid4())
+            with_ids.append(FrozenStub(mapping))
+        return self._fan_out('add_stub_mappings',
+                             lambda client: client.add_stub_mappings(with_ids, chunk_size, duplicate_policy))[0]
+
+    def reset_mappings(self):
+        self._fan_out('reset_mappings', lambda client: client.reset_mappings())
+
+    def reset_to_default_mappings(self):
+        self._fan_out('reset_to_default_mappings', lambda client: client.reset_to_default_mappings())
+
+    def reset_requests(self):
+        self._fan_out('reset_requests', lambda client: client.reset_requests())
+
+    def reset_all_requests(self):
+        self._fan_out('reset_all_requests', lambda client: client.reset_all_requests())
+
+    def reset_scenarios(self):
+        self._fan_out('reset_scenarios', lambda client: client.reset_scenarios())
+
+    def save_mappings(self):
+        self._fan_out('save_mappings', lambda client: client.save_mappings())
+
+    def count_requests_matching(self, request_pattern):
+        """
+        Count matching requests across all nodes
+        """
+        counts = self._fan_out('count_requests_matching',
+                               lambda client: client.count_requests_matching(request_pattern))
+        return {'count': sum(int(count['count']) for count in counts)}
+
+    def find_requests_matching(self, request_pattern):
+        """
+        Matching requests from all nodes, merged in node order
+        """
+        found = self._fan_out('find_requests_matching', lambda client: client.find_requests_matching(request_pattern))
+        return {'requests': [request for node_found in found for request in node_found.get('requests', [])]}
+
+    def find_unmatched_requests(self):
+        """
+        Unmatched requests from all nodes, merged in node order
+        """
+        found = self._fan_out('find_unmatched_requests', lambda client: client.find_unmatched_requests())
+        return {'requests': [request for node_found in found for request in node_found.get('requests', [])]}
+
+    def verify(self, count, request_pattern):
+        response_count = self.count_requests_matching(request_pattern)['count']
+        if count != response_count:
+            raise AssertionError('Assertion failed. Expected count: {} Actual count: {}'.format(count, response_count))
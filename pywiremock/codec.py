@@ -0,0 +1,57 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class JsonCodec:
+    """
+    Standard library JSON codec; encodes straight to UTF-8 bytes and decodes from bytes
+    """
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """
+    orjson-backed codec, used by default when orjson is installed
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires orjson; install pywiremock[fast-json]')
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+_default_codec = None
+
+
+def default_codec():
+    """
+    The codec used when none is given: orjson when available, the standard library otherwise
+    """
+    global _default_codec
+    if _default_codec is None:
+        _default_codec = OrjsonCodec() if orjson is not None else JsonCodec()
+    return _default_codec
+
+
+def set_default_codec(codec):
+    """
+    Replace the process-wide default codec; anything with dumps(obj) -> bytes and loads(bytes) will do
+    """
+    global _default_codec
+    _default_codec = codec
@@ -0,0 +1,71 @@
+import gzip
+import threading
+
+# zlib's default; level 9 (gzip.compress's default) costs several times the CPU for a few percent on JSON
+COMPRESS_LEVEL = 6
+
+
+def gzip_if_over(data, threshold):
+    """
+    data gzipped if it is bytes of at least threshold bytes, else None; a threshold of None never compresses
+    """
+    if threshold is None or not isinstance(data, (bytes, bytearray)) or len(data) < threshold:
+        return None
+    return gzip.compress(data, COMPRESS_LEVEL)
+
+
+class CompressionStats:
+    """
+    Running totals of what gzip saved on admin calls, in both directions
+
+    Requests count the body before and after compression. Responses count the bytes received and the bytes
+    they decoded to; streamed responses are decoded as they are consumed and are left out.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests_compressed = 0
+            self.request_bytes_uncompressed = 0
+            self.request_bytes_sent = 0
+            self.responses_compressed = 0
+            self.response_bytes_received = 0
+            self.response_bytes_uncompressed = 0
+
+    def add_request(self, uncompressed, sent):
+        with self._lock:
+            self.requests_compressed += 1
+            self.request_bytes_uncompressed += uncompressed
+            self.request_bytes_sent += sent
+
+    def add_response(self, received, uncompressed):
+        with self._lock:
+            self.responses_compressed += 1
+            self.response_bytes_received += received
+            self.response_bytes_uncompressed += uncompressed
+
+    @property
+    def request_bytes_saved(self):
+        return self.request_bytes_uncompressed - self.request_bytes_sent
+
+    @property
+    def response_bytes_saved(self):
+        return self.response_bytes_uncompressed - self.response_bytes_received
+
+    @property
+    def bytes_saved(self):
+        return self.request_bytes_saved + self.response_bytes_saved
+
+    def to_dict(self):
+        with self._lock:
+            return {'requests_compressed': self.requests_compressed,
+                    'request_bytes_uncompressed': self.request_bytes_uncompressed,
+                    'request_bytes_sent': self.request_bytes_sent,
+                    'request_bytes_saved': self.request_bytes_saved,
+                    'responses_compressed': self.responses_compressed,
+                    'response_bytes_received': self.response_bytes_received,
+                    'response_bytes_uncompressed': self.response_bytes_uncompressed,
+                    'response_bytes_saved': self.response_bytes_saved,
+                    'bytes_saved': self.bytes_saved}
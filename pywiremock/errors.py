@@ -0,0 +1,118 @@
+class WireMockError(Exception):
+    """
+    Base class for errors raised by the pywiremock client
+    """
+    pass
+
+
+class BulkImportError(WireMockError):
+    """
+    One or more chunks of a bulk stub import were rejected
+
+    ids holds the UUID of every stub in input order, with None for stubs whose chunk failed; failures is a list
+    of (chunk_index, chunk_ids, reason) tuples.
+    """
+    def __init__(self, ids, failures, chunk_count):
+        self.ids = ids
+        self.failures = failures
+        details = '; '.join('chunk {}: {}'.format(index, reason) for index, _, reason in failures)
+        super(BulkImportError, self).__init__(
+            '{} of {} import chunks failed: {}'.format(len(failures), chunk_count, details))
+
+
+class VerificationError(WireMockError, AssertionError):
+    """
+    One or more request count expectations did not hold
+
+    failures is a list of (index, expected_count, actual_count, request_pattern) tuples.
+    """
+    def __init__(self, failures):
+        self.failures = failures
+        lines = ['Expected count: {} Actual count: {} for expectation {}: {}'.format(
+            expected, actual, index, pattern.to_json() if hasattr(pattern, 'to_json') else pattern)
+            for index, expected, actual, pattern in failures]
+        super(VerificationError, self).__init__(
+            'Assertion failed for {} expectation(s):\n{}'.format(len(failures), '\n'.join(lines)))
+
+
+class ClusterError(WireMockError):
+    """
+    An admin call fanned out by WireMockCluster failed or timed out on some nodes
+
+    results maps each (host, port) that answered to its result; failures maps the others to their exception.
+    """
+    def __init__(self, operation, results, failures):
+        self.operation = operation
+        self.results = results
+        self.failures = failures
+        details = '; '.join('{}:{}: {!r}'.format(host, port, error) for (host, port), error in failures.items())
+        super(ClusterError, self).__init__(
+            '{} failed on {} of {} nodes: {}'.format(operation, len(failures), len(results) + len(failures), details))
+
+
+class RequestsNotReceivedError(WireMockError, AssertionError):
+    """
+    await_requests timed out before the expected number of matching requests arrived
+    """
+    def __init__(self, expected, actual, elapsed, polls, request_pattern, near_misses=None):
+        self.expected = expected
+        self.actual = actual
+        self.elapsed = elapsed
+        self.polls = polls
+        self.near_misses = near_misses or []
+        pattern = request_pattern.to_json() if hasattr(request_pattern, 'to_json') else request_pattern
+        message = 'Timed out after {:.3f}s waiting for {} request(s) matching {}: received {} ({} polls)'.format(
+            elapsed, expected, pattern, actual, polls)
+        if self.near_misses:
+            lines = ['  {} {} (distance {})'.format(near_miss['request'].get('method'), near_miss['request'].get('url'),
+                                                   near_miss.get('matchResult', {}).get('distance'))
+                     for near_miss in self.near_misses]
+            message += '\nClosest near misses:\n' + '\n'.join(lines)
+        super(RequestsNotReceivedError, self).__init__(message)
+
+
+class ServerStartError(WireMockError):
+    """
+    A pooled mock server process exited or did not answer its readiness probe in time
+    """
+    def __init__(self, host, port, reason, output=None):
+        self.host = host
+        self.port = port
+        self.reason = reason
+        self.output = output
+        message = 'Mock server on {}:{} failed to start: {}'.format(host, port, reason)
+        if output:
+            message += '\n' + output
+        super(ServerStartError, self).__init__(message)
+
+
+class PoolTimeoutError(WireMockError):
+    """
+    No pooled server became free within the lease timeout
+    """
+    pass
+
+
+class CircuitOpenError(WireMockError):
+    """
+    The circuit breaker for a server is open after repeated failures, so the call was not attempted
+    """
+    def __init__(self, failures, retry_in):
+        self.failures = failures
+        self.retry_in = retry_in
+        super(CircuitOpenError, self).__init__(
+            'Circuit open after {} consecutive failures; next trial call in {:.3f}s'.format(failures, retry_in))
+
+
+class DeadlineExceededError(WireMockError, TimeoutError):
+    """
+    An admin call and its retries did not finish within the policy's deadline
+    """
+    def __init__(self, method, url, deadline, attempts, last_error=None):
+        self.method = method
+        self.url = url
+        self.deadline = deadline
+        self.attempts = attempts
+        self.last_error = last_error
+        super(DeadlineExceededError, self).__init__('{} {} exceeded its {}s deadline after {} attempt(s): {!r}'.format(
+            method, url, deadline, attempts, last_error))
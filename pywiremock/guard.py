@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveAndReset:
+    """
+    Guard policy: stream the journal into a timestamped file under archive_dir, then empty it
+
+    Requests logged between the download and the reset are dropped without being archived.
+    """
+    def __init__(self, archive_dir):
+        self._archive_dir = archive_dir
+
+    def apply(self, client):
+        if not os.path.isdir(self._archive_dir):
+            os.makedirs(self._archive_dir)
+        path = os.path.join(self._archive_dir, 'journal-{}.json'.format(int(time.time() * 1000)))
+        client.save_all_requests(path)
+        client.reset_requests()
+        return path
+
+
+class RemoveMatching:
+    """
+    Guard policy: delete only the logged requests matching any of the given request patterns
+    """
+    def __init__(self, request_patterns):
+        self._request_patterns = list(request_patterns)
+
+    def apply(self, client):
+        removed = 0
+        for request_pattern in self._request_patterns:
+            removed += len(client.remove_requests_matching(request_pattern).get('requests', []))
+        return removed
+
+
+class ResetJournal:
+    """
+    Guard policy: empty the journal
+    """
+    def apply(self, client):
+        client.reset_requests()
+
+
+class JournalGuard:
+    """
+    Keeps a WireMock request journal from growing without bound during long runs
+
+    Every interval seconds a background thread asks the server for the journal size, and when it exceeds
+    max_entries applies the policy (ArchiveAndReset, RemoveMatching or ResetJournal). Errors are logged and kept
+    in last_error rather than stopping the guard.
+    """
+    def __init__(self, client, max_entries, policy, interval=30.0):
+        self._client = client
+        self._max_entries = max_entries
+        self._policy = policy
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_size = None
+        self.last_error = None
+        self.enforcements = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def check(self):
+        """
+        Check the journal size once and enforce the policy if needed; returns the policy result or None
+        """
+        self.last_size = self._client.count_all_requests()
+        if self.last_size <= self._max_entries:
+            return None
+        result = self._policy.apply(self._client)
+        self.enforcements += 1
+        return result
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logger.warning('Journal guard check failed: %r', e)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='pywiremock-journal-guard')
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -1,4 +1,4 @@
-import mappings
+from pywiremock import mappings
 
 
 def stub_for(request_mapping):
@@ -73,6 +73,10 @@ def record_spec():
     return mappings.RecordSpec()
 
 
+def global_settings():
+    return mappings.GlobalSettings()
+
+
 STARTED = 'Started'
 
 
@@ -83,3 +87,15 @@ class RequestBodyMatchType:
     MATCHES_XPATH = 'matchesXPath'
     EQUAL_TO_JSON = 'equalToJson'
     CONTAINS = 'contains'
+
+
+class DuplicatePolicy:
+    OVERWRITE = 'OVERWRITE'
+    IGNORE = 'IGNORE'
+
+
+class Fault:
+    EMPTY_RESPONSE = 'EMPTY_RESPONSE'
+    MALFORMED_RESPONSE_CHUNK = 'MALFORMED_RESPONSE_CHUNK'
+    RANDOM_DATA_THEN_CLOSE = 'RANDOM_DATA_THEN_CLOSE'
+    CONNECTION_RESET_BY_PEER = 'CONNECTION_RESET_BY_PEER'
@@ -0,0 +1,112 @@
+import datetime
+import time
+
+BODY_KEYS = ('request.body', 'request.bodyAsBase64', 'response.body', 'response.bodyAsBase64',
+             'responseDefinition.body', 'responseDefinition.base64Body', 'responseDefinition.jsonBody',
+             'stubMapping.response.body', 'stubMapping.response.base64Body', 'stubMapping.response.jsonBody')
+RESPONSE_KEYS = ('response', 'responseDefinition', 'stubMapping.response')
+
+
+def journal_drop_keys(drop_bodies=False, drop_response=False, drop_keys=()):
+    """
+    The dotted paths of journal entry fields to skip while streaming the journal
+    """
+    return tuple(drop_keys) + (BODY_KEYS if drop_bodies else ()) + (RESPONSE_KEYS if drop_response else ())
+
+
+def format_since(since_date):
+    """
+    Render a since filter the way the admin API expects it: ISO-8601 in UTC with millisecond precision
+
+    Strings are passed through untouched, naive datetimes are taken to be UTC and numbers are epoch milliseconds.
+    """
+    if since_date is None or isinstance(since_date, str):
+        return since_date
+    if isinstance(since_date, (int, float)):
+        since_date = datetime.datetime.fromtimestamp(since_date / 1000.0, datetime.timezone.utc)
+    if since_date.tzinfo is not None:
+        since_date = since_date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return since_date.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(since_date.microsecond // 1000)
+
+
+class JournalTail:
+    """
+    Cursor over the request journal that only hands back entries logged since the previous poll
+
+    The cursor is the loggedDate (epoch millis) of the newest entry seen so far. Each poll asks the server for
+    entries since one millisecond before the cursor, so requests logged in the same millisecond as the cursor
+    are not lost, and drops the ids already returned at that millisecond.
+
+    limit caps how many entries a poll normally transfers. The journal answers with the newest entries, so a
+    full page that does not reach back to the cursor may have cut off older new entries; that poll is then
+    repeated without a limit rather than skipping them.
+    """
+    def __init__(self, client, since_date=None, limit=None):
+        self._client = client
+        self._limit = limit
+        self._since = format_since(since_date)
+        self._cursor = None
+        self._seen_at_cursor = set()
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    def poll(self):
+        """
+        Fetch the entries logged since the last poll, oldest first
+        """
+        page = self._client.get_all_requests(limit=self._limit, since_date=self._since)
+        if self._limit is not None and not self._reaches_cursor(page.get('requests', [])):
+            page = self._client.get_all_requests(since_date=self._since)
+        new_entries = []
+        # the journal lists the newest request first
+        for entry in reversed(page.get('requests', [])):
+            logged_date = entry['request'].get('loggedDate')
+            if self._cursor is not None and logged_date is not None:
+                if logged_date < self._cursor:
+                    continue
+                if logged_date == self._cursor and entry['id'] in self._seen_at_cursor:
+                    continue
+            new_entries.append(entry)
+
+        for entry in new_entries:
+            logged_date = entry['request'].get('loggedDate')
+            if logged_date is None:
+                continue
+            if self._cursor is None or logged_date > self._cursor:
+                self._cursor = logged_date
+                self._seen_at_cursor = set()
+            if logged_date == self._cursor:
+                self._seen_at_cursor.add(entry['id'])
+        if self._cursor is not None:
+            self._since = format_since(self._cursor - 1)
+        return new_entries
+
+    def _reaches_cursor(self, entries):
+        if len(entries) < self._limit:
+            return True
+        oldest_logged_date = entries[-1]['request'].get('loggedDate') if entries else None
+        return self._cursor is not None and oldest_logged_date is not None and oldest_logged_date <= self._cursor
+
+    def follow(self, poll_interval=1.0, stop_event=None):
+        """
+        Poll forever (or until stop_event is set), yielding each new entry as it is seen
+        """
+        while stop_event is None or not stop_event.is_set():
+            for entry in self.poll():
+                yield entry
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+
+def backoff_intervals(initial_interval=0.005, max_interval=0.5, factor=2.0):
+    """
+    Poll intervals that start tight and widen geometrically up to max_interval
+    """
+    interval = initial_interval
+    while True:
+        yield interval
+        interval = min(interval * factor, max_interval)
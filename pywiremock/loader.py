@@ -0,0 +1,186 @@
+import hashlib
+import json
+import marshal
+import mmap
+import os
+
+from pywiremock.mappings import Stub
+
+_CACHE_VERSION = 3
+
+
+def _digest(path):
+    return hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+
+
+def default_cache_path(root_dir):
+    """
+    Where the parse cache for root_dir lives: a directory named after the directory's absolute path under
+    $XDG_CACHE_HOME/pywiremock (~/.cache/pywiremock by default), so nothing is written into the mapping tree
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'pywiremock', _digest(root_dir))
+
+
+def map_file(path, mmap_threshold):
+    """
+    Contents of path as a bytes-like object; files of mmap_threshold bytes or more are memory-mapped rather
+    than read, so their pages are only loaded when (and if) they are touched
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as body_file:
+        if size < mmap_threshold or size == 0:
+            return body_file.read()
+        return memoryview(mmap.mmap(body_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class LoadedMapping:
+    """
+    One stub mapping read from a mappings/ file; its body file, if any, is only opened on first access
+    """
+    __slots__ = ('path', 'mapping', '_files_dir', '_mmap_threshold', '_body')
+
+    def __init__(self, path, mapping, files_dir, mmap_threshold):
+        self.path = path
+        self.mapping = mapping
+        self._files_dir = files_dir
+        self._mmap_threshold = mmap_threshold
+        self._body = None
+
+    @property
+    def body_file_path(self):
+        body_file_name = self.mapping.get('response', {}).get('bodyFileName')
+        return os.path.join(self._files_dir, body_file_name) if body_file_name else None
+
+    def body_bytes(self):
+        """
+        The response body as bytes or a memoryview over a memory-mapped body file
+        """
+        if self._body is None:
+            body_file_path = self.body_file_path
+            if body_file_path:
+                self._body = map_file(body_file_path, self._mmap_threshold)
+            else:
+                self._body = (self.mapping.get('response', {}).get('body') or '').encode('utf-8')
+        return self._body
+
+    def to_stub(self, inline_body_files=False):
+        """
+        Build a Stub; body files stay referenced by bodyFileName unless inline_body_files is set
+        """
+        if not self.body_file_path or not inline_body_files:
+            return Stub.deserialize(self.mapping)
+        body = bytes(self.body_bytes())
+        try:
+            return Stub.deserialize(self.mapping, body.decode('utf-8') or None)
+        except UnicodeDecodeError:
+            mapping = dict(self.mapping, response=dict(self.mapping['response'], bodyFileName=None))
+            stub = Stub.deserialize(mapping)
+            stub._response_definition.with_base64_body(body)
+            return stub
+
+
+class MappingDirectory:
+    """
+    Lazily loads a WireMock root directory (mappings/ plus __files/) as stub mappings
+
+    Mapping files are parsed one at a time as the directory is iterated. Parsed mappings are kept in an
+    on-disk cache with one marshal entry per mapping file, keyed by path, mtime and size; each entry is only
+    read when its file comes up, so unchanged files are loaded without re-reading or re-parsing the JSON and
+    without reading the rest of the cache. Entries for new or changed files are written by save_cache() (or at
+    the end of an iteration). The cache lives in the user's cache directory (see default_cache_path) unless
+    cache_path is given.
+    """
+    def __init__(self, root_dir, cache_path=None, use_cache=True, mmap_threshold=64 * 1024):
+        self._root_dir = root_dir
+        self._mappings_dir = os.path.join(root_dir, 'mappings')
+        self._files_dir = os.path.join(root_dir, '__files')
+        self._cache_path = cache_path or default_cache_path(root_dir)
+        self._use_cache = use_cache
+        self._mmap_threshold = mmap_threshold
+        self._seen = set()
+        self._parsed = {}
+
+    def _entry_path(self, path):
+        return os.path.join(self._cache_path, _digest(path) + '.marshal')
+
+    def _cached(self, path, key):
+        if not self._use_cache:
+            return None
+        try:
+            with open(self._entry_path(path), 'rb') as entry_file:
+                version, entry_path, entry_key, mappings = marshal.load(entry_file)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != _CACHE_VERSION or entry_path != path or tuple(entry_key) != key:
+            return None
+        return mappings
+
+    def save_cache(self):
+        """
+        Write cache entries for the files parsed since the last save
+        """
+        if not self._use_cache:
+            return
+        os.makedirs(self._cache_path, exist_ok=True)
+        for path, (key, mappings) in self._parsed.items():
+            entry_path = self._entry_path(path)
+            temporary_path = entry_path + '.tmp'
+            with open(temporary_path, 'wb') as entry_file:
+                marshal.dump((_CACHE_VERSION, path, key, mappings), entry_file)
+            os.replace(temporary_path, entry_path)
+        self._parsed = {}
+
+    def _prune_cache(self):
+        # after a full iteration, entries of mapping files that were not seen belong to deleted files
+        if not self._use_cache or not os.path.isdir(self._cache_path):
+            return
+        seen = set(os.path.basename(self._entry_path(path)) for path in self._seen)
+        for entry_name in os.listdir(self._cache_path):
+            if entry_name not in seen:
+                os.remove(os.path.join(self._cache_path, entry_name))
+
+    def _mapping_files(self):
+        for directory, directory_names, file_names in os.walk(self._mappings_dir):
+            directory_names.sort()
+            for file_name in sorted(file_names):
+                if file_name.endswith('.json'):
+                    yield os.path.join(directory, file_name)
+
+    def _parse(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        self._seen.add(path)
+        mappings = self._cached(path, key)
+        if mappings is None:
+            with open(path, 'rb') as mapping_file:
+                document = json.loads(mapping_file.read().decode('utf-8'))
+            mappings = document['mappings'] if 'mappings' in document else [document]
+            self._parsed[path] = (key, mappings)
+        return mappings
+
+    def __iter__(self):
+        self._seen = set()
+        self._parsed = {}
+        for path in self._mapping_files():
+            for mapping in self._parse(path):
+                yield LoadedMapping(path, mapping, self._files_dir, self._mmap_threshold)
+        self.save_cache()
+        self._prune_cache()
+
+    def stubs(self, inline_body_files=False):
+        """
+        Iterate over the directory as mappings.Stub objects
+        """
+        for loaded in self:
+            yield loaded.to_stub(inline_body_files)
+
+    def body_files(self):
+        """
+        (name, path) of every file under __files/, ready for WireMock.upload_file
+        """
+        for directory, directory_names, file_names in os.walk(self._files_dir):
+            directory_names.sort()
+            for file_name in sorted(file_names):
+                path = os.path.join(directory, file_name)
+                yield os.path.relpath(path, self._files_dir).replace(os.sep, '/'), path
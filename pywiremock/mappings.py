@@ -1,23 +1,102 @@
+import base64
+import copy
 import json
 
+from pywiremock.codec import default_codec
+
 
 class Mapping:
+    __slots__ = ()
+
     def to_json(self):
         as_dict = self.serialize()
         return json.dumps(as_dict)
 
+    def to_bytes(self, codec=None):
+        return (codec or default_codec()).dumps(self.serialize())
+
     def serialize(self):
         return self.__dict__
 
 
+class FrozenMapping(Mapping):
+    """
+    Immutable snapshot of a mapping whose JSON is encoded once, when frozen, and reused by every later call
+
+    Instances can be shared freely between threads and servers. serialize() hands back the cached structure
+    itself, so callers must copy it before making changes.
+    """
+    __slots__ = ('_serialized', '_codec', '_bytes')
+
+    def __init__(self, serialized, codec=None):
+        serialized = copy.deepcopy(serialized)
+        codec = codec or default_codec()
+        object.__setattr__(self, '_serialized', serialized)
+        object.__setattr__(self, '_codec', codec)
+        object.__setattr__(self, '_bytes', codec.dumps(serialized))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} is immutable'.format(type(self).__name__))
+
+    def to_json(self):
+        return self._bytes.decode('utf-8')
+
+    def to_bytes(self, codec=None):
+        if codec is None or codec is self._codec:
+            return self._bytes
+        return codec.dumps(self._serialized)
+
+    def serialize(self):
+        return self._serialized
+
+    def freeze(self, codec=None):
+        return self
+
+
+class FrozenStub(FrozenMapping):
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self._serialized.get('id')
+
+
+class FrozenRequestPattern(FrozenMapping):
+    __slots__ = ()
+
+
+class FrozenResponseDefinition(FrozenMapping):
+    __slots__ = ()
+
+
 class Stub(Mapping):
+    # fields serialize() writes itself, plus ones the server assigns
+    _OWN_FIELDS = frozenset(['request', 'response', 'id', 'uuid', 'insertionIndex', 'scenarioName',
+                             'requiredScenarioState', 'newScenarioState'])
+
     def __init__(self, request_pattern):
         assert isinstance(request_pattern, RequestPattern)
         self._request_pattern = request_pattern
         self._response_definition = None
+        self._id = None
         self._scenario_name = None
         self._required_scenario_state = None
         self._new_scenario_state = None
+        self._extra = {}
+
+    @property
+    def id(self):
+        return self._id
+
+    def with_id(self, mapping_id):
+        self._id = mapping_id
+        return self
+
+    def freeze(self, codec=None):
+        return FrozenStub(self.serialize(), codec)
 
     def will_return(self, response_definition):
         assert isinstance(response_definition, ResponseDefinition)
@@ -37,7 +116,11 @@ class Stub(Mapping):
         return self
 
     def serialize(self):
-        as_dict = {'request': self._request_pattern.serialize(), 'response': self._response_definition.serialize()}
+        as_dict = dict(self._extra)
+        as_dict['request'] = self._request_pattern.serialize()
+        as_dict['response'] = self._response_definition.serialize()
+        if self._id:
+            as_dict['id'] = self._id
         if self._scenario_name:
             as_dict['scenarioName'] = self._scenario_name
         if self._required_scenario_state:
@@ -48,24 +131,54 @@ class Stub(Mapping):
 
     @classmethod
     def deserialize(cls, mapping, response_body=None):
-        request_method = mapping['request']['method']
-        request_url = mapping['request']['url']
-        request_body_patterns = mapping['request'].get('bodyPatterns', [])
-        request_headers = mapping['request'].get('headers', {})
-        request = RequestPattern(request_method, UrlPattern(request_url))
-        request.set_headers(request_headers)
-        for body_pattern in request_body_patterns:
+        """
+        Build a Stub from a stub mapping as WireMock serializes it (a dict or a views.StubMappingView)
+
+        Every url form and response body form is kept, as are fields this class has no builder for. A
+        response_body string, if given, replaces the mapping's own body.
+        """
+        if hasattr(mapping, 'to_dict'):
+            mapping = mapping.to_dict()
+        if not isinstance(mapping.get('request'), dict) or not isinstance(mapping.get('response'), dict):
+            raise ValueError('Stub mapping needs request and response objects: {}'.format(mapping))
+        request_mapping = dict(mapping['request'])
+        url_keys = [key for key in UrlPattern.MATCH_TYPES if key in request_mapping]
+        if len(url_keys) > 1:
+            raise ValueError('Stub mapping request has more than one of {}'.format(', '.join(url_keys)))
+        url_pattern = UrlPattern(request_mapping.pop(url_keys[0]), url_keys[0]) if url_keys else UrlPattern(None)
+        request = RequestPattern(request_mapping.pop('method', 'ANY'), url_pattern)
+        request.set_headers(request_mapping.pop('headers', {}))
+        for body_pattern in request_mapping.pop('bodyPatterns', []):
             new_pattern = RequestBodyPattern(None, None)
             new_pattern._pattern = body_pattern
             request.with_request_body(new_pattern)
-
-        response_status = mapping['response']['status']
-        response_headers = mapping['response'].get('headers', {})
-        stringified_response_body = response_body
-        response = ResponseDefinition(response_status, stringified_response_body, response_headers)
+        request._pattern.update(request_mapping)
+
+        response_mapping = dict(mapping['response'])
+        response = ResponseDefinition(response_mapping.pop('status', 200), None, response_mapping.pop('headers', {}))
+        body_forms = [response_mapping.pop(key, None) for key in ('body', 'jsonBody', 'base64Body', 'bodyFileName')]
+        body, json_body, base64_body, body_file_name = body_forms
+        if response_body is not None:
+            response.with_body(response_body)
+        elif body is not None:
+            response.with_body(body)
+        elif json_body is not None:
+            response.with_json_body(json_body)
+        elif base64_body is not None:
+            response.with_base64_body(base64_body)
+        elif body_file_name is not None:
+            response.with_body_file(body_file_name)
+        response._fixed_delay = response_mapping.pop('fixedDelayMilliseconds', None)
+        response._delay_distribution = response_mapping.pop('delayDistribution', None)
+        response._chunked_dribble_delay = response_mapping.pop('chunkedDribbleDelay', None)
+        response._fault = response_mapping.pop('fault', None)
+        response._extra = response_mapping
 
         stub = Stub(request).will_return(response)
+        stub._extra = dict((key, value) for key, value in mapping.items() if key not in cls._OWN_FIELDS)
 
+        if 'id' in mapping:
+            stub.with_id(mapping['id'])
         if 'scenarioName' in mapping:
             stub.in_scenario(mapping['scenarioName'])
         if 'requiredScenarioState' in mapping:
@@ -79,7 +192,9 @@ class Stub(Mapping):
 class RequestPattern(Mapping):
     def __init__(self, method, url_pattern):
         assert isinstance(url_pattern, UrlPattern)
-        self._pattern = {'method': method, 'url': url_pattern.serialize()}
+        self._pattern = {'method': method}
+        if url_pattern.serialize() is not None:
+            self._pattern[url_pattern.match_type] = url_pattern.serialize()
         self._headers = {}
 
     def set_headers(self, headers):
@@ -103,9 +218,13 @@ class RequestPattern(Mapping):
         self._pattern['bodyPatterns'] = body_patterns
         return self
 
+    def freeze(self, codec=None):
+        return FrozenRequestPattern(self.serialize(), codec)
+
     def serialize(self):
-        self._pattern['headers'] = self._headers
-        return self._pattern
+        as_dict = dict(self._pattern)
+        as_dict['headers'] = self._headers
+        return as_dict
 
 
 class RequestBodyPattern(Mapping):
@@ -120,7 +239,15 @@ class ResponseDefinition(Mapping):
     def __init__(self, status_code=None, body=None, headers=None):
         self._status_code = status_code
         self._body = body
+        self._json_body = None
+        self._base64_body = None
+        self._body_file_name = None
         self._headers = headers if headers else {}
+        self._extra = {}
+        self._fixed_delay = None
+        self._delay_distribution = None
+        self._chunked_dribble_delay = None
+        self._fault = None
 
     def with_status(self, status_code):
         self._status_code = status_code
@@ -133,26 +260,130 @@ class ResponseDefinition(Mapping):
     def with_header(self, key, value):
         self._headers[key] = value
 
-    def with_body_file(self, body_file_path):
-        raise NotImplementedError
+    def with_json_body(self, document):
+        self._json_body = document
+        return self
+
+    def with_base64_body(self, base64_body):
+        """
+        Serve a binary body, given base64-encoded as str or raw as bytes
+        """
+        if isinstance(base64_body, (bytes, bytearray)):
+            base64_body = base64.b64encode(base64_body).decode('ascii')
+        self._base64_body = base64_body
+        return self
+
+    def with_body_file(self, body_file_name):
+        """
+        Serve the body from a file in the server's __files store; see WireMock.upload_file
+        """
+        self._body_file_name = body_file_name
+        return self
+
+    def with_fixed_delay(self, milliseconds):
+        self._fixed_delay = milliseconds
+        return self
+
+    def with_uniform_random_delay(self, lower_milliseconds, upper_milliseconds):
+        self._delay_distribution = uniform_distribution(lower_milliseconds, upper_milliseconds)
+        return self
+
+    def with_log_normal_random_delay(self, median_milliseconds, sigma):
+        self._delay_distribution = log_normal_distribution(median_milliseconds, sigma)
+        return self
+
+    def with_chunked_dribble_delay(self, number_of_chunks, total_duration_milliseconds):
+        """
+        Send the body in number_of_chunks pieces spread evenly over total_duration_milliseconds
+        """
+        self._chunked_dribble_delay = {'numberOfChunks': number_of_chunks,
+                                       'totalDuration': total_duration_milliseconds}
+        return self
+
+    def with_fault(self, fault):
+        """
+        Answer with a broken response instead of the status and body; see helpers.Fault
+        """
+        self._fault = fault
+        return self
+
+    def freeze(self, codec=None):
+        return FrozenResponseDefinition(self.serialize(), codec)
 
     def serialize(self):
-        as_dict = {'status': self._status_code}
+        as_dict = dict(self._extra)
+        as_dict['status'] = self._status_code
         as_dict['headers'] = self._headers
         if self._body:
             as_dict['body'] = self._body
+        if self._json_body is not None:
+            as_dict['jsonBody'] = self._json_body
+        if self._base64_body:
+            as_dict['base64Body'] = self._base64_body
+        if self._body_file_name:
+            as_dict['bodyFileName'] = self._body_file_name
+        if self._fixed_delay is not None:
+            as_dict['fixedDelayMilliseconds'] = self._fixed_delay
+        if self._delay_distribution:
+            as_dict['delayDistribution'] = self._delay_distribution
+        if self._chunked_dribble_delay:
+            as_dict['chunkedDribbleDelay'] = self._chunked_dribble_delay
+        if self._fault:
+            as_dict['fault'] = self._fault
 
         return as_dict
 
 
+def uniform_distribution(lower_milliseconds, upper_milliseconds):
+    return {'type': 'uniform', 'lower': lower_milliseconds, 'upper': upper_milliseconds}
+
+
+def log_normal_distribution(median_milliseconds, sigma):
+    return {'type': 'lognormal', 'median': median_milliseconds, 'sigma': sigma}
+
+
+class GlobalSettings(Mapping):
+    """
+    Server-wide settings; its delays apply to every stub response that does not set its own
+    """
+    def __init__(self, fixed_delay=None):
+        self._fixed_delay = fixed_delay
+        self._delay_distribution = None
+
+    def with_fixed_delay(self, milliseconds):
+        self._fixed_delay = milliseconds
+        return self
+
+    def with_uniform_random_delay(self, lower_milliseconds, upper_milliseconds):
+        self._delay_distribution = uniform_distribution(lower_milliseconds, upper_milliseconds)
+        return self
+
+    def with_log_normal_random_delay(self, median_milliseconds, sigma):
+        self._delay_distribution = log_normal_distribution(median_milliseconds, sigma)
+        return self
+
+    def serialize(self):
+        as_dict = {}
+        if self._fixed_delay is not None:
+            as_dict['fixedDelay'] = self._fixed_delay
+        if self._delay_distribution:
+            as_dict['delayDistribution'] = self._delay_distribution
+        return as_dict
+
+
 class Scenario(Mapping):
     def __init__(self):
         pass
 
 
 class UrlPattern(Mapping):
-    def __init__(self, url):
+    # url: exact url with query; urlPattern: regex on it; urlPath / urlPathPattern: the same without the query
+    MATCH_TYPES = ('url', 'urlPattern', 'urlPath', 'urlPathPattern')
+
+    def __init__(self, url, match_type='url'):
+        assert match_type in self.MATCH_TYPES
         self._url = url
+        self.match_type = match_type
 
     def serialize(self):
         return self._url
@@ -161,27 +392,56 @@ class UrlPattern(Mapping):
 class RecordSpec(Mapping):
     def __init__(self, url=None):
         self._url = url
+        self._filters = None
+        self._capture_headers = {}
+        self._extract_body_criteria = {}
+        self._persist = None
+        self._repeats_as_scenarios = None
 
     def serialize(self):
         as_dict = {"targetBaseUrl": self._url}
+        if self._filters:
+            as_dict['filters'] = self._filters
+        if self._capture_headers:
+            as_dict['captureHeaders'] = self._capture_headers
+        if self._extract_body_criteria:
+            as_dict['extractBodyCriteria'] = self._extract_body_criteria
+        if self._persist is not None:
+            as_dict['persist'] = self._persist
+        if self._repeats_as_scenarios is not None:
+            as_dict['repeatsAsScenarios'] = self._repeats_as_scenarios
         return as_dict
 
     def for_target(self, url):
         self._url = url
         return self
 
+    def only_requests_matching(self, request_pattern):
+        assert isinstance(request_pattern, (RequestPattern, FrozenRequestPattern))
+        self._filters = request_pattern.serialize()
+        return self
+
+    def capture_header(self, name, case_insensitive=False):
+        self._capture_headers[name] = {'caseInsensitive': True} if case_insensitive else {}
+        return self
+
+    def extract_binary_bodies_over(self, size_in_bytes):
+        self._extract_body_criteria['binarySizeThreshold'] = str(size_in_bytes)
+        return self
+
+    def extract_text_bodies_over(self, size_in_bytes):
+        self._extract_body_criteria['textSizeThreshold'] = str(size_in_bytes)
+        return self
+
+    def make_stubs_persistent(self, persistent=True):
+        self._persist = persistent
+        return self
+
+    def ignore_repeat_requests(self):
+        self._repeats_as_scenarios = False
+        return self
+
     # TODO
-    # startRecording(
-    #     recordSpec()
-    #         .forTarget("http://example.mocklab.io")
-    #         .onlyRequestsMatching(getRequestedFor(urlPathMatching("/api/.*")))
-    #         .captureHeader("Accept")
-    #         .captureHeader("Content-Type", true)
-    #         .extractBinaryBodiesOver(10240)
-    #         .extractTextBodiesOver(2048)
-    #         .makeStubsPersistent(false)
-    #         .ignoreRepeatRequests()
     #         .transformers("modify-response-header")
     #         .transformerParameters(Parameters.one("headerValue", "123"))
     #         .matchRequestBodyWithEqualToJson(false, true)
-    # );
@@ -0,0 +1,332 @@
+import base64
+import functools
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+from urllib.parse import parse_qs, urlsplit
+
+
+# keys of a value pattern that tune a matcher rather than being matchers themselves
+_MATCH_OPTIONS = frozenset(['caseInsensitive', 'ignoreArrayOrder', 'ignoreExtraElements', 'xPathNamespaces',
+                            'enablePlaceholders', 'placeholderOpeningDelimiterRegex',
+                            'placeholderClosingDelimiterRegex'])
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_pattern(pattern):
+    """
+    Compile a regular expression once; URL and body patterns are matched over and over against every request
+    """
+    return re.compile(pattern)
+
+
+class MatchableRequest:
+    """
+    A request reduced to the parts stub and verification patterns look at, with the derived views (lower-cased
+    headers, path, query parameters, cookies) computed once no matter how many patterns are tried against it
+    """
+    __slots__ = ('method', 'url', 'path', 'headers', 'body', '_query', '_cookies')
+
+    def __init__(self, method, url, headers=None, body=None):
+        self.method = method.upper()
+        self.url = url
+        self.path = url.split('?', 1)[0]
+        self.headers = {}
+        for name, value in (headers or {}).items():
+            values = value if isinstance(value, list) else [value]
+            self.headers.setdefault(name.lower(), []).extend(values)
+        self.body = body if body is not None else ''
+        self._query = None
+        self._cookies = None
+
+    @classmethod
+    def from_logged_request(cls, logged_request):
+        """
+        Build from a journal entry's 'request' object as returned by the admin API
+        """
+        body = logged_request.get('body')
+        if body is None and logged_request.get('bodyAsBase64'):
+            body = base64.b64decode(logged_request['bodyAsBase64']).decode('utf-8', 'replace')
+        return cls(logged_request['method'], logged_request['url'], logged_request.get('headers'), body)
+
+    @property
+    def query(self):
+        if self._query is None:
+            self._query = parse_qs(urlsplit(self.url).query, keep_blank_values=True)
+        return self._query
+
+    @property
+    def cookies(self):
+        if self._cookies is None:
+            self._cookies = {}
+            for header in self.headers.get('cookie', []):
+                for part in header.split(';'):
+                    name, _, value = part.strip().partition('=')
+                    if name:
+                        self._cookies.setdefault(name, []).append(value)
+        return self._cookies
+
+
+def _equal_to(expected, value, spec):
+    if spec.get('caseInsensitive'):
+        return expected.lower() == value.lower()
+    return expected == value
+
+
+def _contains(expected, value, spec):
+    return expected in value
+
+
+def _matches(expected, value, spec):
+    return compile_pattern(expected).fullmatch(value) is not None
+
+
+def _does_not_match(expected, value, spec):
+    return compile_pattern(expected).fullmatch(value) is None
+
+
+def _json_equal(expected, actual, ignore_array_order, ignore_extra_elements):
+    if isinstance(expected, dict):
+        if not isinstance(actual, dict):
+            return False
+        if not ignore_extra_elements and set(expected) != set(actual):
+            return False
+        return all(key in actual and _json_equal(item, actual[key], ignore_array_order, ignore_extra_elements)
+                   for key, item in expected.items())
+    if isinstance(expected, list):
+        if not isinstance(actual, list):
+            return False
+        if len(expected) != len(actual) and not ignore_extra_elements:
+            return False
+        if not ignore_array_order:
+            return len(expected) == len(actual) and all(
+                _json_equal(e, a, ignore_array_order, ignore_extra_elements) for e, a in zip(expected, actual))
+        remaining = list(actual)
+        for item in expected:
+            for index, candidate in enumerate(remaining):
+                if _json_equal(item, candidate, ignore_array_order, ignore_extra_elements):
+                    del remaining[index]
+                    break
+            else:
+                return False
+        return True
+    return expected == actual
+
+
+def _equal_to_json(expected, value, spec):
+    if not isinstance(expected, (dict, list)):
+        expected = json.loads(expected)
+    try:
+        actual = json.loads(value)
+    except ValueError:
+        return False
+    return _json_equal(expected, actual, spec.get('ignoreArrayOrder', False), spec.get('ignoreExtraElements', False))
+
+
+def _canonical_xml(element):
+    children = tuple(_canonical_xml(child) for child in element)
+    return element.tag, tuple(sorted(element.attrib.items())), (element.text or '').strip(), children
+
+
+def _parse_xml(value):
+    try:
+        return ElementTree.fromstring(value)
+    except ElementTree.ParseError:
+        return None
+
+
+def _equal_to_xml(expected, value, spec):
+    actual = _parse_xml(value)
+    return actual is not None and _canonical_xml(ElementTree.fromstring(expected)) == _canonical_xml(actual)
+
+
+def _matches_xpath(expected, value, spec):
+    # ElementTree only understands a subset of XPath, evaluated relative to the document root
+    root = _parse_xml(value)
+    if root is None:
+        return False
+    path = expected if isinstance(expected, str) else expected.get('expression', '')
+    if path.startswith('/'):
+        head, _, rest = path.lstrip('/').partition('/')
+        if head != root.tag:
+            return False
+        path = './' + rest if rest else '.'
+    try:
+        return len(root.findall(path)) > 0
+    except SyntaxError:
+        return False
+
+
+_VALUE_MATCHERS = {
+    'equalTo': _equal_to,
+    'contains': _contains,
+    'matches': _matches,
+    'doesNotMatch': _does_not_match,
+    'equalToJson': _equal_to_json,
+    'equalToXml': _equal_to_xml,
+    'matchesXPath': _matches_xpath,
+}
+
+
+def match_value(spec, value):
+    """
+    Check a single string (header, query parameter, cookie or body) against a WireMock value pattern such as
+    {'equalTo': 'x'} or {'absent': True}; value is None when the field is missing
+    """
+    if 'absent' in spec:
+        return (value is None) == bool(spec['absent'])
+    if value is None:
+        return False
+    for operator, expected in spec.items():
+        if operator in _MATCH_OPTIONS:
+            continue
+        matcher = _VALUE_MATCHERS.get(operator)
+        if matcher is None:
+            raise ValueError('Unsupported match operator: {}'.format(operator))
+        if not matcher(expected, value, spec):
+            return False
+    return True
+
+
+def validate_value_pattern(spec, where='value pattern'):
+    """
+    Raise ValueError if match_value could fail on spec rather than answer: unknown operators, expected values
+    of the wrong type, and regular expressions, JSON or XML that do not parse
+    """
+    if not isinstance(spec, dict):
+        raise ValueError('{} must be an object, not {!r}'.format(where, spec))
+    for operator, expected in spec.items():
+        if operator in _MATCH_OPTIONS or operator == 'absent':
+            continue
+        if operator not in _VALUE_MATCHERS:
+            raise ValueError('Unsupported match operator in {}: {}'.format(where, operator))
+        if operator == 'equalToJson':
+            if not isinstance(expected, (dict, list)):
+                _parse_expected(json.loads, expected, operator, where)
+        elif operator == 'matchesXPath':
+            if not isinstance(expected, (str, dict)):
+                raise ValueError('{} of {} must be a string or object'.format(operator, where))
+        elif not isinstance(expected, str):
+            raise ValueError('{} of {} must be a string, not {!r}'.format(operator, where, expected))
+        elif operator in ('matches', 'doesNotMatch'):
+            _parse_expected(compile_pattern, expected, operator, where)
+        elif operator == 'equalToXml':
+            _parse_expected(ElementTree.fromstring, expected, operator, where)
+
+
+def _parse_expected(parse, expected, operator, where):
+    try:
+        parse(expected)
+    except (ValueError, TypeError, re.error, ElementTree.ParseError) as e:
+        raise ValueError('Invalid {} in {}: {}'.format(operator, where, e))
+
+
+def validate_request_pattern(pattern):
+    """
+    Raise ValueError if match_request could fail on pattern rather than answer; see validate_value_pattern
+    """
+    if not isinstance(pattern, dict):
+        raise ValueError('A request pattern must be an object, not {!r}'.format(pattern))
+    if not isinstance(pattern.get('method', 'ANY'), str):
+        raise ValueError('Request method must be a string')
+    for key in ('url', 'urlPattern', 'urlPath', 'urlPathPattern'):
+        if key not in pattern:
+            continue
+        if not isinstance(pattern[key], str):
+            raise ValueError('{} must be a string, not {!r}'.format(key, pattern[key]))
+        if key in ('urlPattern', 'urlPathPattern'):
+            _parse_expected(compile_pattern, pattern[key], key, 'the request pattern')
+    for field in ('headers', 'queryParameters', 'cookies'):
+        specs = pattern.get(field) or {}
+        if not isinstance(specs, dict):
+            raise ValueError('{} must be an object'.format(field))
+        for name, spec in specs.items():
+            validate_value_pattern(spec, '{} {}'.format(field, name))
+    body_patterns = pattern.get('bodyPatterns') or []
+    if not isinstance(body_patterns, list):
+        raise ValueError('bodyPatterns must be an array')
+    for index, spec in enumerate(body_patterns):
+        validate_value_pattern(spec, 'bodyPatterns[{}]'.format(index))
+
+
+def _match_multi_value(spec, values):
+    if not values:
+        return match_value(spec, None)
+    return any(match_value(spec, value) for value in values)
+
+
+def match_url(pattern, request):
+    """
+    Check the url, urlPattern, urlPath or urlPathPattern of a request pattern; a pattern with none matches any url
+    """
+    if 'url' in pattern:
+        return pattern['url'] == request.url
+    if 'urlPattern' in pattern:
+        return compile_pattern(pattern['urlPattern']).fullmatch(request.url) is not None
+    if 'urlPath' in pattern:
+        return pattern['urlPath'] == request.path
+    if 'urlPathPattern' in pattern:
+        return compile_pattern(pattern['urlPathPattern']).fullmatch(request.path) is not None
+    return True
+
+
+def match_request(pattern, request):
+    """
+    Check a MatchableRequest against a serialized request pattern (the 'request' object of a stub mapping)
+    """
+    method = pattern.get('method', 'ANY')
+    if method != 'ANY' and method != request.method:
+        return False
+    if not match_url(pattern, request):
+        return False
+    for name, spec in (pattern.get('headers') or {}).items():
+        if not _match_multi_value(spec, request.headers.get(name.lower())):
+            return False
+    for name, spec in (pattern.get('queryParameters') or {}).items():
+        if not _match_multi_value(spec, request.query.get(name)):
+            return False
+    for name, spec in (pattern.get('cookies') or {}).items():
+        if not _match_multi_value(spec, request.cookies.get(name)):
+            return False
+    for spec in pattern.get('bodyPatterns') or []:
+        if not match_value(spec, request.body):
+            return False
+    return True
+
+
+class JournalSnapshot:
+    """
+    A request journal fetched once and matched locally, so any number of patterns can be checked against it
+    without further round trips
+    """
+    def __init__(self, serve_events):
+        self._requests = [MatchableRequest.from_logged_request(event['request']) for event in serve_events]
+
+    @classmethod
+    def from_response(cls, journal):
+        """
+        Build from the document returned by WireMock.get_all_requests
+        """
+        return cls(journal.get('requests', []))
+
+    def __len__(self):
+        return len(self._requests)
+
+    def count_all(self, request_patterns):
+        """
+        Count the requests matching each pattern in a single pass over the journal
+        """
+        patterns = [_as_pattern(pattern) for pattern in request_patterns]
+        counts = [0] * len(patterns)
+        for request in self._requests:
+            for index, pattern in enumerate(patterns):
+                if match_request(pattern, request):
+                    counts[index] += 1
+        return counts
+
+    def count(self, request_pattern):
+        return self.count_all([request_pattern])[0]
+
+
+def _as_pattern(request_pattern):
+    return request_pattern if isinstance(request_pattern, dict) else request_pattern.serialize()
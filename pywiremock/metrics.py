@@ -0,0 +1,155 @@
+import re
+import threading
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)$')
+
+
+def endpoint_of(url):
+    """
+    The admin endpoint template of url, e.g. http://host:1/__admin/mappings/<uuid> -> /mappings/{id}
+    """
+    path = url.split('?', 1)[0]
+    admin_index = path.find('/__admin')
+    path = path[admin_index + len('/__admin'):] if admin_index >= 0 else path.split('/', 3)[-1]
+    if path.startswith('/files/'):
+        return '/files/{name}'
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/')) or '/'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(method, endpoint):
+    return 'method="{}",endpoint="{}"'.format(_escape_label(method), _escape_label(endpoint))
+
+
+class CallInfo:
+    """
+    What a post-call hook learns about one admin call
+    """
+    __slots__ = ('method', 'url', 'endpoint', 'status', 'elapsed', 'request_bytes', 'response_bytes', 'error')
+
+    def __init__(self, method, url, endpoint, status, elapsed, request_bytes, response_bytes, error):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.status = status
+        self.elapsed = elapsed
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.error = error
+
+
+class Instrumentation:
+    """
+    Pre- and post-call hooks run around every admin call of the clients it is attached to
+
+    Pre-call hooks are called with (method, url); post-call hooks and collectors with a CallInfo. A client
+    without instrumentation, or with an Instrumentation that has no hooks, skips timing altogether.
+    """
+    def __init__(self, *collectors):
+        self._pre_call_hooks = []
+        self._post_call_hooks = []
+        for collector in collectors:
+            self.add_collector(collector)
+
+    @property
+    def enabled(self):
+        return bool(self._pre_call_hooks or self._post_call_hooks)
+
+    def add_pre_call_hook(self, hook):
+        self._pre_call_hooks = self._pre_call_hooks + [hook]
+        return self
+
+    def add_post_call_hook(self, hook):
+        self._post_call_hooks = self._post_call_hooks + [hook]
+        return self
+
+    def add_collector(self, collector):
+        return self.add_post_call_hook(collector.observe)
+
+    def before_call(self, method, url):
+        for hook in self._pre_call_hooks:
+            hook(method, url)
+
+    def after_call(self, call):
+        for hook in self._post_call_hooks:
+            hook(call)
+
+
+class MetricsCollector:
+    """
+    Per-endpoint call counts, errors, latency histograms and request/response byte totals
+
+    Export with to_dict() or to_prometheus() (Prometheus or OpenMetrics text exposition format).
+    """
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS, prefix='pywiremock_admin'):
+        self._buckets = tuple(sorted(buckets))
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, call):
+        key = (call.method, call.endpoint)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'calls': 0, 'errors': 0, 'latency_sum': 0.0,
+                                              'latency_buckets': [0] * len(self._buckets),
+                                              'request_bytes': 0, 'response_bytes': 0}
+            series['calls'] += 1
+            if call.error is not None or (call.status is not None and call.status >= 400):
+                series['errors'] += 1
+            series['latency_sum'] += call.elapsed
+            for index, bound in enumerate(self._buckets):
+                if call.elapsed <= bound:
+                    series['latency_buckets'][index] += 1
+            series['request_bytes'] += call.request_bytes
+            series['response_bytes'] += call.response_bytes
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def to_dict(self):
+        """
+        {'METHOD /endpoint': {calls, errors, latency_sum, latency_buckets: {bound: cumulative count}, ...}}
+        """
+        with self._lock:
+            result = {}
+            for (method, endpoint), series in sorted(self._series.items()):
+                entry = dict(series)
+                entry['latency_buckets'] = dict(zip(self._buckets, series['latency_buckets']))
+                result['{} {}'.format(method, endpoint)] = entry
+            return result
+
+    def to_prometheus(self, openmetrics=False):
+        """
+        The collected metrics in the Prometheus text exposition format, or in OpenMetrics with openmetrics set
+
+        Each metric family is one block: its # TYPE line, then its samples for every (method, endpoint). The two
+        formats differ in how counters are declared: Prometheus names the sample (calls_total), OpenMetrics the
+        family (calls) and ends with # EOF.
+        """
+        prefix = self._prefix
+        with self._lock:
+            series = [(_labels(method, endpoint), dict(values, latency_buckets=list(values['latency_buckets'])))
+                      for (method, endpoint), values in sorted(self._series.items())]
+        lines = []
+        for family in ('calls', 'errors', 'request_bytes', 'response_bytes'):
+            lines.append('# TYPE {}_{}{} counter'.format(prefix, family, '' if openmetrics else '_total'))
+            for labels, values in series:
+                lines.append('{}_{}_total{{{}}} {}'.format(prefix, family, labels, values[family]))
+        lines.append('# TYPE {}_latency_seconds histogram'.format(prefix))
+        for labels, values in series:
+            for bound, count in zip(self._buckets, values['latency_buckets']):
+                lines.append('{}_latency_seconds_bucket{{{},le="{}"}} {}'.format(prefix, labels, bound, count))
+            lines.append('{}_latency_seconds_bucket{{{},le="+Inf"}} {}'.format(prefix, labels, values['calls']))
+            lines.append('{}_latency_seconds_count{{{}}} {}'.format(prefix, labels, values['calls']))
+            lines.append('{}_latency_seconds_sum{{{}}} {}'.format(prefix, labels, values['latency_sum']))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
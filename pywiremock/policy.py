@@ -0,0 +1,229 @@
+import random
+import threading
+import time
+
+from pywiremock.errors import CircuitOpenError, DeadlineExceededError
+from pywiremock.metrics import endpoint_of
+
+# POSTs that only reset state or read it, so sending them twice does no harm
+IDEMPOTENT_POSTS = frozenset(['/reset', '/mappings/reset', '/requests/reset', '/scenarios/reset', '/requests/count',
+                              '/requests/find', '/near-misses/request', '/near-misses/request-pattern'])
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'DELETE'])
+RETRY_STATUSES = frozenset([502, 503, 504])
+
+
+class CallPolicy:
+    """
+    Timeouts, deadline, retries and circuit breaking for admin calls
+
+    Every attempt gets connect_timeout to connect and read_timeout between bytes received; deadline, if set,
+    bounds a whole call including its retries. Only idempotent calls (GETs, DELETEs, resets and read-only
+    queries) are retried, up to max_retries times, after connection errors, timeouts and 502/503/504 answers,
+    sleeping a random time up to backoff_initial * 2 ** attempt (capped at backoff_max) in between.
+
+    With failure_threshold set, that many failed calls in a row open a circuit breaker: further calls fail at
+    once with CircuitOpenError until recovery_time has passed, when a single trial call is let through. A call
+    counts as failed on a connection error, a timeout or a 5xx answer; errors on the caller's side, such as a
+    cancelled coroutine or an invalid url, say nothing about the server and are not counted. The defaults only
+    set timeouts, so a hung server can no longer block a caller forever.
+    """
+    def __init__(self, connect_timeout=5.0, read_timeout=60.0, deadline=None, max_retries=0, backoff_initial=0.05,
+                 backoff_max=2.0, failure_threshold=None, recovery_time=5.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+
+    def is_idempotent(self, method, url, data=None):
+        # a streamed body (such as a file upload) cannot be replayed
+        if data is not None and not isinstance(data, (bytes, bytearray, str)):
+            return False
+        method = method.upper()
+        return method in IDEMPOTENT_METHODS or (method == 'POST' and endpoint_of(url) in IDEMPOTENT_POSTS)
+
+    def backoff(self, attempt):
+        """
+        Seconds to sleep before retry number attempt (counting from 0), with full jitter
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_initial * 2 ** attempt))
+
+    def timeouts(self, remaining=None):
+        """
+        (connect, read) timeouts for one attempt, shortened to fit the remaining deadline
+        """
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        return (min(self.connect_timeout, remaining) if self.connect_timeout is not None else remaining,
+                min(self.read_timeout, remaining) if self.read_timeout is not None else remaining)
+
+    def attempts(self, method, url, data=None, breaker=None):
+        """
+        Bookkeeping for the attempts of one call, shared by the sync and async transports; see CallAttempts
+        """
+        return CallAttempts(self, breaker, method, url, data)
+
+    def circuit_breaker(self):
+        """
+        A fresh breaker for one server, or None if circuit breaking is off
+        """
+        if self.failure_threshold is None:
+            return None
+        return CircuitBreaker(self.failure_threshold, self.recovery_time)
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failed calls to one server and stops calls to it once failure_threshold is reached
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold, recovery_time):
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self._recovery_time:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go ahead; in the half-open state only one trial call may
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            retry_in = max(0.0, self._recovery_time - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self._failures, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """
+        End a call that neither succeeded nor failed, so a half-open breaker lets the next trial through
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+class CallAttempts:
+    """
+    The retry, deadline and circuit breaker decisions for the attempts of one call
+
+    A transport runs the loop and makes the requests; this decides around each attempt:
+
+        attempts = policy.attempts(method, url, data, breaker)
+        while True:
+            timeouts = attempts.before_attempt()
+            try:
+                response = send(timeouts)
+            except (connection error, timeout) as e:
+                if not attempts.failed(e):
+                    raise
+            except BaseException:
+                attempts.aborted()
+                raise
+            else:
+                if not attempts.answered(response.status):
+                    return response
+            sleep(attempts.pause())
+    """
+    def __init__(self, policy, breaker, method, url, data=None):
+        self._policy = policy
+        self._breaker = breaker
+        self._method = method
+        self._url = url
+        self._retries = policy.max_retries if policy.is_idempotent(method, url, data) else 0
+        self._deadline = time.monotonic() + policy.deadline if policy.deadline is not None else None
+        self._error = None
+        self.attempt = 0
+
+    def _past_deadline(self):
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def before_attempt(self):
+        """
+        (connect, read) timeouts for the next attempt; raises DeadlineExceededError or CircuitOpenError instead
+        if it may not be made
+        """
+        remaining = self._deadline - time.monotonic() if self._deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError(self._method, self._url, self._policy.deadline, self.attempt, self._error)
+        if self._breaker is not None:
+            self._breaker.before_call()
+        return self._policy.timeouts(remaining)
+
+    def failed(self, error):
+        """
+        The attempt ended in a connection error or timeout: True to retry, False to re-raise error; raises
+        DeadlineExceededError if the deadline ran out
+        """
+        if self._breaker is not None:
+            self._breaker.record_failure()
+        if self.attempt < self._retries:
+            self._error = error
+            return True
+        if self._past_deadline():
+            raise DeadlineExceededError(self._method, self._url, self._policy.deadline, self.attempt + 1, error)
+        return False
+
+    def aborted(self):
+        """
+        The attempt ended in any other exception, which is the caller's doing rather than the server's
+        """
+        if self._breaker is not None:
+            self._breaker.release_trial()
+
+    def answered(self, status):
+        """
+        The server answered with status: True to retry, False to return the response
+        """
+        if self._breaker is not None:
+            if status >= 500:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+        if self.attempt >= self._retries or status not in RETRY_STATUSES or self._past_deadline():
+            return False
+        self._error = None
+        return True
+
+    def pause(self):
+        """
+        Seconds to sleep before the next attempt, cut short by the deadline
+        """
+        pause = self._policy.backoff(self.attempt)
+        if self._deadline is not None:
+            pause = min(pause, max(0.0, self._deadline - time.monotonic()))
+        self.attempt += 1
+        return pause
@@ -0,0 +1,315 @@
+import contextlib
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from pywiremock.client import WireMock
+from pywiremock.errors import CircuitOpenError, PoolTimeoutError, ServerStartError, WireMockError
+from pywiremock.journal import backoff_intervals
+
+logger = logging.getLogger(__name__)
+
+POOL_ENV_VAR = 'PYWIREMOCK_POOL'
+
+DEFAULT_COMMAND = (sys.executable, '-m', 'pywiremock.server', '--host', '{host}', '--port', '{port}')
+
+
+def free_port(host='localhost'):
+    """
+    A port nothing is listening on right now, as picked by the OS
+    """
+    with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as probe:
+        probe.bind((host, 0))
+        return probe.getsockname()[1]
+
+
+def wait_until_ready(client, timeout=30.0, is_running=None, initial_interval=0.005, max_interval=0.1):
+    """
+    Probe the admin API of client's server until it answers, returning the seconds waited
+
+    Refused connections come back at once, so the first probes are only milliseconds apart and a server is
+    usually picked up within a few milliseconds of binding its port. is_running, if given, is checked between
+    probes so a server that crashed during startup fails fast instead of running out the timeout.
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    for interval in backoff_intervals(initial_interval, max_interval):
+        try:
+            client.list_all_stub_mappings(limit=1)
+            return time.perf_counter() - start
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, CircuitOpenError):
+            pass
+        if is_running is not None and not is_running():
+            raise ServerStartError(client.host, client.port, 'process exited')
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise ServerStartError(client.host, client.port, 'not ready after {}s'.format(timeout))
+        time.sleep(min(interval, remaining))
+
+
+class ServerProcess:
+    """
+    A mock server running as a child process
+    """
+    def __init__(self, host, port, process, log_file):
+        self.host = host
+        self.port = port
+        self._process = process
+        self._log_file = log_file
+
+    @property
+    def running(self):
+        return self._process.poll() is None
+
+    def output(self, max_bytes=4096):
+        """
+        The tail of what the process wrote to stdout and stderr
+        """
+        self._log_file.flush()
+        self._log_file.seek(0, os.SEEK_END)
+        self._log_file.seek(max(0, self._log_file.tell() - max_bytes))
+        return self._log_file.read().decode('utf-8', 'replace')
+
+    def stop(self, timeout=5.0):
+        if self.running:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._log_file.close()
+
+
+class SubprocessBackend:
+    """
+    Launches each server as a separate process from a command template
+
+    '{host}' and '{port}' in the command are replaced with the listen address; the default command runs the
+    in-process stand-in (python -m pywiremock.server). A real WireMock works the same way, e.g.
+    SubprocessBackend(['java', '-jar', 'wiremock-standalone.jar', '--bind-address', '{host}', '--port', '{port}']).
+    """
+    def __init__(self, command=DEFAULT_COMMAND, root_dir=None, env=None, cwd=None):
+        self._command = list(command)
+        if root_dir:
+            self._command += ['--root-dir', root_dir]
+        self._env = env
+        self._cwd = cwd
+
+    def launch(self, host):
+        port = free_port(host)
+        log_file = tempfile.TemporaryFile()
+        process = subprocess.Popen([argument.format(host=host, port=port) for argument in self._command],
+                                   stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT,
+                                   env=self._env, cwd=self._cwd)
+        return ServerProcess(host, port, process, log_file)
+
+
+class InProcessBackend:
+    """
+    Runs each server as a WireMockServer thread inside the current process; the cheapest backend to start
+    """
+    def __init__(self, root_dir=None):
+        self._root_dir = root_dir
+
+    def launch(self, host):
+        # imported here as pywiremock.server itself imports the client
+        from pywiremock.server import WireMockServer
+        return WireMockServer(0, host, self._root_dir).start()
+
+
+class ServerPool:
+    """
+    A warm pool of mock servers handing out one WireMock client per lease
+
+    All servers are launched together and probed until ready by start(). A lease takes a free server;
+    returning it resets its mappings, request journal and scenarios rather than restarting it, so the next
+    lease gets a clean server at the cost of three admin calls. A server that fails its reset is replaced; if
+    the replacement cannot be launched its slot stays vacant and the next lease that finds no free server
+    launches it again, raising ServerStartError if that fails too.
+
+        with ServerPool(4).start() as pool:
+            with pool.leased() as wire_mock:
+                wire_mock.register(stub)
+
+    For pytest-xdist, start the pool in the controller (e.g. pytest_configure) and call export() before the
+    workers spawn; each worker then picks its own server with worker_client().
+    """
+    def __init__(self, size, backend=None, host='localhost', startup_timeout=30.0, launch_attempts=3,
+                 **client_kwargs):
+        self._size = size
+        self._backend = backend or SubprocessBackend()
+        self._host = host
+        self._startup_timeout = startup_timeout
+        self._launch_attempts = launch_attempts
+        self._client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._servers = []
+        self._clients = {}
+        self._free = queue.Queue()
+        self._leased = set()
+        self._vacant = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def endpoints(self):
+        """
+        (host, port) of every server in the pool
+        """
+        return [(server.host, server.port) for server in self._servers]
+
+    def start(self):
+        """
+        Launch every server and wait until all of them answer
+        """
+        launched = [self._backend.launch(self._host) for _ in range(self._size)]
+        try:
+            for server in launched:
+                self._free.put(self._add(self._await_ready(server)))
+        except Exception:
+            self.close()
+            for server in launched:
+                server.stop()
+            raise
+        return self
+
+    def _await_ready(self, server):
+        # a free port can be taken by someone else before the server binds it, so retry with a fresh one
+        for attempt in range(self._launch_attempts):
+            client = WireMock(server.port, server.host, **self._client_kwargs)
+            try:
+                wait_until_ready(client, self._startup_timeout, lambda: server.running)
+                return server, client
+            except ServerStartError as e:
+                client.close()
+                output = server.output() if hasattr(server, 'output') else None
+                server.stop()
+                if attempt + 1 == self._launch_attempts:
+                    raise ServerStartError(e.host, e.port, e.reason, output)
+                server = self._backend.launch(self._host)
+
+    def _add(self, server_and_client):
+        server, client = server_and_client
+        with self._lock:
+            self._servers.append(server)
+            self._clients[client] = server
+        return client
+
+    def _launch(self):
+        return self._add(self._await_ready(self._backend.launch(self._host)))
+
+    def lease(self, timeout=None):
+        """
+        Take a free server's WireMock client, waiting up to timeout seconds (forever if None) for one
+
+        With no server free and a slot left vacant by a failed replacement, the server is launched here instead.
+        """
+        try:
+            client = self._free.get_nowait()
+        except queue.Empty:
+            client = self._fill_vacancy() or self._wait_for_free(timeout)
+        with self._lock:
+            self._leased.add(client)
+        return client
+
+    def _wait_for_free(self, timeout):
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeoutError('No free server in a pool of {} within {}s'.format(self._size, timeout))
+
+    def _fill_vacancy(self):
+        with self._lock:
+            if not self._vacant:
+                return None
+            self._vacant -= 1
+        try:
+            return self._launch()
+        except Exception as e:
+            with self._lock:
+                self._vacant += 1
+            if isinstance(e, ServerStartError):
+                raise
+            raise ServerStartError(self._host, None, 'could not launch a replacement server: {}'.format(e))
+
+    def release(self, client):
+        """
+        Reset a leased server and put it back into the pool; never raises, so it cannot mask a test's own error
+        """
+        with self._lock:
+            self._leased.remove(client)
+        try:
+            for reset in (client.reset_mappings, client.reset_requests, client.reset_scenarios):
+                reset().raise_for_status()
+        except (requests.exceptions.RequestException, WireMockError):
+            # unreachable, answering with an error, or given up on by the client's call policy
+            self._replace(client)
+            return
+        self._free.put(client)
+
+    def _replace(self, client):
+        with self._lock:
+            server = self._clients.pop(client)
+            self._servers.remove(server)
+        client.close()
+        try:
+            server.stop()
+        except Exception:
+            logger.warning('Could not stop mock server on %s:%s', server.host, server.port, exc_info=True)
+        try:
+            self._free.put(self._launch())
+        except Exception:
+            logger.warning('Could not launch a replacement mock server; the next lease will retry', exc_info=True)
+            with self._lock:
+                self._vacant += 1
+
+    @contextlib.contextmanager
+    def leased(self, timeout=None):
+        client = self.lease(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def export(self, environ=None):
+        """
+        Publish the pool's endpoints in the PYWIREMOCK_POOL environment variable for child processes
+        """
+        environ = os.environ if environ is None else environ
+        environ[POOL_ENV_VAR] = ','.join('{}:{}'.format(host, port) for host, port in self.endpoints)
+
+    def close(self):
+        with self._lock:
+            servers, self._servers = self._servers, []
+            clients, self._clients = self._clients, {}
+        for client in clients:
+            client.close()
+        for server in servers:
+            server.stop()
+
+
+def worker_client(worker_id=None, environ=None, **client_kwargs):
+    """
+    A WireMock client for this pytest-xdist worker's server from a pool published with ServerPool.export
+
+    worker_id defaults to the PYTEST_XDIST_WORKER variable ('gw0', 'gw1', ...); without xdist the first server
+    is used. Workers beyond the pool size share servers round-robin.
+    """
+    environ = os.environ if environ is None else environ
+    endpoints = [endpoint.rsplit(':', 1) for endpoint in environ[POOL_ENV_VAR].split(',')]
+    worker_id = worker_id if worker_id is not None else environ.get('PYTEST_XDIST_WORKER', 'gw0')
+    host, port = endpoints[int(worker_id.lstrip('gw') or 0) % len(endpoints)]
+    return WireMock(int(port), host, **client_kwargs)
@@ -0,0 +1,67 @@
+import base64
+import os
+import re
+
+from pywiremock.codec import default_codec
+
+_UNSAFE_CHARACTERS = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def _file_stem(mapping):
+    request = mapping.get('request', {})
+    url = request.get('url') or request.get('urlPath') or request.get('urlPattern') or \
+        request.get('urlPathPattern') or ''
+    slug = _UNSAFE_CHARACTERS.sub('-', url.split('?', 1)[0]).strip('-')[:60]
+    return '{}-{}'.format(slug, mapping['id']) if slug else mapping['id']
+
+
+def _body_extension(response):
+    content_type = ''
+    for name, value in (response.get('headers') or {}).items():
+        if name.lower() == 'content-type':
+            content_type = value if isinstance(value, str) else value[0]
+    if 'json' in content_type:
+        return '.json'
+    if 'xml' in content_type:
+        return '.xml'
+    return '.txt'
+
+
+class SnapshotWriter:
+    """
+    Writes recorded stub mappings into a WireMock root directory (mappings/ and __files/) one at a time
+
+    Response bodies longer than extract_bodies_over bytes are moved out to __files/ and referenced by
+    bodyFileName, so neither the mapping files nor the writer ever hold more than one body.
+    """
+    def __init__(self, target_dir, extract_bodies_over=0, codec=None):
+        self._mappings_dir = os.path.join(target_dir, 'mappings')
+        self._files_dir = os.path.join(target_dir, '__files')
+        self._extract_bodies_over = extract_bodies_over
+        self._codec = codec or default_codec()
+        for directory in (self._mappings_dir, self._files_dir):
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+    def write(self, mapping):
+        """
+        Write one mapping (extracting its body if needed) and return the path of the mapping file
+        """
+        stem = _file_stem(mapping)
+        response = mapping.get('response', {})
+        body = None
+        if 'body' in response and len(response['body']) > self._extract_bodies_over:
+            body = response.pop('body').encode('utf-8')
+            body_file_name = 'body-{}{}'.format(stem, _body_extension(response))
+        elif 'base64Body' in response and len(response['base64Body']) * 3 // 4 > self._extract_bodies_over:
+            body = base64.b64decode(response.pop('base64Body'))
+            body_file_name = 'body-{}.bin'.format(stem)
+        if body is not None:
+            with open(os.path.join(self._files_dir, body_file_name), 'wb') as body_file:
+                body_file.write(body)
+            response['bodyFileName'] = body_file_name
+
+        path = os.path.join(self._mappings_dir, 'mapping-{}.json'.format(stem))
+        with open(path, 'wb') as mapping_file:
+            mapping_file.write(self._codec.dumps(mapping))
+        return path
@@ -0,0 +1,132 @@
+import re
+
+from urllib.parse import parse_qsl, urlsplit
+
+_SEGMENT_RULES = [
+    (re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'), '{uuid}'),
+    (re.compile(r'^\d+$'), '{id}'),
+    (re.compile(r'^[0-9a-fA-F]{16,}$'), '{hex}'),
+    (re.compile(r'^(?=.*\d)[A-Za-z0-9_-]{20,}$'), '{token}'),
+]
+
+
+# fields of a serve event the report never reads; the request body stays as near misses are computed from it
+REPORT_DROP_KEYS = ('response.body', 'response.bodyAsBase64', 'responseDefinition.body',
+                    'responseDefinition.base64Body', 'responseDefinition.jsonBody', 'stubMapping')
+
+
+def _normalize_segment(segment):
+    for pattern, placeholder in _SEGMENT_RULES:
+        if pattern.match(segment):
+            return placeholder
+    return segment
+
+
+def url_template(url):
+    """
+    Collapse the variable parts of a url (UUIDs, numbers, long hex strings and tokens in the path, every query
+    value) so that requests for the same resource group together: /orders/42?page=3 -> /orders/{id}?page={value}
+    """
+    split = urlsplit(url)
+    path = '/'.join(_normalize_segment(segment) for segment in split.path.split('/'))
+    if not split.query:
+        return path
+    names = sorted(set(name for name, _ in parse_qsl(split.query, keep_blank_values=True)))
+    return '{}?{}'.format(path, '&'.join('{}={{value}}'.format(name) for name in names))
+
+
+class UnmatchedGroup:
+    """
+    Unmatched requests sharing a method, url template and status, with one representative request
+
+    status is what the requests were answered with, or None when they were given as bare logged requests.
+    """
+    __slots__ = ('method', 'template', 'status', 'count', 'example', 'near_misses')
+
+    def __init__(self, method, template, status, example):
+        self.method = method
+        self.template = template
+        self.status = status
+        self.count = 0
+        self.example = example
+        self.near_misses = None
+
+    def to_dict(self):
+        return {'method': self.method, 'template': self.template, 'status': self.status, 'count': self.count,
+                'exampleUrl': self.example.get('url'), 'nearMisses': self.near_misses}
+
+
+class UnmatchedReport:
+    """
+    Unmatched requests aggregated by method, url template and status, largest group first
+    """
+    def __init__(self, groups, total):
+        self.groups = groups
+        self.total = total
+
+    def to_dict(self):
+        return {'total': self.total, 'groups': [group.to_dict() for group in self.groups]}
+
+    def format(self):
+        lines = ['{} unmatched requests in {} groups'.format(self.total, len(self.groups))]
+        for group in self.groups:
+            lines.append('{:>8}  {} {} -> {}'.format(group.count, group.method, group.template,
+                                                     '?' if group.status is None else group.status))
+            for near_miss in group.near_misses or []:
+                request = near_miss.get('stubMapping', {}).get('request', {})
+                lines.append('          near miss: {} {} (distance {})'.format(
+                    request.get('method'), request.get('url') or request.get('urlPattern') or request.get('urlPath')
+                    or request.get('urlPathPattern'), near_miss.get('matchResult', {}).get('distance')))
+        return '\n'.join(lines)
+
+
+def served_status(serve_event):
+    """
+    The status a journal entry was answered with: the response actually sent, else the one it was meant to get
+    """
+    for key in ('response', 'responseDefinition'):
+        status = (serve_event.get(key) or {}).get('status')
+        if status is not None:
+            return status
+    return None
+
+
+def aggregate_unmatched(entries):
+    """
+    Group unmatched requests in a single pass, keeping only one example each
+
+    entries are serve events, of which the matched ones are skipped so the whole journal can be passed in, or
+    logged requests such as /requests/unmatched returns; those carry no status, so their groups have None.
+    """
+    groups = {}
+    total = 0
+    for entry in entries:
+        if 'wasMatched' in entry:
+            if entry['wasMatched']:
+                continue
+            request, status = entry['request'], served_status(entry)
+        else:
+            request, status = entry, None
+        key = (request.get('method'), url_template(request.get('url', '')), status)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = UnmatchedGroup(key[0], key[1], status, request)
+        group.count += 1
+        total += 1
+    ordered = sorted(groups.values(), key=lambda g: (-g.count, g.method or '', g.template))
+    return UnmatchedReport(ordered, total)
+
+
+def unmatched_report(client, near_misses=True, max_near_miss_groups=50):
+    """
+    Stream a client's unmatched requests into an UnmatchedReport, asking the server for near misses of one
+    representative request per group (for the max_near_miss_groups largest groups) rather than for every request
+
+    The journal's serve events are read rather than /requests/unmatched so each group carries the status the
+    requests were actually answered with; response bodies and matched stubs are skipped while streaming.
+    """
+    report = aggregate_unmatched(client.iter_requests(drop_keys=REPORT_DROP_KEYS))
+    if near_misses:
+        for group in report.groups[:max_near_miss_groups]:
+            group.near_misses = client.find_top_near_misses_for(logged_request=group.example).get('nearMisses', [])
+    return report
@@ -0,0 +1,960 @@
+import argparse
+import base64
+import datetime
+import difflib
+import glob
+import gzip
+import itertools
+import json
+import math
+import os
+import random
+import re
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from pywiremock.client import WireMock
+from pywiremock.compression import COMPRESS_LEVEL
+from pywiremock.matching import MatchableRequest, match_request, validate_request_pattern
+
+DEFAULT_PRIORITY = 5
+STARTED = 'Started'
+# what WireMock itself sends for the MALFORMED_RESPONSE_CHUNK and RANDOM_DATA_THEN_CLOSE faults
+_GARBAGE = b"lskdu018973t09sylgasjkfg1][]'./.sdlv"
+# admin responses smaller than this are not worth gzipping
+_GZIP_MIN_SIZE = 1024
+FAULTS = frozenset(['EMPTY_RESPONSE', 'MALFORMED_RESPONSE_CHUNK', 'RANDOM_DATA_THEN_CLOSE', 'CONNECTION_RESET_BY_PEER'])
+DELAY_DISTRIBUTIONS = {'uniform': ('lower', 'upper'), 'lognormal': ('median', 'sigma')}
+
+
+def _now_millis():
+    return int(time.time() * 1000)
+
+
+def _format_millis(millis):
+    moment = datetime.datetime.fromtimestamp(millis / 1000.0, datetime.timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + '{:03d}Z'.format(moment.microsecond // 1000)
+
+
+def _sample_delay(distribution):
+    if distribution['type'] == 'uniform':
+        return random.randint(int(distribution['lower']), int(distribution['upper']))
+    if distribution['type'] == 'lognormal':
+        return round(math.exp(random.gauss(0.0, float(distribution['sigma']))) * float(distribution['median']))
+    raise ValueError('Unknown delay distribution type {}'.format(distribution['type']))
+
+
+def _validate_distribution(distribution):
+    if distribution is None:
+        return
+    if not isinstance(distribution, dict) or distribution.get('type') not in DELAY_DISTRIBUTIONS:
+        raise ValueError('Unknown delay distribution {!r}'.format(distribution))
+    for key in DELAY_DISTRIBUTIONS[distribution['type']]:
+        if not isinstance(distribution.get(key), (int, float)):
+            raise ValueError('{} delay distribution needs a numeric {}'.format(distribution['type'], key))
+
+
+def validate_mapping(mapping):
+    """
+    Raise ValueError for a stub mapping that would fail while serving rather than match or not: broken request
+    patterns (see matching.validate_request_pattern), unknown faults and delay distributions
+    """
+    if not isinstance(mapping, dict):
+        raise ValueError('A stub mapping must be an object, not {!r}'.format(mapping))
+    validate_request_pattern(mapping.get('request', {}))
+    response = mapping.get('response', {})
+    if not isinstance(response, dict):
+        raise ValueError('A stub mapping response must be an object')
+    if response.get('fault') is not None and response['fault'] not in FAULTS:
+        raise ValueError('Unknown fault {}'.format(response['fault']))
+    _validate_distribution(response.get('delayDistribution'))
+    if response.get('base64Body') is not None:
+        try:
+            base64.b64decode(response['base64Body'], validate=True)
+        except (ValueError, TypeError) as e:
+            raise ValueError('Invalid base64Body: {}'.format(e))
+
+
+def _parse_since(since):
+    moment = datetime.datetime.strptime(since.rstrip('Z').split('+')[0], '%Y-%m-%dT%H:%M:%S' +
+                                        ('.%f' if '.' in since else ''))
+    return int(moment.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+
+
+class StubStore:
+    """
+    Stub mappings plus scenario state
+
+    Stubs whose request pattern has an exact url are indexed by (method, url), so a lookup only evaluates those
+    stubs and the (usually few) stubs that match by regex, path or any url. Ties are broken the way WireMock
+    does: lowest priority number first, then the most recently added stub.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._mappings = {}
+        self._sequence = {}
+        self._counter = itertools.count()
+        self._exact = {}
+        self._unindexed = set()
+        self._scenarios = {}
+
+    @staticmethod
+    def _index_key(mapping):
+        request = mapping.get('request', {})
+        if 'url' in request:
+            return request.get('method', 'ANY'), request['url']
+        return None
+
+    def add(self, mapping):
+        mapping_id = mapping.get('id') or mapping.get('uuid') or str(uuid.uuid4())
+        mapping['id'] = mapping['uuid'] = mapping_id
+        with self._lock:
+            self.remove(mapping_id)
+            self._mappings[mapping_id] = mapping
+            self._sequence[mapping_id] = next(self._counter)
+            key = self._index_key(mapping)
+            if key:
+                self._exact.setdefault(key, set()).add(mapping_id)
+            else:
+                self._unindexed.add(mapping_id)
+            if 'scenarioName' in mapping:
+                self._scenarios.setdefault(mapping['scenarioName'], STARTED)
+        return mapping
+
+    def remove(self, mapping_id):
+        with self._lock:
+            mapping = self._mappings.pop(mapping_id, None)
+            if mapping is None:
+                return None
+            del self._sequence[mapping_id]
+            key = self._index_key(mapping)
+            if key:
+                self._exact[key].discard(mapping_id)
+                if not self._exact[key]:
+                    del self._exact[key]
+            else:
+                self._unindexed.discard(mapping_id)
+            return mapping
+
+    def get(self, mapping_id):
+        with self._lock:
+            return self._mappings.get(mapping_id)
+
+    def clear(self):
+        with self._lock:
+            self._mappings.clear()
+            self._sequence.clear()
+            self._exact.clear()
+            self._unindexed.clear()
+            self._scenarios.clear()
+
+    def all(self):
+        """
+        All mappings, most recently added first
+        """
+        with self._lock:
+            return sorted(self._mappings.values(), key=lambda m: self._sequence[m['id']], reverse=True)
+
+    def find_stub(self, request):
+        """
+        Pick the stub serving request and apply its scenario transition
+        """
+        with self._lock:
+            candidates = set(self._unindexed)
+            candidates.update(self._exact.get((request.method, request.url), ()))
+            candidates.update(self._exact.get(('ANY', request.url), ()))
+            best = None
+            best_rank = None
+            for mapping_id in candidates:
+                mapping = self._mappings[mapping_id]
+                rank = (mapping.get('priority', DEFAULT_PRIORITY), -self._sequence[mapping_id])
+                if best_rank is not None and rank >= best_rank:
+                    continue
+                if not self._scenario_allows(mapping) or not match_request(mapping.get('request', {}), request):
+                    continue
+                best, best_rank = mapping, rank
+            if best is not None and best.get('newScenarioState') and 'scenarioName' in best:
+                self._scenarios[best['scenarioName']] = best['newScenarioState']
+            return best
+
+    def _scenario_allows(self, mapping):
+        required = mapping.get('requiredScenarioState')
+        if not required or 'scenarioName' not in mapping:
+            return True
+        return self._scenarios.get(mapping['scenarioName'], STARTED) == required
+
+    def scenarios(self):
+        with self._lock:
+            result = []
+            for name, state in self._scenarios.items():
+                possible_states = [STARTED]
+                for mapping in self.all()[::-1]:
+                    if mapping.get('scenarioName') != name:
+                        continue
+                    for key in ('requiredScenarioState', 'newScenarioState'):
+                        if mapping.get(key) and mapping[key] not in possible_states:
+                            possible_states.append(mapping[key])
+                result.append({'id': name, 'name': name, 'state': state, 'possibleStates': possible_states})
+            return result
+
+    def reset_scenarios(self):
+        with self._lock:
+            for name in self._scenarios:
+                self._scenarios[name] = STARTED
+
+
+class RequestJournal:
+    """
+    Every request served, oldest first, alongside its MatchableRequest so verification never re-parses entries
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._by_id = {}
+
+    def log(self, event, request):
+        with self._lock:
+            self._events.append((event, request))
+            self._by_id[event['id']] = event
+
+    def reset(self):
+        with self._lock:
+            self._events = []
+            self._by_id = {}
+
+    def get(self, event_id):
+        with self._lock:
+            return self._by_id.get(event_id)
+
+    def events(self, since_millis=None):
+        """
+        Serve events, newest first, optionally only those logged strictly after since_millis
+        """
+        with self._lock:
+            events = list(self._events)
+        return [event for event, _ in reversed(events)
+                if since_millis is None or event['request']['loggedDate'] > since_millis]
+
+    def find(self, pattern):
+        with self._lock:
+            events = list(self._events)
+        return [event['request'] for event, request in events if match_request(pattern, request)]
+
+    def remove(self, pattern):
+        """
+        Drop the entries matching pattern, returning their logged requests
+        """
+        with self._lock:
+            kept = []
+            removed = []
+            for event, request in self._events:
+                if match_request(pattern, request):
+                    removed.append(event['request'])
+                    del self._by_id[event['id']]
+                else:
+                    kept.append((event, request))
+            self._events = kept
+        return removed
+
+    def unmatched(self):
+        with self._lock:
+            events = list(self._events)
+        return [(event['request'], request) for event, request in events if not event['wasMatched']]
+
+
+class FileStore:
+    """
+    The __files store for body files: on disk when the server has a root directory, in memory otherwise
+    """
+    def __init__(self, files_dir=None):
+        self._files_dir = files_dir
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def _path(self, name):
+        path = os.path.normpath(os.path.join(self._files_dir, name))
+        if not path.startswith(os.path.normpath(self._files_dir) + os.sep):
+            raise _AdminError(400, 'Invalid file name {}'.format(name))
+        return path
+
+    def names(self):
+        if self._files_dir is None:
+            with self._lock:
+                return sorted(self._files)
+        names = []
+        for directory, _, file_names in os.walk(self._files_dir):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                names.append(os.path.relpath(path, self._files_dir).replace(os.sep, '/'))
+        return sorted(names)
+
+    def get(self, name):
+        if self._files_dir is None:
+            with self._lock:
+                return self._files.get(name)
+        path = self._path(name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as body_file:
+            return body_file.read()
+
+    def put(self, name, content):
+        if self._files_dir is None:
+            with self._lock:
+                self._files[name] = content
+            return
+        path = self._path(name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as body_file:
+            body_file.write(content)
+
+    def delete(self, name):
+        if self._files_dir is None:
+            with self._lock:
+                self._files.pop(name, None)
+            return
+        path = self._path(name)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def _distance(pattern, request):
+    # a rough stand-in for WireMock's near-miss distance: method plus url similarity, 0 is a perfect match
+    method = pattern.get('method', 'ANY')
+    method_distance = 0.0 if method in ('ANY', request.method) else 1.0
+    url = pattern.get('url') or pattern.get('urlPath') or pattern.get('urlPattern') or \
+        pattern.get('urlPathPattern') or ''
+    url_distance = 1.0 - difflib.SequenceMatcher(None, url, request.url).ratio()
+    return (method_distance + url_distance) / 2.0
+
+
+class _AdminError(Exception):
+    def __init__(self, status, message):
+        super(_AdminError, self).__init__(message)
+        self.status = status
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'pywiremock'
+    # headers and body go out in separate writes; with Nagle on, keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_HEAD(self):
+        self._dispatch('HEAD')
+
+    def do_OPTIONS(self):
+        self._dispatch('OPTIONS')
+
+    def do_TRACE(self):
+        self._dispatch('TRACE')
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # discard trailers up to the terminating blank line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _read_decoded_body(self):
+        body = self._read_body()
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip' and body:
+            return gzip.decompress(body)
+        return body
+
+    def _send(self, status, body=b'', headers=None, write_length=True):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            for single in (value if isinstance(value, list) else [value]):
+                self.send_header(name, str(single))
+        if write_length:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_dribbled(self, status, body, headers, number_of_chunks, total_duration):
+        self._send(status, b'', dict(headers, **{'Content-Length': str(len(body))}), write_length=False)
+        if self.command == 'HEAD' or not body:
+            return
+        number_of_chunks = max(1, min(int(number_of_chunks), len(body)))
+        interval = float(total_duration) / number_of_chunks / 1000.0
+        chunk_size, remainder = divmod(len(body), number_of_chunks)
+        position = 0
+        for index in range(number_of_chunks):
+            end = position + chunk_size + (1 if index < remainder else 0)
+            if index:
+                time.sleep(interval)
+            self.wfile.write(body[position:end])
+            position = end
+
+    def _send_fault(self, fault):
+        self.close_connection = True
+        if fault == 'EMPTY_RESPONSE':
+            return
+        if fault == 'MALFORMED_RESPONSE_CHUNK':
+            self.wfile.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' + _GARBAGE)
+        elif fault == 'RANDOM_DATA_THEN_CLOSE':
+            self.wfile.write(_GARBAGE)
+        elif fault == 'CONNECTION_RESET_BY_PEER':
+            # a zero linger timeout turns close() into a RST instead of an orderly FIN
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+        else:
+            raise ValueError('Unknown fault {}'.format(fault))
+
+    def _send_json(self, status, document):
+        body = json.dumps(document).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if len(body) >= _GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, COMPRESS_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+        self._send(status, body, headers)
+
+    def _dispatch(self, method):
+        body = self._read_decoded_body()
+        split = urlsplit(self.path)
+        if split.path == '/__admin' or split.path.startswith('/__admin/'):
+            admin_path = split.path[len('/__admin'):] or '/'
+            query = parse_qs(split.query)
+            try:
+                self.server.wire_mock.handle_admin(self, method, admin_path, query, body)
+            except _AdminError as e:
+                self._send_json(e.status, {'errors': [{'title': str(e)}]})
+            except ValueError as e:
+                self._send_json(422, {'errors': [{'title': str(e)}]})
+            except Exception as e:
+                self._send_json(500, {'errors': [{'title': '{}: {}'.format(type(e).__name__, e)}]})
+        else:
+            try:
+                self.server.wire_mock.handle_stub_request(self, method, body)
+            except OSError:
+                raise
+            except Exception as e:
+                # a stub that slipped past validation must not take the connection, or the server, down with it
+                self._send(500, 'Failed to serve request: {}: {}'.format(type(e).__name__, e).encode('utf-8'),
+                           {'Content-Type': 'text/plain'})
+
+
+class WireMockServer:
+    """
+    In-process, pure-Python stand-in for a WireMock server
+
+    It serves the admin endpoints pywiremock.client.WireMock calls and matches stubs expressed by
+    pywiremock.mappings, so tests can run without a JVM. Port 0 (the default) picks a free ephemeral port:
+
+        with WireMockServer() as server:
+            wire_mock = server.client()
+    """
+    def __init__(self, port=0, host='localhost', root_dir=None):
+        self._host = host
+        self._requested_port = port
+        self._root_dir = root_dir
+        self._httpd = None
+        self._thread = None
+        self._lifecycle_lock = threading.Lock()
+        self.stubs = StubStore()
+        self.journal = RequestJournal()
+        self.settings = {}
+        self.socket_delay = 0
+        self._recording = None
+        self.files = FileStore(os.path.join(root_dir, '__files') if root_dir else None)
+        self._routes = [
+            ('GET', r'/mappings', self._list_mappings),
+            ('POST', r'/mappings', self._create_mapping),
+            ('POST', r'/mappings/new', self._create_mapping),
+            ('DELETE', r'/mappings', self._reset_mappings),
+            ('POST', r'/mappings/reset', self._reset_to_default_mappings),
+            ('POST', r'/mappings/save', self._save_mappings),
+            ('POST', r'/mappings/import', self._import_mappings),
+            ('GET', r'/mappings/(?P<mapping_id>[^/]+)', self._get_mapping),
+            ('PUT', r'/mappings/(?P<mapping_id>[^/]+)', self._edit_mapping),
+            ('DELETE', r'/mappings/(?P<mapping_id>[^/]+)', self._remove_mapping),
+            ('GET', r'/requests', self._list_requests),
+            ('DELETE', r'/requests', self._reset_requests),
+            ('POST', r'/requests/reset', self._reset_requests),
+            ('POST', r'/requests/count', self._count_requests),
+            ('POST', r'/requests/find', self._find_requests),
+            ('POST', r'/requests/remove', self._remove_requests),
+            ('GET', r'/requests/unmatched', self._unmatched_requests),
+            ('GET', r'/requests/unmatched/near-misses', self._unmatched_near_misses),
+            ('GET', r'/requests/(?P<request_id>[^/]+)', self._get_request),
+            ('POST', r'/near-misses/request', self._near_misses_for_request),
+            ('POST', r'/near-misses/request-pattern', self._near_misses_for_pattern),
+            ('GET', r'/files', self._list_files),
+            ('GET', r'/files/(?P<file_name>.+)', self._get_file),
+            ('HEAD', r'/files/(?P<file_name>.+)', self._get_file),
+            ('PUT', r'/files/(?P<file_name>.+)', self._put_file),
+            ('DELETE', r'/files/(?P<file_name>.+)', self._delete_file),
+            ('GET', r'/scenarios', self._get_scenarios),
+            ('POST', r'/scenarios/reset', self._reset_scenarios),
+            ('GET', r'/settings', self._get_settings),
+            ('POST', r'/settings', self._update_settings),
+            ('POST', r'/socket-delay', self._set_socket_delay),
+            ('POST', r'/recordings/start', self._start_recording),
+            ('POST', r'/recordings/stop', self._stop_recording),
+            ('GET', r'/recordings/status', self._recording_status),
+            ('POST', r'/recordings/snapshot', self._snapshot),
+            ('POST', r'/shutdown', self._shutdown),
+        ]
+        self._routes = [(method, re.compile(path + '$'), handler) for method, path, handler in self._routes]
+        # endpoints taking and returning raw bytes rather than JSON
+        self._raw_body_routes = {self._get_file, self._put_file}
+        # endpoints that cannot do without a JSON object in the request body
+        self._document_routes = {self._create_mapping, self._import_mappings, self._edit_mapping,
+                                 self._count_requests, self._find_requests, self._remove_requests,
+                                 self._near_misses_for_request, self._near_misses_for_pattern}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1] if self._httpd else self._requested_port
+
+    @property
+    def running(self):
+        return self._httpd is not None
+
+    @property
+    def base_url(self):
+        return 'http://{}:{}'.format(self._host, self.port)
+
+    def client(self, **kwargs):
+        """
+        A WireMock admin client pointed at this server
+        """
+        return WireMock(self.port, self._host, **kwargs)
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self._host, self._requested_port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.wire_mock = self
+        self.reset_to_default_mappings()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), name='pywiremock-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lifecycle_lock:
+            httpd, self._httpd = self._httpd, None
+        if httpd is None:
+            return
+        httpd.shutdown()
+        httpd.server_close()
+        self._thread.join()
+
+    def reset_to_default_mappings(self):
+        """
+        Drop all stubs and reload the mappings directory under root_dir, if any
+        """
+        self.stubs.clear()
+        if not self._root_dir:
+            return
+        for path in sorted(glob.glob(os.path.join(self._root_dir, 'mappings', '*.json'))):
+            with open(path, 'rb') as mapping_file:
+                document = json.loads(mapping_file.read().decode('utf-8'))
+            mappings = document.get('mappings', [document])
+            try:
+                for mapping in mappings:
+                    validate_mapping(mapping)
+            except ValueError as e:
+                raise ValueError('Invalid stub mapping in {}: {}'.format(path, e))
+            for mapping in mappings:
+                self.stubs.add(mapping)
+
+    def handle_admin(self, handler, method, path, query, body):
+        for route_method, route, route_handler in self._routes:
+            if route_method != method:
+                continue
+            match = route.match(path)
+            if match:
+                arguments = dict((name, unquote(value)) for name, value in match.groupdict().items())
+                if route_handler in self._raw_body_routes:
+                    arguments['body'] = body
+                else:
+                    arguments['document'] = json.loads(body.decode('utf-8')) if body.strip() else None
+                    if route_handler in self._document_routes and not isinstance(arguments['document'], dict):
+                        raise _AdminError(400, 'A JSON object request body is required')
+                status, result = route_handler(query=query, **arguments)
+                if result is None:
+                    handler._send(status)
+                elif isinstance(result, bytes):
+                    handler._send(status, result, {'Content-Type': 'application/octet-stream'})
+                else:
+                    handler._send_json(status, result)
+                return
+        raise _AdminError(404, 'No admin endpoint for {} {}'.format(method, path))
+
+    def handle_stub_request(self, handler, method, body):
+        if self.socket_delay:
+            time.sleep(self.socket_delay / 1000.0)
+        headers = {}
+        for name, value in handler.headers.items():
+            headers.setdefault(name, []).append(value)
+        request = MatchableRequest(method, handler.path, headers, body.decode('utf-8', 'replace'))
+        mapping = self.stubs.find_stub(request)
+        if mapping is not None:
+            response_definition = mapping.get('response', {})
+        else:
+            response_definition = {'status': 404, 'body': 'No response could be served as there are no stub '
+                                                          'mappings in this WireMock instance.'}
+
+        logged_date = _now_millis()
+        logged_request = {
+            'url': handler.path,
+            'absoluteUrl': 'http://{}:{}{}'.format(self._host, self.port, handler.path),
+            'method': method,
+            'clientIp': handler.client_address[0],
+            'headers': {name: values[0] if len(values) == 1 else values for name, values in headers.items()},
+            'cookies': {},
+            'browserProxyRequest': False,
+            'loggedDate': logged_date,
+            'loggedDateString': _format_millis(logged_date),
+            'body': request.body,
+            'bodyAsBase64': base64.b64encode(body).decode('ascii'),
+        }
+        event = {'id': str(uuid.uuid4()), 'request': logged_request, 'responseDefinition': response_definition,
+                 'wasMatched': mapping is not None}
+        if mapping is not None:
+            event['stubMapping'] = mapping
+        self.journal.log(event, request)
+
+        delay = self._response_delay(response_definition)
+        if delay:
+            time.sleep(delay / 1000.0)
+        if response_definition.get('fault'):
+            handler._send_fault(response_definition['fault'])
+            return
+        status, response_body, response_headers = self._render_response(response_definition)
+        dribble = response_definition.get('chunkedDribbleDelay')
+        if dribble:
+            handler._send_dribbled(status, response_body, response_headers, dribble['numberOfChunks'],
+                                   dribble['totalDuration'])
+        else:
+            handler._send(status, response_body, response_headers)
+
+    def _response_delay(self, response_definition):
+        """
+        Milliseconds to hold a response back; a stub's own fixed delay or distribution replaces the global one
+        """
+        fixed_delay = response_definition.get('fixedDelayMilliseconds')
+        if fixed_delay is None:
+            fixed_delay = self.settings.get('fixedDelay')
+        distribution = response_definition.get('delayDistribution') or self.settings.get('delayDistribution')
+        return (fixed_delay or 0) + (_sample_delay(distribution) if distribution else 0)
+
+    def _render_response(self, response_definition):
+        headers = dict(response_definition.get('headers') or {})
+        if 'jsonBody' in response_definition:
+            body = json.dumps(response_definition['jsonBody']).encode('utf-8')
+        elif 'base64Body' in response_definition:
+            body = base64.b64decode(response_definition['base64Body'])
+        elif 'bodyFileName' in response_definition:
+            body = self.files.get(response_definition['bodyFileName'])
+            if body is None:
+                return 500, 'Body file {} not found'.format(response_definition['bodyFileName']).encode('utf-8'), {}
+        else:
+            body = (response_definition.get('body') or '').encode('utf-8')
+        return response_definition.get('status') or 200, body, headers
+
+    # Admin endpoints; each returns (status, json document or None)
+
+    def _list_mappings(self, query, document):
+        mappings = self.stubs.all()
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query['limit'][0]) if 'limit' in query else None
+        page = mappings[offset:offset + limit if limit is not None else None]
+        return 200, {'mappings': page, 'meta': {'total': len(mappings)}}
+
+    def _create_mapping(self, query, document):
+        validate_mapping(document)
+        return 201, self.stubs.add(document)
+
+    def _reset_mappings(self, query, document):
+        self.stubs.clear()
+        return 200, None
+
+    def _reset_to_default_mappings(self, query, document):
+        self.reset_to_default_mappings()
+        return 200, None
+
+    def _save_mappings(self, query, document):
+        if self._root_dir:
+            mappings_dir = os.path.join(self._root_dir, 'mappings')
+            if not os.path.isdir(mappings_dir):
+                os.makedirs(mappings_dir)
+            for mapping in self.stubs.all():
+                if mapping.get('persistent'):
+                    with open(os.path.join(mappings_dir, '{}.json'.format(mapping['id'])), 'w') as mapping_file:
+                        json.dump(mapping, mapping_file, indent=2)
+        return 200, None
+
+    def _import_mappings(self, query, document):
+        options = document.get('importOptions', {})
+        mappings = document.get('mappings', [])
+        # an import is all or nothing, so check every mapping before touching the store
+        for index, mapping in enumerate(mappings):
+            try:
+                validate_mapping(mapping)
+            except ValueError as e:
+                raise ValueError('mappings[{}]: {}'.format(index, e))
+        if options.get('deleteAllNotInImport'):
+            self.stubs.clear()
+        for mapping in mappings:
+            mapping_id = mapping.get('id') or mapping.get('uuid')
+            if mapping_id and options.get('duplicatePolicy') == 'IGNORE' and self.stubs.get(mapping_id):
+                continue
+            self.stubs.add(mapping)
+        return 200, None
+
+    def _get_mapping(self, query, document, mapping_id):
+        mapping = self.stubs.get(mapping_id)
+        if mapping is None:
+            raise _AdminError(404, 'No stub mapping with id {}'.format(mapping_id))
+        return 200, mapping
+
+    def _edit_mapping(self, query, document, mapping_id):
+        if self.stubs.get(mapping_id) is None:
+            raise _AdminError(404, 'No stub mapping with id {}'.format(mapping_id))
+        validate_mapping(document)
+        document['id'] = document['uuid'] = mapping_id
+        return 200, self.stubs.add(document)
+
+    def _remove_mapping(self, query, document, mapping_id):
+        if self.stubs.remove(mapping_id) is None:
+            raise _AdminError(404, 'No stub mapping with id {}'.format(mapping_id))
+        return 200, None
+
+    def _list_requests(self, query, document):
+        since = _parse_since(query['since'][0]) if 'since' in query else None
+        events = self.journal.events(since)
+        total = len(events)
+        if 'limit' in query:
+            events = events[:int(query['limit'][0])]
+        return 200, {'requests': events, 'meta': {'total': total}, 'requestJournalDisabled': False}
+
+    def _reset_requests(self, query, document):
+        self.journal.reset()
+        return 200, None
+
+    def _get_request(self, query, document, request_id):
+        event = self.journal.get(request_id)
+        if event is None:
+            raise _AdminError(404, 'No request with id {}'.format(request_id))
+        return 200, event
+
+    def _count_requests(self, query, document):
+        validate_request_pattern(document)
+        return 200, {'count': len(self.journal.find(document)), 'requestJournalDisabled': False}
+
+    def _find_requests(self, query, document):
+        validate_request_pattern(document)
+        return 200, {'requests': self.journal.find(document), 'requestJournalDisabled': False}
+
+    def _remove_requests(self, query, document):
+        validate_request_pattern(document)
+        return 200, {'requests': self.journal.remove(document), 'requestJournalDisabled': False}
+
+    def _unmatched_requests(self, query, document):
+        return 200, {'requests': [logged for logged, _ in self.journal.unmatched()], 'requestJournalDisabled': False}
+
+    def _near_misses(self, request, logged_request):
+        scored = sorted(((_distance(mapping.get('request', {}), request), mapping) for mapping in self.stubs.all()),
+                        key=lambda item: item[0])
+        return [{'request': logged_request, 'stubMapping': mapping, 'matchResult': {'distance': distance}}
+                for distance, mapping in scored[:3] if distance > 0]
+
+    def _unmatched_near_misses(self, query, document):
+        near_misses = []
+        for logged_request, request in self.journal.unmatched():
+            near_misses.extend(self._near_misses(request, logged_request))
+        return 200, {'nearMisses': near_misses}
+
+    def _near_misses_for_request(self, query, document):
+        request = MatchableRequest.from_logged_request(document)
+        return 200, {'nearMisses': self._near_misses(request, document)}
+
+    def _near_misses_for_pattern(self, query, document):
+        validate_request_pattern(document)
+        scored = []
+        for event in self.journal.events():
+            request = MatchableRequest.from_logged_request(event['request'])
+            if not match_request(document, request):
+                scored.append((_distance(document, request), event['request']))
+        scored.sort(key=lambda item: item[0])
+        return 200, {'nearMisses': [{'request': logged, 'requestPattern': document, 'matchResult': {'distance': d}}
+                                    for d, logged in scored[:3]]}
+
+    def _list_files(self, query, document):
+        return 200, self.files.names()
+
+    def _get_file(self, query, body, file_name):
+        content = self.files.get(file_name)
+        if content is None:
+            raise _AdminError(404, 'No file named {}'.format(file_name))
+        return 200, content
+
+    def _put_file(self, query, body, file_name):
+        self.files.put(file_name, body)
+        return 200, None
+
+    def _delete_file(self, query, document, file_name):
+        self.files.delete(file_name)
+        return 200, None
+
+    def _get_scenarios(self, query, document):
+        return 200, {'scenarios': self.stubs.scenarios()}
+
+    def _reset_scenarios(self, query, document):
+        self.stubs.reset_scenarios()
+        return 200, None
+
+    def _get_settings(self, query, document):
+        return 200, {'settings': self.settings}
+
+    def _update_settings(self, query, document):
+        # like WireMock, posted settings replace the previous ones rather than merging with them
+        _validate_distribution((document or {}).get('delayDistribution'))
+        self.settings = dict(document or {})
+        return 200, None
+
+    def _set_socket_delay(self, query, document):
+        self.socket_delay = int((document or {}).get('milliseconds') or 0)
+        return 200, None
+
+    def _start_recording(self, query, document):
+        # there is no proxying to targetBaseUrl: a recording captures the requests served here until it stops
+        newest = self.journal.events()[:1]
+        self._recording = (document or {}, newest[0]['id'] if newest else None)
+        return 200, None
+
+    def _stop_recording(self, query, document):
+        if self._recording is None:
+            raise _AdminError(400, 'Not currently recording')
+        spec, last_id = self._recording
+        self._recording = None
+        events = []
+        for event in self.journal.events():
+            if event['id'] == last_id:
+                break
+            events.append(event)
+        return 200, {'mappings': self._record(spec, events)}
+
+    def _recording_status(self, query, document):
+        return 200, {'status': 'Recording' if self._recording is not None else 'Stopped'}
+
+    def _snapshot(self, query, document):
+        # builds stubs from the journal; there is no proxying, so only requests served here can be captured
+        return 200, {'mappings': self._record(document or {}, self.journal.events())}
+
+    def _record(self, spec, events):
+        """
+        Stub mappings for the distinct requests among events (newest first), saved as persistent stubs unless
+        the record spec sets persist to false
+        """
+        filters = dict((k, v) for k, v in (spec.get('filters') or {}).items() if k != 'ids')
+        capture_headers = spec.get('captureHeaders') or {}
+        text_threshold = int((spec.get('extractBodyCriteria') or {}).get('textSizeThreshold', -1))
+        recorded = []
+        seen_requests = set()
+        for event in reversed(events):
+            logged_request = event['request']
+            request = MatchableRequest.from_logged_request(logged_request)
+            if filters and not match_request(filters, request):
+                continue
+            request_pattern = {'url': logged_request['url'], 'method': logged_request['method']}
+            headers = {}
+            for name, options in capture_headers.items():
+                values = request.headers.get(name.lower())
+                if values:
+                    headers[name] = dict({'equalTo': values[0]}, **options)
+            if headers:
+                request_pattern['headers'] = headers
+            request_key = json.dumps(request_pattern, sort_keys=True)
+            if request_key in seen_requests:
+                continue
+            seen_requests.add(request_key)
+
+            status, body, response_headers = self._render_response(event['responseDefinition'])
+            mapping_id = str(uuid.uuid4())
+            response = {'status': status}
+            if response_headers:
+                response['headers'] = response_headers
+            if 0 <= text_threshold < len(body):
+                body_file_name = 'body-{}.txt'.format(mapping_id)
+                self.files.put(body_file_name, body)
+                response['bodyFileName'] = body_file_name
+            elif body:
+                response['body'] = body.decode('utf-8', 'replace')
+            recorded.append({'id': mapping_id, 'uuid': mapping_id, 'request': request_pattern, 'response': response})
+
+        if spec.get('persist', True):
+            for mapping in recorded:
+                self.stubs.add(dict(mapping, persistent=True))
+        return recorded
+
+    def _shutdown(self, query, document):
+        # stopping from inside a request would deadlock serve_forever, so leave it to another thread
+        threading.Thread(target=self.stop).start()
+        return 200, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an in-process WireMock-compatible mock server')
+    parser.add_argument('--port', type=int, default=0, help='port to listen on, 0 for any free port')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--root-dir', help='directory holding mappings/ to load as default stubs')
+    args = parser.parse_args(argv)
+
+    server = WireMockServer(args.port, args.host, args.root_dir).start()
+    print('pywiremock server listening on port {}'.format(server.port), flush=True)
+    try:
+        while server.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import json
+import re
+
+_STRUCTURAL = re.compile(rb'[\[\]{},:"]')
+_STRING_END = re.compile(rb'["\\]')
+_WHITESPACE = b' \t\r\n'
+_QUOTE, _BACKSLASH, _COMMA, _COLON = ord('"'), ord('\\'), ord(','), ord(':')
+_OPENERS = (ord('{'), ord('['))
+_CLOSERS = (ord('}'), ord(']'))
+_OPEN_OBJECT, _OPEN_ARRAY, _CLOSE_ARRAY = ord('{'), ord('['), ord(']')
+# depth of the keys of an element object: top-level object, target array, element
+_ELEMENT_DEPTH = 3
+
+
+class ArrayItemScanner:
+    """
+    Incrementally splits the array stored under key in a top-level JSON object (such as the 'mappings' of a
+    snapshot or the 'requests' of the journal) into the raw bytes of its elements
+
+    Bytes are fed in arbitrary chunks as they arrive; only the element currently being read is buffered, so
+    memory stays proportional to the largest element rather than the whole document. The scanner jumps
+    between structural characters with regular expressions instead of stepping through every byte.
+
+    drop_keys names fields of the elements, as dotted paths such as 'request.body', whose values are skipped
+    while scanning and replaced by null, so they are never buffered or decoded.
+    """
+    def __init__(self, key, drop_keys=()):
+        self._key = key.encode('utf-8')
+        self._drop_paths = frozenset(tuple(part.encode('utf-8') for part in path.split('.')) for path in drop_keys)
+        self._depth = 0
+        self._containers = []
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._key_buffer = None
+        self._last_string = None
+        self._current_key = None
+        self._in_target = False
+        self._item = None
+        self._path = []
+        self._skip_depth = None
+
+    def feed(self, chunk):
+        """
+        Consume the next chunk, returning the raw bytes of every element completed by it
+        """
+        items = []
+        length = len(chunk)
+        position = 0
+        segment_start = 0
+        while position < length:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    if self._key_buffer is not None:
+                        self._key_buffer += chunk[position:position + 1]
+                    position += 1
+                    continue
+                match = _STRING_END.search(chunk, position)
+                if match is None:
+                    if self._key_buffer is not None:
+                        self._key_buffer += chunk[position:]
+                    break
+                end = match.start()
+                if self._key_buffer is not None:
+                    self._key_buffer += chunk[position:end + (1 if chunk[end] == _BACKSLASH else 0)]
+                if chunk[end] == _BACKSLASH:
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if self._key_buffer is not None:
+                        self._last_string = bytes(self._key_buffer)
+                        self._key_buffer = None
+                position = end + 1
+                continue
+
+            if self._in_target and self._depth == 2 and self._item is None:
+                while position < length and chunk[position] in _WHITESPACE:
+                    position += 1
+                if position >= length:
+                    break
+                if chunk[position] == _COMMA:
+                    position += 1
+                    continue
+                if chunk[position] != _CLOSE_ARRAY:
+                    self._item = bytearray()
+                    self._path = []
+                    segment_start = position
+
+            match = _STRUCTURAL.search(chunk, position)
+            if match is None:
+                break
+            end = match.start()
+            character = chunk[end]
+            position = end + 1
+            if character == _QUOTE:
+                self._in_string = True
+                if self._depth == 1 or (self._expect_key and self._drop_paths and self._item is not None and
+                                        self._skip_depth is None):
+                    self._key_buffer = bytearray()
+                self._expect_key = False
+            elif character in _OPENERS:
+                if self._depth == 1 and character == _OPEN_ARRAY and self._current_key == self._key:
+                    self._in_target = True
+                self._depth += 1
+                if character == _OPEN_ARRAY and self._item is not None and self._drop_paths:
+                    # arrays add a level without a key; paths match through them
+                    del self._path[self._depth - _ELEMENT_DEPTH:]
+                    self._path.append(None)
+                self._containers.append(character)
+                self._expect_key = character == _OPEN_OBJECT
+            elif character in _CLOSERS:
+                if self._skip_depth == self._depth:
+                    self._skip_depth = None
+                    segment_start = end
+                if self._in_target and self._depth == 2:
+                    if self._item is not None:
+                        self._item += chunk[segment_start:end]
+                        items.append(bytes(self._item).strip())
+                        self._item = None
+                    self._in_target = False
+                self._depth -= 1
+                self._containers.pop()
+            elif character == _COMMA:
+                self._expect_key = self._containers[-1] == _OPEN_OBJECT
+                if self._skip_depth == self._depth:
+                    self._skip_depth = None
+                    segment_start = end
+                if self._in_target and self._depth == 2 and self._item is not None:
+                    self._item += chunk[segment_start:end]
+                    items.append(bytes(self._item).strip())
+                    self._item = None
+            elif character == _COLON:
+                if self._depth == 1:
+                    self._current_key = self._last_string
+                elif self._item is not None and self._drop_paths and self._skip_depth is None:
+                    del self._path[self._depth - _ELEMENT_DEPTH:]
+                    self._path.append(self._last_string)
+                    if tuple(key for key in self._path if key is not None) in self._drop_paths:
+                        self._item += chunk[segment_start:position]
+                        self._item += b'null'
+                        self._skip_depth = self._depth
+
+        if self._item is not None and self._skip_depth is None:
+            self._item += chunk[segment_start:]
+        return items
+
+
+def iter_array_items(chunks, key, decode=json.loads, drop_keys=()):
+    """
+    Lazily decode the elements of the array under key from an iterable of byte chunks
+    """
+    scanner = ArrayItemScanner(key, drop_keys)
+    for chunk in chunks:
+        for raw_item in scanner.feed(chunk):
+            yield decode(raw_item)
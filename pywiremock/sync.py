@@ -0,0 +1,97 @@
+import collections
+import hashlib
+import json
+
+# fields the server assigns or bookkeeps, which say nothing about what a stub does
+_VOLATILE_FIELDS = frozenset(['id', 'uuid', 'insertionIndex'])
+
+SyncResult = collections.namedtuple('SyncResult', ['added', 'updated', 'removed', 'unchanged'])
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        canonical = {}
+        for key, item in value.items():
+            item = _canonical(item)
+            if item is None or item == {} or item == []:
+                continue
+            canonical[key] = item
+        return canonical
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _digest(value):
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def fingerprint(mapping):
+    """
+    Content hash of a serialized stub mapping, ignoring ids and the empty fields servers tend to add or drop
+    """
+    return _digest(_canonical(dict((k, v) for k, v in mapping.items() if k not in _VOLATILE_FIELDS)))
+
+
+def _request_signature(mapping):
+    return _digest(_canonical(mapping.get('request', {})))
+
+
+def plan_sync(desired_stubs, current_mappings):
+    """
+    Work out the smallest set of changes turning current_mappings (as listed by the server) into desired_stubs
+
+    Desired stubs are paired with server mappings by id, then by identical content, then by identical request
+    pattern (which becomes an edit). Returns (to_add, to_update, to_remove, unchanged): to_add is a list of
+    stubs, to_update a list of (mapping_id, stub), to_remove and unchanged lists of mapping ids.
+    """
+    current = collections.OrderedDict((mapping['id'], mapping) for mapping in current_mappings)
+    current_fingerprints = dict((mapping_id, fingerprint(mapping)) for mapping_id, mapping in current.items())
+    unclaimed = set(current)
+    to_update = []
+    unchanged = []
+    pending = []
+
+    for stub in desired_stubs:
+        serialized = stub.serialize()
+        desired_fingerprint = fingerprint(serialized)
+        if stub.id and stub.id in current:
+            unclaimed.discard(stub.id)
+            if current_fingerprints[stub.id] == desired_fingerprint:
+                unchanged.append(stub.id)
+            else:
+                to_update.append((stub.id, stub))
+        else:
+            pending.append((stub, serialized, desired_fingerprint))
+
+    by_fingerprint = collections.defaultdict(list)
+    for mapping_id in current:
+        if mapping_id in unclaimed:
+            by_fingerprint[current_fingerprints[mapping_id]].append(mapping_id)
+    still_pending = []
+    for stub, serialized, desired_fingerprint in pending:
+        candidates = by_fingerprint.get(desired_fingerprint)
+        if candidates and not stub.id:
+            mapping_id = candidates.pop(0)
+            unclaimed.discard(mapping_id)
+            unchanged.append(mapping_id)
+        else:
+            still_pending.append((stub, serialized))
+
+    by_request = collections.defaultdict(list)
+    for mapping_id in current:
+        if mapping_id in unclaimed:
+            by_request[_request_signature(current[mapping_id])].append(mapping_id)
+    to_add = []
+    for stub, serialized in still_pending:
+        candidates = by_request.get(_request_signature(serialized))
+        if candidates and not stub.id:
+            mapping_id = candidates.pop(0)
+            unclaimed.discard(mapping_id)
+            to_update.append((mapping_id, stub))
+        else:
+            to_add.append(stub)
+
+    to_remove = [mapping_id for mapping_id in current if mapping_id in unclaimed]
+    return to_add, to_update, to_remove, unchanged
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pywiremock.compression import CompressionStats, gzip_if_over
+from pywiremock.metrics import CallInfo, endpoint_of
+from pywiremock.policy import CallPolicy
+
+
+class PooledTransport(requests.Session):
+    """
+    HTTP session backed by a keep-alive connection pool
+
+    A single instance is meant to be shared by every admin call a client makes, including calls made from
+    several threads at once: the underlying urllib3 pool hands each thread its own connection and only blocks
+    when pool_block is set and all pool_size connections are in use.
+
+    Request bodies of compress_requests_over bytes or more are sent gzipped with Content-Encoding: gzip (the
+    server has to accept that; off by default), and gzipped responses are asked for unless accept_compressed
+    is turned off. What compression saved is tallied in compression_stats.
+
+    Timeouts, retries and circuit breaking follow policy (a pywiremock.policy.CallPolicy); each transport has a
+    circuit breaker of its own, as it talks to a single server.
+    """
+    def __init__(self, pool_size=10, pool_block=False, keep_alive=True, instrumentation=None,
+                 compress_requests_over=None, accept_compressed=True, policy=None):
+        super(PooledTransport, self).__init__()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.instrumentation = instrumentation
+        self.compress_requests_over = compress_requests_over
+        self.compression_stats = CompressionStats()
+        self.policy = policy or CallPolicy()
+        self.circuit_breaker = self.policy.circuit_breaker()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=pool_block)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+        self.headers['Accept-Encoding'] = 'gzip' if accept_compressed else 'identity'
+
+    def request(self, method, url, *args, **kwargs):
+        compressed = gzip_if_over(kwargs.get('data'), self.compress_requests_over)
+        if compressed is not None:
+            self.compression_stats.add_request(len(kwargs['data']), len(compressed))
+            kwargs['data'] = compressed
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Encoding': 'gzip'})
+
+        instrumentation = self.instrumentation
+        if instrumentation is None or not instrumentation.enabled:
+            response = self._send(method, url, args, kwargs)
+            self._count_response(response, kwargs.get('stream'))
+            return response
+
+        instrumentation.before_call(method, url)
+        data = kwargs.get('data', args[1] if len(args) > 1 else None)
+        request_bytes = len(data) if isinstance(data, (bytes, str)) else 0
+        response = None
+        error = None
+        start = time.perf_counter()
+        try:
+            response = self._send(method, url, args, kwargs)
+            self._count_response(response, kwargs.get('stream'))
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            status = response.status_code if response is not None else None
+            response_bytes = 0
+            if response is not None:
+                if kwargs.get('stream'):
+                    response_bytes = int(response.headers.get('Content-Length') or 0)
+                else:
+                    response_bytes = len(response.content)
+            instrumentation.after_call(CallInfo(method, url, endpoint_of(url), status, elapsed, request_bytes,
+                                                response_bytes, error))
+
+    def _send(self, method, url, args, kwargs):
+        attempts = self.policy.attempts(method, url, kwargs.get('data'), self.circuit_breaker)
+        # timeout is the seventh positional argument of Session.request after method and url
+        explicit_timeout = 'timeout' in kwargs or len(args) > 6
+        while True:
+            timeouts = attempts.before_attempt()
+            if not explicit_timeout:
+                kwargs['timeout'] = timeouts
+            try:
+                response = super(PooledTransport, self).request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not attempts.failed(e):
+                    raise
+            except BaseException:
+                attempts.aborted()
+                raise
+            else:
+                if not attempts.answered(response.status_code):
+                    return response
+                response.close()
+            time.sleep(attempts.pause())
+
+    def _count_response(self, response, stream):
+        if stream or response.headers.get('Content-Encoding') != 'gzip':
+            return
+        received = response.headers.get('Content-Length')
+        self.compression_stats.add_response(int(received) if received else response.raw.tell(), len(response.content))
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        """
+        Drop all pooled connections; safe to call more than once
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            super(PooledTransport, self).close()
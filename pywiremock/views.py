@@ -0,0 +1,110 @@
+import base64
+
+from pywiremock.codec import default_codec
+from pywiremock.mappings import Stub
+
+
+class LazyView:
+    """
+    Read-only view over one JSON object from an admin response, kept as raw bytes until a field is read
+
+    Fields are __slots__ that start out unset. Reading any cheap field decodes the object once and fills in
+    every cheap field only, so entries that are merely counted or filtered on url and method never hold their
+    bodies as Python objects. Reading a heavy field (bodies, headers, nested objects) decodes the object once
+    more at most and fills in every field, so further heavy fields cost nothing. A view can also wrap an
+    already decoded dict.
+    """
+    __slots__ = ('_raw', '_codec')
+    # attribute name -> JSON key
+    _fields = {}
+    _heavy = frozenset()
+    # attribute name -> LazyView subclass wrapping the nested object
+    _nested = {}
+
+    def __init__(self, raw, codec=None):
+        self._raw = raw
+        self._codec = codec
+
+    def __getattr__(self, name):
+        if name not in self._fields:
+            raise AttributeError('{} has no field {}'.format(type(self).__name__, name))
+        document = self.to_dict()
+        keep_heavy = name in self._heavy
+        for attribute, key in self._fields.items():
+            if keep_heavy or attribute not in self._heavy:
+                value = document.get(key)
+                if value is not None and attribute in self._nested:
+                    value = self._nested[attribute](value, self._codec)
+                object.__setattr__(self, attribute, value)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if name in self._fields:
+            raise AttributeError('{} is read-only'.format(type(self).__name__))
+        object.__setattr__(self, name, value)
+
+    @property
+    def raw(self):
+        """
+        The object's JSON as received, or None if the view wraps a decoded dict
+        """
+        return None if isinstance(self._raw, dict) else self._raw
+
+    def to_dict(self):
+        """
+        The whole object decoded; decoded afresh on every call, as nothing but the fields read is cached
+        """
+        if isinstance(self._raw, dict):
+            return self._raw
+        return (self._codec or default_codec()).loads(self._raw)
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.to_dict() if isinstance(self._raw, dict)
+                                else bytes(self._raw[:80]).decode('utf-8', 'replace'))
+
+
+class LoggedRequest(LazyView):
+    """
+    A request as recorded in the journal
+    """
+    _fields = {'url': 'url', 'absolute_url': 'absoluteUrl', 'method': 'method', 'client_ip': 'clientIp',
+               'headers': 'headers', 'cookies': 'cookies', 'query_params': 'queryParams',
+               'browser_proxy_request': 'browserProxyRequest', 'logged_date': 'loggedDate',
+               'logged_date_string': 'loggedDateString', 'body': 'body', 'body_as_base64': 'bodyAsBase64'}
+    _heavy = frozenset(['headers', 'cookies', 'query_params', 'body', 'body_as_base64'])
+    __slots__ = tuple(_fields)
+
+    def binary_body(self):
+        """
+        The request body as bytes
+        """
+        if self.body_as_base64 is not None:
+            return base64.b64decode(self.body_as_base64)
+        return (self.body or '').encode('utf-8')
+
+
+class StubMappingView(LazyView):
+    """
+    A stub mapping as listed by the server; to_stub() turns it into a mappings.Stub
+    """
+    _fields = {'id': 'id', 'uuid': 'uuid', 'name': 'name', 'priority': 'priority', 'persistent': 'persistent',
+               'scenario_name': 'scenarioName', 'required_scenario_state': 'requiredScenarioState',
+               'new_scenario_state': 'newScenarioState', 'request': 'request', 'response': 'response',
+               'metadata': 'metadata'}
+    _heavy = frozenset(['request', 'response', 'metadata'])
+    __slots__ = tuple(_fields)
+
+    def to_stub(self):
+        return Stub.deserialize(self)
+
+
+class ServeEvent(LazyView):
+    """
+    One entry of the request journal: the logged request plus what it was answered with
+    """
+    _fields = {'id': 'id', 'request': 'request', 'response_definition': 'responseDefinition',
+               'response': 'response', 'was_matched': 'wasMatched', 'stub_mapping': 'stubMapping',
+               'timing': 'timing'}
+    _heavy = frozenset(['request', 'response_definition', 'response', 'stub_mapping', 'timing'])
+    _nested = {'request': LoggedRequest, 'stub_mapping': StubMappingView}
+    __slots__ = tuple(_fields)
@@ -8,6 +8,11 @@ required = [
     "requests"
 ]
 
+extras = {
+    "async": ["aiohttp"],
+    "fast-json": ["orjson"]
+}
+
 setuptools.setup(
     name="pywiremock",
     version="2.11.0-5",
@@ -18,11 +23,14 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     url="https://github.com/AnObfuscator/pyWireMock",
     install_requires=required,
+    extras_require=extras,
+    python_requires='>=3.7',
     classifiers=[
         'Intended Audience :: Information Technology',
         'Intended Audience :: Developers',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Topic :: Utilities',
         'Topic :: Software Development :: Libraries :: Python Modules']
 )
\ No newline at end of file
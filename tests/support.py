@@ -0,0 +1,35 @@
+import unittest
+
+import requests
+
+from pywiremock.helpers import a_response, get, stub_for, url_matching
+from pywiremock.server import WireMockServer
+
+
+def a_stub(url, body='ok', status=200):
+    return stub_for(get(url_matching(url))).will_return(a_response().with_status(status).with_body(body))
+
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Runs one in-process WireMockServer per test class; each test gets its own client and a clean server
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.server = WireMockServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.client = self.server.client()
+
+    def tearDown(self):
+        self.client.reset_mappings()
+        self.client.reset_all_requests()
+        self.client.reset_scenarios()
+        self.client.close()
+
+    def call(self, method, path, **kwargs):
+        return requests.request(method, self.server.base_url + path, **kwargs)
@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.errors import RequestsNotReceivedError, VerificationError
+from pywiremock.helpers import get, url_matching
+
+try:
+    import aiohttp
+    from pywiremock.async_client import AsyncWireMock
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class AsyncWireMockTest(ServerTestCase):
+    def run_with_client(self, coroutine_function, **client_kwargs):
+        async def run():
+            async with AsyncWireMock(self.server.port, **client_kwargs) as client:
+                return await coroutine_function(client)
+        return asyncio.run(run())
+
+    def test_register_returns_the_response_like_the_sync_client(self):
+        async def register(client):
+            response = await client.register(a_stub('/a'))
+            return response.status, (await response.json())['request']['url']
+
+        status, url = self.run_with_client(register)
+
+        self.assertEqual(self.client.register(a_stub('/b')).status_code, status)
+        self.assertEqual('/a', url)
+
+    def test_resets_return_their_responses(self):
+        async def reset(client):
+            return [(await call()).status for call in (client.reset_mappings, client.reset_requests,
+                                                       client.reset_all_requests, client.reset_scenarios)]
+
+        self.assertEqual([200] * 4, self.run_with_client(reset))
+
+    def test_concurrent_bulk_import_and_paging(self):
+        stubs = [a_stub('/{}'.format(index)) for index in range(25)]
+
+        async def import_and_list(client):
+            ids = await client.add_stub_mappings(stubs, chunk_size=10)
+            listed = [mapping async for mapping in client.iter_stub_mappings(page_size=7, prefetch=True)]
+            return ids, listed
+
+        ids, listed = self.run_with_client(import_and_list, compress_requests_over=1024)
+
+        self.assertEqual(25, len(ids))
+        self.assertEqual(sorted(ids), sorted(mapping['id'] for mapping in listed))
+
+    def test_verify_and_stream_the_journal(self):
+        self.client.register(a_stub('/a'))
+        self.call('GET', '/a')
+        self.call('GET', '/b', data='body')
+
+        async def check(client):
+            await client.verify(1, get(url_matching('/a')))
+            with self.assertRaises(VerificationError):
+                await client.verify_all([(2, get(url_matching('/a'))), (1, get(url_matching('/b')))])
+            return [entry async for entry in client.iter_requests(drop_bodies=True)]
+
+        entries = self.run_with_client(check)
+
+        self.assertEqual(['/b', '/a'], [entry['request']['url'] for entry in entries])
+        self.assertIsNone(entries[0]['request']['body'])
+
+    def test_await_requests(self):
+        async def wait(client):
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, self.call, 'GET', '/late')
+            count = await client.await_requests(get(url_matching('/late')), timeout=2)
+            with self.assertRaises(RequestsNotReceivedError):
+                await client.await_requests(get(url_matching('/never')), timeout=0.05)
+            return count
+
+        self.assertEqual(1, self.run_with_client(wait))
+
+
+if __name__ == '__main__':
+    unittest.main()
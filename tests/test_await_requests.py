@@ -0,0 +1,51 @@
+import itertools
+import threading
+import time
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.errors import RequestsNotReceivedError
+from pywiremock.helpers import get, url_matching
+from pywiremock.journal import backoff_intervals
+
+
+class BackoffIntervalsTest(unittest.TestCase):
+    def test_doubles_up_to_the_cap(self):
+        self.assertEqual([0.01, 0.02, 0.04, 0.05, 0.05], list(itertools.islice(backoff_intervals(0.01, 0.05), 5)))
+
+
+class AwaitRequestsTest(ServerTestCase):
+    def test_returns_as_soon_as_the_count_is_reached(self):
+        self.client.register(a_stub('/late'))
+        timer = threading.Timer(0.05, self.call, ('GET', '/late'))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        start = time.monotonic()
+        count = self.client.await_requests(get(url_matching('/late')), timeout=5)
+
+        self.assertEqual(1, count)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_already_received_requests_return_after_one_poll(self):
+        self.call('GET', '/a')
+        self.call('GET', '/a')
+
+        self.assertEqual(2, self.client.await_requests(get(url_matching('/a')), count=2, timeout=0))
+
+    def test_timeout_reports_count_polls_and_near_misses(self):
+        self.call('GET', '/almost')
+
+        with self.assertRaises(RequestsNotReceivedError) as raised:
+            self.client.await_requests(get(url_matching('/almos')), count=1, timeout=0.1, max_interval=0.02)
+
+        error = raised.exception
+        self.assertEqual((1, 0), (error.expected, error.actual))
+        self.assertGreater(error.polls, 2)
+        self.assertEqual('/almost', error.near_misses[0]['request']['url'])
+        self.assertIn('Closest near misses', str(error))
+        self.assertIsInstance(error, AssertionError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+
+
+class BulkImportTest(ServerTestCase):
+    def test_add_stub_mappings_in_chunks(self):
+        stubs = [a_stub('/bulk/{}'.format(i), str(i)) for i in range(25)]
+
+        ids = self.client.add_stub_mappings(stubs, chunk_size=10)
+
+        self.assertEqual(25, len(set(ids)))
+        self.assertEqual(25, self.client.list_all_stub_mappings()['meta']['total'])
+        self.assertEqual('7', self.call('GET', '/bulk/7').text)
+
+    def test_delete_all_not_in_import(self):
+        self.client.register(a_stub('/old'))
+
+        self.client.add_stub_mappings([a_stub('/new/{}'.format(i)) for i in range(5)], chunk_size=2,
+                                      delete_all_not_in_import=True)
+
+        self.assertEqual(404, self.call('GET', '/old').status_code)
+        self.assertEqual(5, self.client.list_all_stub_mappings()['meta']['total'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import http.server
+import threading
+import time
+import unittest
+
+import requests
+
+from tests.support import a_stub
+from pywiremock.cluster import WireMockCluster
+from pywiremock.errors import ClusterError
+from pywiremock.helpers import get, url_matching
+from pywiremock.server import WireMockServer
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """
+    A node that answers every admin call with the server's status after its delay
+    """
+    def _answer(self):
+        time.sleep(self.server.delay)
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_GET = do_POST = do_PUT = do_DELETE = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+class WireMockClusterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.servers = [WireMockServer().start() for _ in range(2)]
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers:
+            server.stop()
+
+    def setUp(self):
+        self._bad = http.server.ThreadingHTTPServer(('localhost', 0), _Handler)
+        self._bad.status = 500
+        self._bad.delay = 0
+        self._bad.daemon_threads = True
+        threading.Thread(target=self._bad.serve_forever, daemon=True).start()
+        self.cluster = WireMockCluster([(server.host, server.port) for server in self.servers], timeout=5)
+
+    def tearDown(self):
+        self.cluster.reset_mappings()
+        self.cluster.reset_all_requests()
+        self.cluster.close()
+        self._bad.shutdown()
+        self._bad.server_close()
+
+    def _with_bad_node(self, timeout=5):
+        node = (self.servers[0].host, self.servers[0].port)
+        return WireMockCluster([node, ('localhost', self._bad.server_port)], timeout=timeout)
+
+    def test_register_reaches_every_node(self):
+        responses = self.cluster.register(a_stub('/a'))
+
+        self.assertEqual([201, 201], [response.status_code for response in responses])
+        for server in self.servers:
+            self.assertEqual('ok', requests.get(server.base_url + '/a').text)
+
+    def test_counts_are_summed_and_requests_merged(self):
+        self.cluster.register(a_stub('/a'))
+        requests.get(self.servers[0].base_url + '/a')
+        requests.get(self.servers[1].base_url + '/a')
+        requests.get(self.servers[1].base_url + '/missing')
+
+        self.assertEqual({'count': 2}, self.cluster.count_requests_matching(get(url_matching('/a'))))
+        self.assertEqual(2, len(self.cluster.find_requests_matching(get(url_matching('/a')))['requests']))
+        self.assertEqual(['/missing'], [entry['url'] for entry in self.cluster.find_unmatched_requests()['requests']])
+        self.cluster.verify(2, get(url_matching('/a')))
+
+    def test_error_statuses_are_failures(self):
+        with self._with_bad_node() as cluster:
+            for call in (lambda: cluster.register(a_stub('/a')), cluster.reset_mappings, cluster.save_mappings):
+                with self.assertRaises(ClusterError) as raised:
+                    call()
+
+                bad_node = ('localhost', self._bad.server_port)
+                self.assertEqual([bad_node], list(raised.exception.failures))
+                self.assertIsInstance(raised.exception.failures[bad_node], requests.exceptions.HTTPError)
+                self.assertEqual([(self.servers[0].host, self.servers[0].port)], list(raised.exception.results))
+
+    def test_slow_node_times_out_without_holding_up_the_others(self):
+        self._bad.status = 200
+        self._bad.delay = 1
+        with self._with_bad_node(timeout=0.2) as cluster:
+            start = time.perf_counter()
+            with self.assertRaises(ClusterError) as raised:
+                cluster.reset_requests()
+
+        self.assertLess(time.perf_counter() - start, 0.9)
+        self.assertEqual(1, len(raised.exception.results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import gzip
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.compression import CompressionStats, gzip_if_over
+
+
+class GzipIfOverTest(unittest.TestCase):
+    def test_threshold(self):
+        self.assertIsNone(gzip_if_over(b'x' * 9, 10))
+        self.assertIsNone(gzip_if_over(b'x' * 100, None))
+        self.assertIsNone(gzip_if_over(iter([b'x' * 100]), 10))
+        self.assertEqual(b'x' * 10, gzip.decompress(gzip_if_over(b'x' * 10, 10)))
+
+    def test_stats(self):
+        stats = CompressionStats()
+        stats.add_request(100, 30)
+        stats.add_response(20, 80)
+
+        self.assertEqual((70, 60, 130), (stats.request_bytes_saved, stats.response_bytes_saved, stats.bytes_saved))
+        stats.reset()
+        self.assertEqual(0, stats.bytes_saved)
+
+
+class CompressedAdminCallsTest(ServerTestCase):
+    def setUp(self):
+        super(CompressedAdminCallsTest, self).setUp()
+        self.compressing = self.server.client(compress_requests_over=1024)
+
+    def tearDown(self):
+        self.compressing.close()
+        super(CompressedAdminCallsTest, self).tearDown()
+
+    def test_large_request_bodies_are_gzipped(self):
+        stubs = [a_stub('/{}'.format(index), 'body {}'.format(index)) for index in range(50)]
+
+        self.compressing.add_stub_mappings(stubs)
+        self.compressing.add_stub_mapping(a_stub('/small'))
+
+        stats = self.compressing.compression_stats
+        self.assertEqual(1, stats.requests_compressed)
+        self.assertGreater(stats.request_bytes_saved, 0)
+        self.assertEqual('body 7', self.call('GET', '/7').text)
+
+    def test_large_responses_are_gzipped(self):
+        self.client.add_stub_mappings([a_stub('/{}'.format(index)) for index in range(50)])
+
+        self.assertEqual(50, len(self.compressing.list_all_stub_mappings()['mappings']))
+        self.compressing.get_scenarios()
+
+        stats = self.compressing.compression_stats
+        self.assertEqual(1, stats.responses_compressed)
+        self.assertGreater(stats.response_bytes_saved, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
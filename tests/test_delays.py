@@ -0,0 +1,96 @@
+import time
+import unittest
+
+import requests
+
+from tests.support import ServerTestCase
+from pywiremock.helpers import Fault, a_response, get, global_settings, stub_for, url_matching
+
+
+def _stub(url, response):
+    return stub_for(get(url_matching(url))).will_return(response)
+
+
+class DelaySerializationTest(unittest.TestCase):
+    def test_response_definition(self):
+        response = a_response().with_fixed_delay(100).with_uniform_random_delay(5, 10) \
+            .with_chunked_dribble_delay(4, 200).with_fault(Fault.EMPTY_RESPONSE).serialize()
+
+        self.assertEqual(100, response['fixedDelayMilliseconds'])
+        self.assertEqual({'type': 'uniform', 'lower': 5, 'upper': 10}, response['delayDistribution'])
+        self.assertEqual({'numberOfChunks': 4, 'totalDuration': 200}, response['chunkedDribbleDelay'])
+        self.assertEqual('EMPTY_RESPONSE', response['fault'])
+
+    def test_global_settings(self):
+        self.assertEqual({'fixedDelay': 10, 'delayDistribution': {'type': 'lognormal', 'median': 50, 'sigma': 0.1}},
+                         global_settings().with_fixed_delay(10).with_log_normal_random_delay(50, 0.1).serialize())
+
+
+class DelayTest(ServerTestCase):
+    def tearDown(self):
+        self.client.update_global_settings(global_settings())
+        self.client.add_delay_before_processing_requests(0)
+        super(DelayTest, self).tearDown()
+
+    def _elapsed(self, path):
+        start = time.perf_counter()
+        response = self.call('GET', path)
+        return time.perf_counter() - start, response
+
+    def test_fixed_delay(self):
+        self.client.register(_stub('/slow', a_response().with_body('ok').with_fixed_delay(100)))
+
+        elapsed, response = self._elapsed('/slow')
+
+        self.assertEqual('ok', response.text)
+        self.assertGreaterEqual(elapsed, 0.1)
+
+    def test_random_delay_stays_in_range(self):
+        self.client.register(_stub('/random', a_response().with_uniform_random_delay(50, 60)))
+
+        elapsed, _ = self._elapsed('/random')
+
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertLess(elapsed, 1)
+
+    def test_global_delay_applies_unless_the_stub_sets_its_own(self):
+        self.client.register(_stub('/plain', a_response()))
+        self.client.register(_stub('/own', a_response().with_fixed_delay(0)))
+        self.client.set_global_fixed_delay(100)
+
+        self.assertGreaterEqual(self._elapsed('/plain')[0], 0.1)
+        self.assertLess(self._elapsed('/own')[0], 0.1)
+
+    def test_socket_delay(self):
+        self.client.add_delay_before_processing_requests(100)
+
+        self.assertGreaterEqual(self._elapsed('/unmatched')[0], 0.1)
+
+    def test_chunked_dribble_delay(self):
+        self.client.register(_stub('/dribble', a_response().with_body('0123456789').with_chunked_dribble_delay(5, 100)))
+
+        elapsed, response = self._elapsed('/dribble')
+
+        self.assertEqual('0123456789', response.text)
+        self.assertGreaterEqual(elapsed, 0.08)
+
+
+class FaultTest(ServerTestCase):
+    def test_every_fault_breaks_the_response(self):
+        for fault in (Fault.EMPTY_RESPONSE, Fault.MALFORMED_RESPONSE_CHUNK, Fault.RANDOM_DATA_THEN_CLOSE,
+                      Fault.CONNECTION_RESET_BY_PEER):
+            self.client.register(_stub('/' + fault, a_response().with_fault(fault)))
+
+            with self.assertRaises(requests.exceptions.RequestException, msg=fault):
+                self.call('GET', '/' + fault)
+
+        self.assertEqual(404, self.call('GET', '/still-serving').status_code)
+
+    def test_unknown_fault_is_rejected(self):
+        response = self.client.register(_stub('/bad', a_response().with_fault('NOT_A_FAULT')))
+
+        self.assertEqual(422, response.status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
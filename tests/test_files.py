@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.support import ServerTestCase
+from pywiremock.helpers import a_response, get, stub_for, url_matching
+
+
+class BodyFilesTest(ServerTestCase):
+    def setUp(self):
+        super(BodyFilesTest, self).setUp()
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for file_name in self.client.list_files():
+            self.client.delete_file(file_name)
+        shutil.rmtree(self._dir)
+        super(BodyFilesTest, self).tearDown()
+
+    def _file(self, content, name='body.bin'):
+        path = os.path.join(self._dir, name)
+        with open(path, 'wb') as body_file:
+            body_file.write(content)
+        return path
+
+    def test_uploaded_file_is_served_by_name(self):
+        self.assertTrue(self.client.upload_file('nested/body.bin', self._file(b'\x00\xffdata'), chunk_size=2))
+        self.client.register(stub_for(get(url_matching('/body'))).will_return(
+            a_response().with_body_file('nested/body.bin')))
+
+        self.assertEqual(b'\x00\xffdata', self.call('GET', '/body').content)
+        self.assertEqual(6, self.client.get_file_size('nested/body.bin'))
+        self.assertIsNone(self.client.get_file_size('missing.bin'))
+
+    def test_identical_file_is_not_uploaded_again(self):
+        path = self._file(b'same')
+        self.client.upload_file('body.bin', path)
+
+        self.assertFalse(self.client.upload_file('body.bin', path))
+        self.assertTrue(self.client.upload_file('body.bin', path, force=True))
+
+    def test_changed_size_is_uploaded_without_downloading(self):
+        self.client.upload_file('body.bin', self._file(b'old'))
+
+        with mock.patch.object(self.client, 'get_file_digest', wraps=self.client.get_file_digest) as digest:
+            self.assertTrue(self.client.upload_file('body.bin', self._file(b'longer')))
+        self.assertEqual(0, digest.call_count)
+        self.assertEqual(b'longer', self.call('GET', '/__admin/files/body.bin').content)
+
+    def test_same_size_falls_back_to_the_content(self):
+        self.client.upload_file('body.bin', self._file(b'abc'))
+
+        with mock.patch.object(self.client, 'get_file_digest', wraps=self.client.get_file_digest) as digest:
+            self.assertTrue(self.client.upload_file('body.bin', self._file(b'xyz')))
+        self.assertEqual(1, digest.call_count)
+
+    def test_unknown_size_falls_back_to_the_content(self):
+        path = self._file(b'abc')
+        self.client.upload_file('body.bin', path)
+
+        with mock.patch.object(self.client, 'get_file_size', return_value=None):
+            self.assertFalse(self.client.upload_file('body.bin', path))
+
+    def test_upload_files_returns_the_uploaded_names(self):
+        self.client.upload_file('a.bin', self._file(b'a', 'a.bin'))
+        files = [('a.bin', self._file(b'a', 'a.bin')), ('b.bin', self._file(b'b', 'b.bin'))]
+
+        self.assertEqual(['b.bin'], self.client.upload_files(files))
+        self.assertEqual(['a.bin', 'b.bin'], sorted(self.client.list_files()))
+
+
+if __name__ == '__main__':
+    unittest.main()
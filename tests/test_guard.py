@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from tests.support import ServerTestCase
+from pywiremock.guard import ArchiveAndReset, JournalGuard, RemoveMatching, ResetJournal
+from pywiremock.helpers import get, url_matching
+
+
+class JournalGuardTest(ServerTestCase):
+    def _log(self, *paths):
+        for path in paths:
+            self.call('GET', path)
+
+    def test_under_the_limit_nothing_happens(self):
+        self._log('/a', '/b')
+        guard = JournalGuard(self.client, 2, ResetJournal())
+
+        self.assertIsNone(guard.check())
+        self.assertEqual((2, 0), (guard.last_size, guard.enforcements))
+        self.assertEqual(2, self.client.count_all_requests())
+
+    def test_reset_journal(self):
+        self._log('/a', '/b', '/c')
+
+        JournalGuard(self.client, 2, ResetJournal()).check()
+
+        self.assertEqual(0, self.client.count_all_requests())
+
+    def test_remove_matching_keeps_the_rest(self):
+        self._log('/noise', '/noise', '/keep')
+
+        removed = JournalGuard(self.client, 2, RemoveMatching([get(url_matching('/noise'))])).check()
+
+        self.assertEqual(2, removed)
+        self.assertEqual(1, self.client.count_all_requests())
+
+    def test_archive_and_reset(self):
+        archive_dir = os.path.join(tempfile.mkdtemp(), 'archive')
+        self.addCleanup(shutil.rmtree, os.path.dirname(archive_dir))
+        self._log('/a', '/b')
+
+        path = JournalGuard(self.client, 1, ArchiveAndReset(archive_dir)).check()
+
+        with open(path) as archive_file:
+            self.assertEqual(2, len(json.load(archive_file)['requests']))
+        self.assertEqual(0, self.client.count_all_requests())
+
+    def test_background_thread_enforces_the_policy(self):
+        self._log('/a', '/b')
+
+        with JournalGuard(self.client, 1, ResetJournal(), interval=0.01) as guard:
+            _wait_until(lambda: guard.enforcements)
+
+        self.assertEqual(0, self.client.count_all_requests())
+
+    def test_background_errors_are_logged_and_kept(self):
+        class _Failing:
+            def apply(self, client):
+                raise RuntimeError('policy failed')
+
+        self._log('/a', '/b')
+        with self.assertLogs('pywiremock.guard', 'WARNING'):
+            with JournalGuard(self.client, 1, _Failing(), interval=0.01) as guard:
+                _wait_until(lambda: guard.last_error is not None)
+
+        self.assertIsInstance(guard.last_error, RuntimeError)
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from pywiremock.journal import JournalTail
+
+
+def _entry(entry_id, logged_date):
+    return {'id': entry_id, 'request': {'url': '/{}'.format(entry_id), 'loggedDate': logged_date}}
+
+
+class _FakeJournal:
+    """
+    Answers get_all_requests the way the admin API does: newest first, filtered by since, cut to limit
+    """
+    def __init__(self):
+        self.entries = []
+        self.calls = []
+
+    def log(self, entry_id, logged_date):
+        self.entries.append(_entry(entry_id, logged_date))
+
+    def get_all_requests(self, limit=None, since_date=None):
+        self.calls.append((limit, since_date))
+        entries = list(reversed(self.entries))
+        if since_date is not None:
+            entries = [entry for entry in entries if entry['request']['loggedDate'] >= _millis(since_date)]
+        return {'requests': entries[:limit] if limit is not None else entries}
+
+
+def _millis(since_date):
+    # since_date as JournalTail formats it: ISO-8601 in UTC, which these tests keep within the epoch's first minute
+    return int(since_date[17:19]) * 1000 + int(since_date[20:23])
+
+
+class JournalTailTest(unittest.TestCase):
+    def setUp(self):
+        self._journal = _FakeJournal()
+
+    def test_polls_return_only_new_entries_oldest_first(self):
+        tail = JournalTail(self._journal)
+        self._journal.log('a', 1000)
+        self._journal.log('b', 2000)
+
+        self.assertEqual(['a', 'b'], [entry['id'] for entry in tail.poll()])
+        self.assertEqual([], tail.poll())
+        self._journal.log('c', 3000)
+        self.assertEqual(['c'], [entry['id'] for entry in tail.poll()])
+        self.assertEqual(3000, tail.cursor)
+
+    def test_entries_in_the_cursor_millisecond_are_not_lost(self):
+        tail = JournalTail(self._journal)
+        self._journal.log('a', 1000)
+        tail.poll()
+        self._journal.log('b', 1000)
+
+        self.assertEqual(['b'], [entry['id'] for entry in tail.poll()])
+
+    def test_limit_that_cuts_off_new_entries_repolls(self):
+        tail = JournalTail(self._journal, limit=2)
+        self._journal.log('a', 1000)
+        tail.poll()
+        for index, entry_id in enumerate('bcde'):
+            self._journal.log(entry_id, 2000 + index)
+
+        self.assertEqual(['b', 'c', 'd', 'e'], [entry['id'] for entry in tail.poll()])
+        self.assertEqual([2, None], [limit for limit, _ in self._journal.calls[-2:]])
+
+    def test_limit_that_reaches_the_cursor_polls_once(self):
+        tail = JournalTail(self._journal, limit=2)
+        self._journal.log('a', 1000)
+        tail.poll()
+        self._journal.log('b', 2000)
+        calls = len(self._journal.calls)
+
+        self.assertEqual(['b'], [entry['id'] for entry in tail.poll()])
+        self.assertEqual(calls + 1, len(self._journal.calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
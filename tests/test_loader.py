@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pywiremock import loader
+from pywiremock.loader import MappingDirectory
+from pywiremock.mappings import Stub
+
+
+def _mapping(url, body='ok', **response):
+    return {'request': {'method': 'GET', 'url': url}, 'response': dict(status=200, body=body, **response)}
+
+
+class MappingDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self._root = tempfile.mkdtemp()
+        self._cache = os.path.join(self._root, 'cache')
+        os.makedirs(os.path.join(self._root, 'mappings', 'nested'))
+        os.makedirs(os.path.join(self._root, '__files'))
+        self._write('a.json', _mapping('/a'))
+        self._write('nested/b.json', {'mappings': [_mapping('/b1'), _mapping('/b2')]})
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def _write(self, name, document):
+        with open(os.path.join(self._root, 'mappings', name), 'w') as mapping_file:
+            json.dump(document, mapping_file)
+
+    def _urls(self, directory):
+        return [loaded.mapping['request']['url'] for loaded in directory]
+
+    def test_walks_files_in_order(self):
+        self.assertEqual(['/a', '/b1', '/b2'], self._urls(MappingDirectory(self._root, self._cache)))
+
+    def test_unchanged_files_are_not_reparsed(self):
+        self._urls(MappingDirectory(self._root, self._cache))
+
+        with mock.patch.object(loader.json, 'loads', wraps=json.loads) as loads:
+            self.assertEqual(['/a', '/b1', '/b2'], self._urls(MappingDirectory(self._root, self._cache)))
+        self.assertEqual(0, loads.call_count)
+
+    def test_changed_files_are_reparsed(self):
+        self._urls(MappingDirectory(self._root, self._cache))
+        self._write('a.json', _mapping('/changed'))
+
+        with mock.patch.object(loader.json, 'loads', wraps=json.loads) as loads:
+            self.assertEqual(['/changed', '/b1', '/b2'], self._urls(MappingDirectory(self._root, self._cache)))
+        self.assertEqual(1, loads.call_count)
+
+    def test_cache_entries_are_read_on_demand(self):
+        self._urls(MappingDirectory(self._root, self._cache))
+        self.assertEqual(2, len(os.listdir(self._cache)))
+
+        with mock.patch.object(loader.marshal, 'load', wraps=loader.marshal.load) as load:
+            first = next(iter(MappingDirectory(self._root, self._cache)))
+        self.assertEqual('/a', first.mapping['request']['url'])
+        self.assertEqual(1, load.call_count)
+
+    def test_entries_of_deleted_files_are_dropped(self):
+        self._urls(MappingDirectory(self._root, self._cache))
+        os.remove(os.path.join(self._root, 'mappings', 'a.json'))
+
+        self.assertEqual(['/b1', '/b2'], self._urls(MappingDirectory(self._root, self._cache)))
+        self.assertEqual(1, len(os.listdir(self._cache)))
+
+    def test_unreadable_cache_entries_are_ignored(self):
+        self._urls(MappingDirectory(self._root, self._cache))
+        for entry_name in os.listdir(self._cache):
+            with open(os.path.join(self._cache, entry_name), 'wb') as entry_file:
+                entry_file.write(b'not marshal')
+
+        self.assertEqual(['/a', '/b1', '/b2'], self._urls(MappingDirectory(self._root, self._cache)))
+
+    def test_body_files_are_loaded_on_access(self):
+        with open(os.path.join(self._root, '__files', 'big.bin'), 'wb') as body_file:
+            body_file.write(b'\xff' * 100)
+        self._write('a.json', _mapping('/a', body=None, bodyFileName='big.bin'))
+        loaded = next(iter(MappingDirectory(self._root, use_cache=False, mmap_threshold=10)))
+
+        self.assertIsInstance(loaded.body_bytes(), memoryview)
+        self.assertEqual(b'\xff' * 100, bytes(loaded.body_bytes()))
+        self.assertEqual(['big.bin'], [name for name, _ in MappingDirectory(self._root).body_files()])
+
+    def test_stubs_inline_binary_bodies_as_base64(self):
+        with open(os.path.join(self._root, '__files', 'body.bin'), 'wb') as body_file:
+            body_file.write(b'\xff\x00')
+        self._write('a.json', _mapping('/a', body=None, bodyFileName='body.bin'))
+
+        stub = next(MappingDirectory(self._root, use_cache=False).stubs(inline_body_files=True))
+
+        self.assertEqual('/wA=', stub.serialize()['response']['base64Body'])
+
+
+class DeserializeTest(unittest.TestCase):
+    def test_round_trips_every_url_form(self):
+        for key in ('url', 'urlPattern', 'urlPath', 'urlPathPattern'):
+            mapping = {'request': {'method': 'POST', key: '/a.*'}, 'response': {'status': 201}}
+
+            self.assertEqual('/a.*', Stub.deserialize(mapping).serialize()['request'][key], key)
+
+    def test_more_than_one_url_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Stub.deserialize({'request': {'url': '/a', 'urlPath': '/a'}, 'response': {}})
+
+    def test_unknown_fields_are_kept(self):
+        mapping = {'request': {'url': '/a'}, 'response': {'status': 200, 'jsonBody': {'a': 1}},
+                   'priority': 3, 'metadata': {'team': 'x'}}
+
+        serialized = Stub.deserialize(mapping).serialize()
+
+        self.assertEqual('ANY', serialized['request']['method'])
+        self.assertEqual({'a': 1}, serialized['response']['jsonBody'])
+        self.assertEqual((3, {'team': 'x'}), (serialized['priority'], serialized['metadata']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from tests.support import ServerTestCase
+from pywiremock.metrics import CallInfo, Instrumentation, MetricsCollector, endpoint_of
+
+try:
+    from prometheus_client.openmetrics.parser import text_string_to_metric_families as parse_openmetrics
+    from prometheus_client.parser import text_string_to_metric_families as parse_prometheus
+except ImportError:  # pragma: no cover - optional test dependency
+    parse_openmetrics = parse_prometheus = None
+
+
+def _call(method, endpoint, status=200, elapsed=0.003, error=None):
+    return CallInfo(method, 'http://h/__admin' + endpoint, endpoint, status, elapsed, 10, 20, error)
+
+
+def _collector(*calls):
+    collector = MetricsCollector(buckets=(0.001, 0.01))
+    for call in calls:
+        collector.observe(call)
+    return collector
+
+
+class EndpointTest(unittest.TestCase):
+    def test_ids_and_file_names_collapse(self):
+        self.assertEqual('/mappings/{id}', endpoint_of(
+            'http://h:1/__admin/mappings/123e4567-e89b-12d3-a456-426614174000?x=1'))
+        self.assertEqual('/requests/{id}', endpoint_of('http://h:1/__admin/requests/42'))
+        self.assertEqual('/files/{name}', endpoint_of('http://h:1/__admin/files/a/b.json'))
+
+
+class MetricsCollectorTest(unittest.TestCase):
+    def test_counts_errors_and_buckets(self):
+        collector = _collector(_call('GET', '/mappings'), _call('GET', '/mappings', 500, 0.5),
+                               _call('GET', '/mappings', None, 0.0005, ConnectionError()))
+
+        series = collector.to_dict()['GET /mappings']
+
+        self.assertEqual((3, 2, 30, 60), (series['calls'], series['errors'], series['request_bytes'],
+                                          series['response_bytes']))
+        self.assertEqual({0.001: 1, 0.01: 2}, series['latency_buckets'])
+
+    def test_instrumentation_feeds_collectors(self):
+        collector = MetricsCollector()
+        calls = []
+        instrumentation = Instrumentation(collector).add_pre_call_hook(lambda method, url: calls.append(url))
+
+        instrumentation.before_call('GET', 'http://h/__admin/mappings')
+        instrumentation.after_call(_call('GET', '/mappings'))
+
+        self.assertTrue(instrumentation.enabled)
+        self.assertFalse(Instrumentation().enabled)
+        self.assertEqual(['http://h/__admin/mappings'], calls)
+        self.assertEqual(1, collector.to_dict()['GET /mappings']['calls'])
+
+
+@unittest.skipIf(parse_openmetrics is None, 'prometheus_client is not installed')
+class PrometheusExportTest(unittest.TestCase):
+    def setUp(self):
+        self._collector = _collector(_call('GET', '/mappings'), _call('POST', '/mappings', 201, 0.02),
+                                     _call('GET', '/files/{name}', 404))
+
+    def _check(self, families):
+        families = dict((family.name, family) for family in families)
+        self.assertEqual({'pywiremock_admin_calls': 'counter', 'pywiremock_admin_errors': 'counter',
+                          'pywiremock_admin_request_bytes': 'counter', 'pywiremock_admin_response_bytes': 'counter',
+                          'pywiremock_admin_latency_seconds': 'histogram'},
+                         dict((name, family.type) for name, family in families.items()))
+        calls = dict((sample.labels['method'] + ' ' + sample.labels['endpoint'], sample.value)
+                     for sample in families['pywiremock_admin_calls'].samples)
+        self.assertEqual({'GET /mappings': 1, 'POST /mappings': 1, 'GET /files/{name}': 1}, calls)
+        errors = [sample.labels['endpoint'] for sample in families['pywiremock_admin_errors'].samples if sample.value]
+        self.assertEqual(['/files/{name}'], errors)
+        post_buckets = [sample.value for sample in families['pywiremock_admin_latency_seconds'].samples
+                        if sample.name.endswith('_bucket') and sample.labels['method'] == 'POST']
+        self.assertEqual([0, 0, 1], post_buckets)
+
+    def test_openmetrics_parser_reads_every_family(self):
+        self._check(parse_openmetrics(self._collector.to_prometheus(openmetrics=True)))
+
+    def test_prometheus_parser_types_every_family(self):
+        families = list(parse_prometheus(self._collector.to_prometheus()))
+
+        self.assertEqual(5, len(families))
+        self._check(families)
+
+
+class ClientMetricsTest(ServerTestCase):
+    def test_client_calls_are_observed(self):
+        collector = MetricsCollector()
+        client = self.server.client(instrumentation=Instrumentation(collector))
+        client.list_all_stub_mappings()
+        client.get_stub_mapping('123e4567-e89b-12d3-a456-426614174000')
+
+        observed = collector.to_dict()
+
+        self.assertEqual(1, observed['GET /mappings']['calls'])
+        self.assertEqual(1, observed['GET /mappings/{id}']['errors'])
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
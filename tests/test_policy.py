@@ -0,0 +1,191 @@
+import asyncio
+import http.server
+import threading
+import time
+import unittest
+
+import requests
+
+from pywiremock.errors import CircuitOpenError, DeadlineExceededError
+from pywiremock.policy import CallPolicy, CircuitBreaker
+from pywiremock.transport import PooledTransport
+
+try:
+    import aiohttp
+    from pywiremock.async_client import AsyncWireMock
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(2, 10)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_the_count(self):
+        breaker = CircuitBreaker(2, 10)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker(1, 0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(1, 0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.record_failure()
+
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+    def test_released_trial_lets_the_next_one_through(self):
+        breaker = CircuitBreaker(1, 0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.release_trial()
+
+        breaker.before_call()
+        self.assertEqual(1, breaker._failures)
+
+    def test_policy_without_threshold_has_no_breaker(self):
+        self.assertIsNone(CallPolicy().circuit_breaker())
+        self.assertIsInstance(CallPolicy(failure_threshold=3).circuit_breaker(), CircuitBreaker)
+
+
+class CallAttemptsTest(unittest.TestCase):
+    def test_only_idempotent_calls_retry(self):
+        policy = CallPolicy(max_retries=2)
+
+        self.assertTrue(policy.attempts('GET', 'http://h/__admin/mappings').answered(503))
+        self.assertFalse(policy.attempts('POST', 'http://h/__admin/mappings').answered(503))
+        self.assertTrue(policy.attempts('POST', 'http://h/__admin/requests/count').answered(502))
+        self.assertFalse(policy.attempts('GET', 'http://h/__admin/mappings').answered(500))
+
+    def test_retries_run_out(self):
+        attempts = CallPolicy(max_retries=1, backoff_initial=0).attempts('GET', 'http://h/__admin/mappings')
+        attempts.before_attempt()
+        self.assertTrue(attempts.failed(ConnectionError()))
+        self.assertEqual(0, attempts.pause())
+        attempts.before_attempt()
+
+        self.assertFalse(attempts.failed(ConnectionError()))
+
+    def test_breaker_counts_5xx_but_not_aborts(self):
+        breaker = CircuitBreaker(2, 10)
+        policy = CallPolicy()
+        policy.attempts('GET', 'http://h/', breaker=breaker).answered(500)
+        attempts = policy.attempts('GET', 'http://h/', breaker=breaker)
+        attempts.before_attempt()
+        attempts.aborted()
+
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        policy.attempts('GET', 'http://h/', breaker=breaker).answered(504)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.calls += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TransportPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self._httpd = http.server.ThreadingHTTPServer(('localhost', 0), _Handler)
+        self._httpd.calls = 0
+        self._httpd.statuses = []
+        self._httpd.delay = 0
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        self._url = 'http://localhost:{}/__admin/mappings'.format(self._httpd.server_port)
+
+    def tearDown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def test_retries_unavailable_idempotent_calls(self):
+        self._httpd.statuses = [503, 502]
+        transport = PooledTransport(policy=CallPolicy(max_retries=2, backoff_initial=0.001))
+
+        self.assertEqual(200, transport.get(self._url).status_code)
+        self.assertEqual(3, self._httpd.calls)
+
+    def test_unavailable_answers_count_as_failures(self):
+        self._httpd.statuses = [503, 503]
+        transport = PooledTransport(policy=CallPolicy(failure_threshold=2, recovery_time=10))
+        transport.get(self._url)
+        transport.get(self._url)
+
+        with self.assertRaises(CircuitOpenError):
+            transport.get(self._url)
+        self.assertEqual(2, self._httpd.calls)
+
+    def test_caller_errors_release_the_half_open_trial_without_counting(self):
+        transport = PooledTransport(policy=CallPolicy(failure_threshold=1, recovery_time=0.01))
+        transport.circuit_breaker.record_failure()
+        time.sleep(0.02)
+
+        with self.assertRaises(requests.exceptions.InvalidURL):
+            transport.get('http://')
+        self.assertEqual(CircuitBreaker.HALF_OPEN, transport.circuit_breaker.state)
+        self.assertEqual(200, transport.get(self._url).status_code)
+        self.assertEqual(CircuitBreaker.CLOSED, transport.circuit_breaker.state)
+
+    @unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+    def test_cancelled_async_calls_do_not_open_the_breaker(self):
+        self._httpd.delay = 0.2
+
+        async def cancel_twice():
+            async with AsyncWireMock(self._httpd.server_port, policy=CallPolicy(failure_threshold=2)) as client:
+                for _ in range(2):
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await asyncio.wait_for(client.get_scenarios(), 0.05)
+                return client.circuit_breaker.state
+
+        self.assertEqual(CircuitBreaker.CLOSED, asyncio.run(cancel_twice()))
+
+    def test_deadline_bounds_retries(self):
+        transport = PooledTransport(policy=CallPolicy(deadline=0.2, max_retries=100, backoff_initial=0.05))
+        refused = 'http://localhost:{}/__admin/mappings'.format(_closed_port())
+
+        with self.assertRaises(DeadlineExceededError):
+            transport.get(refused)
+
+
+def _closed_port():
+    server = http.server.HTTPServer(('localhost', 0), _Handler)
+    port = server.server_port
+    server.server_close()
+    return port
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from tests.support import a_stub
+from pywiremock.errors import PoolTimeoutError, ServerStartError
+from pywiremock.pool import InProcessBackend, ServerPool, worker_client
+
+
+class _FlakyBackend(InProcessBackend):
+    """
+    An in-process backend whose launches fail while failing is set
+    """
+    def __init__(self):
+        super(_FlakyBackend, self).__init__()
+        self.failing = False
+
+    def launch(self, host):
+        if self.failing:
+            raise OSError('no more servers')
+        return super(_FlakyBackend, self).launch(host)
+
+
+def _break(pool, client):
+    # stop the server behind a leased client and drop its kept-alive connections so its reset fails on release
+    pool._clients[client].stop()
+    client.close()
+
+
+class ServerPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = _FlakyBackend()
+        self.pool = ServerPool(1, self.backend, startup_timeout=5.0).start()
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_release_resets_the_server(self):
+        with self.pool.leased() as client:
+            client.register(a_stub('/a'))
+            port = client.port
+
+        with self.pool.leased() as client:
+            self.assertEqual(port, client.port)
+            self.assertEqual([], client.list_all_stub_mappings()['mappings'])
+
+    def test_lease_times_out_when_no_server_is_free(self):
+        with self.pool.leased():
+            with self.assertRaises(PoolTimeoutError):
+                self.pool.lease(timeout=0.01)
+
+    def test_broken_server_is_replaced(self):
+        with self.pool.leased() as client:
+            _break(self.pool, client)
+            port = client.port
+
+        with self.pool.leased(timeout=1) as client:
+            self.assertNotEqual(port, client.port)
+            self.assertEqual([], client.list_all_stub_mappings()['mappings'])
+
+    def test_failed_replacement_does_not_mask_the_test_error(self):
+        with self.assertRaises(AssertionError):
+            with self.pool.leased() as client:
+                _break(self.pool, client)
+                self.backend.failing = True
+                raise AssertionError('the test failed')
+
+    def test_vacant_slot_is_relaunched_by_the_next_lease(self):
+        client = self.pool.lease()
+        _break(self.pool, client)
+        self.backend.failing = True
+        self.pool.release(client)
+
+        with self.assertRaises(ServerStartError):
+            self.pool.lease()
+        self.backend.failing = False
+        with self.pool.leased(timeout=1) as client:
+            self.assertEqual([], client.list_all_stub_mappings()['mappings'])
+        self.assertEqual(1, len(self.pool.endpoints))
+
+    def test_export_and_worker_client(self):
+        environ = {}
+        self.pool.export(environ)
+
+        with worker_client('gw3', environ) as client:
+            self.assertEqual(self.pool.endpoints[0][1], client.port)
+
+
+if __name__ == '__main__':
+    unittest.main()
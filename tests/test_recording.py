@@ -0,0 +1,80 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.helpers import record_spec
+from pywiremock.recording import SnapshotWriter
+
+
+def _read_json(path):
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
+class _TargetDirTestCase(unittest.TestCase):
+    def setUp(self):
+        super(_TargetDirTestCase, self).setUp()
+        self.target_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.target_dir)
+        super(_TargetDirTestCase, self).tearDown()
+
+    def files(self, name):
+        return sorted(os.listdir(os.path.join(self.target_dir, name)))
+
+
+class SnapshotWriterTest(_TargetDirTestCase):
+    def test_small_bodies_stay_inline(self):
+        path = SnapshotWriter(self.target_dir, extract_bodies_over=10).write(
+            {'id': '1', 'request': {'url': '/a/b?q=1'}, 'response': {'status': 200, 'body': 'short'}})
+
+        self.assertEqual('mapping-a-b-1.json', os.path.basename(path))
+        self.assertEqual('short', _read_json(path)['response']['body'])
+        self.assertEqual([], self.files('__files'))
+
+    def test_large_bodies_move_to_files(self):
+        writer = SnapshotWriter(self.target_dir, extract_bodies_over=3)
+        json_path = writer.write({'id': '1', 'request': {'urlPath': '/a'}, 'response': {
+            'body': '{"a": 1}', 'headers': {'Content-Type': 'application/json'}}})
+        binary_path = writer.write({'id': '2', 'request': {}, 'response': {
+            'base64Body': base64.b64encode(b'\x00\x01\x02\x03\x04').decode('ascii')}})
+
+        self.assertEqual('body-a-1.json', _read_json(json_path)['response']['bodyFileName'])
+        self.assertNotIn('body', _read_json(json_path)['response'])
+        self.assertEqual('body-2.bin', _read_json(binary_path)['response']['bodyFileName'])
+        with open(os.path.join(self.target_dir, '__files', 'body-2.bin'), 'rb') as body_file:
+            self.assertEqual(b'\x00\x01\x02\x03\x04', body_file.read())
+
+
+class RecordToDirectoryTest(_TargetDirTestCase, ServerTestCase):
+    def test_snapshot_is_written_mapping_by_mapping(self):
+        self.client.register(a_stub('/small', 'ok'))
+        self.client.register(a_stub('/large', 'x' * 100))
+        self.call('GET', '/small')
+        self.call('GET', '/large')
+
+        ids = self.client.snapshot_record_to_directory(record_spec().make_stubs_persistent(False), self.target_dir,
+                                                       extract_bodies_over=50, chunk_size=16)
+
+        self.assertEqual(2, len(ids))
+        self.assertEqual(2, len(self.files('mappings')))
+        self.assertEqual(1, len(self.files('__files')))
+
+    def test_stop_recording_to_directory(self):
+        self.client.start_recording(record_spec().for_target('http://example.com'))
+        self.call('GET', '/recorded')
+
+        ids = self.client.stop_recording_to_directory(self.target_dir)
+
+        self.assertEqual(1, len(ids))
+        mapping = _read_json(os.path.join(self.target_dir, 'mappings', self.files('mappings')[0]))
+        self.assertEqual('/recorded', mapping['request']['url'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.reports import aggregate_unmatched, url_template
+
+
+class UrlTemplateTest(unittest.TestCase):
+    def test_variable_parts_collapse(self):
+        self.assertEqual('/orders/{id}/items/{uuid}', url_template(
+            '/orders/42/items/123e4567-e89b-12d3-a456-426614174000'))
+        self.assertEqual('/files/{hex}?b={value}&page={value}', url_template('/files/deadbeefdeadbeef?page=3&b=x'))
+        self.assertEqual('/users/me', url_template('/users/me'))
+
+
+class AggregateUnmatchedTest(unittest.TestCase):
+    def test_status_comes_from_serve_events(self):
+        report = aggregate_unmatched([
+            {'wasMatched': False, 'request': {'method': 'GET', 'url': '/a/1'}, 'response': {'status': 503}},
+            {'wasMatched': False, 'request': {'method': 'GET', 'url': '/a/2'}, 'responseDefinition': {'status': 404}},
+            {'wasMatched': True, 'request': {'method': 'GET', 'url': '/a/3'}},
+            {'method': 'GET', 'url': '/a/4'},
+        ])
+
+        self.assertEqual(3, report.total)
+        self.assertEqual([('/a/{id}', 503, 1), ('/a/{id}', 404, 1), ('/a/{id}', None, 1)],
+                         sorted(((group.template, group.status, group.count) for group in report.groups),
+                                key=lambda group: -(group[1] or 0)))
+
+
+class UnmatchedReportTest(ServerTestCase):
+    def test_groups_by_template(self):
+        self.client.register(a_stub('/orders'))
+        for order_id in range(3):
+            self.call('GET', '/orders/{}'.format(order_id))
+        self.call('GET', '/orders')
+
+        report = self.client.unmatched_report()
+
+        self.assertEqual(3, report.total)
+        group = report.groups[0]
+        self.assertEqual(('GET', '/orders/{id}', 404, 3), (group.method, group.template, group.status, group.count))
+        self.assertEqual('/orders', group.near_misses[0]['stubMapping']['request']['url'])
+        self.assertIn('/orders/{id} -> 404', report.format())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.helpers import get, record_spec, url_matching
+from pywiremock.matching import validate_request_pattern
+from pywiremock.server import WireMockServer
+
+INVALID_MAPPINGS = [
+    {'request': {'urlPattern': '/a/('}, 'response': {'status': 200}},
+    {'request': {'url': '/a', 'bodyPatterns': [{'equalToXml': '<a>'}]}, 'response': {'status': 200}},
+    {'request': {'url': '/a', 'bodyPatterns': [{'equalToJson': '{'}]}, 'response': {'status': 200}},
+    {'request': {'url': '/a', 'headers': {'X': {'sortOf': 'x'}}}, 'response': {'status': 200}},
+    {'request': {'url': '/a', 'queryParameters': {'q': {'contains': 5}}}, 'response': {'status': 200}},
+    {'request': {'url': '/a'}, 'response': {'fault': 'SLOW_LORIS'}},
+    {'request': {'url': '/a'}, 'response': {'delayDistribution': {'type': 'gaussian'}}},
+]
+
+
+class ServerTest(ServerTestCase):
+    def test_register_and_serve(self):
+        self.client.register(a_stub('/api/item', 'hello'))
+
+        response = self.call('GET', '/api/item')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('hello', response.text)
+        self.assertEqual(1, self.client.list_all_stub_mappings()['meta']['total'])
+
+    def test_unmatched_request_gets_404(self):
+        self.assertEqual(404, self.call('GET', '/nothing').status_code)
+
+    def test_verify(self):
+        self.client.register(a_stub('/api/item'))
+        self.call('GET', '/api/item')
+        self.call('GET', '/api/item')
+
+        self.client.verify(2, get(url_matching('/api/item')))
+        with self.assertRaises(AssertionError):
+            self.client.verify(1, get(url_matching('/api/item')))
+
+    def test_malformed_admin_requests_are_answered(self):
+        self.assertEqual(400, self.call('POST', '/__admin/mappings', data=b'[]').status_code)
+        self.assertEqual(422, self.call('POST', '/__admin/mappings', data=b'not json').status_code)
+        self.assertEqual(200, self.call('GET', '/__admin/mappings').status_code)
+
+    def test_invalid_stubs_are_rejected(self):
+        for mapping in INVALID_MAPPINGS:
+            self.assertEqual(422, self.call('POST', '/__admin/mappings', json=mapping).status_code, mapping)
+            self.assertEqual(422, self.call('POST', '/__admin/mappings/import',
+                                            json={'mappings': [{'request': {'url': '/ok'}}, mapping]}).status_code)
+        self.assertEqual(0, self.client.list_all_stub_mappings()['meta']['total'])
+        self.assertEqual(404, self.call('GET', '/totally/other').status_code)
+
+    def test_invalid_edit_is_rejected(self):
+        mapping_id = self.client.register(a_stub('/a')).json()['id']
+
+        response = self.call('PUT', '/__admin/mappings/' + mapping_id, json=INVALID_MAPPINGS[0])
+
+        self.assertEqual(422, response.status_code)
+        self.assertEqual(200, self.call('GET', '/a').status_code)
+
+    def test_matching_error_answers_500_and_keeps_serving(self):
+        self.server.stubs.add({'request': {'urlPattern': '/a/('}, 'response': {'status': 200}})
+
+        self.assertEqual(500, self.call('GET', '/totally/other').status_code)
+        self.server.stubs.clear()
+        self.assertEqual(404, self.call('GET', '/totally/other').status_code)
+
+
+class RecordingTest(ServerTestCase):
+    def test_start_and_stop_capture_the_requests_in_between(self):
+        self.client.register(a_stub('/a', 'recorded'))
+        self.call('GET', '/a')
+        self.assertEqual('Stopped', self.client.get_recording_status()['status'])
+
+        self.client.start_recording(record_spec().for_target('http://example.com'))
+        self.assertEqual('Recording', self.client.get_recording_status()['status'])
+        self.call('GET', '/a')
+        self.call('GET', '/b')
+        recorded = self.client.stop_recording()['mappings']
+
+        self.assertEqual('Stopped', self.client.get_recording_status()['status'])
+        self.assertEqual(['/a', '/b'], [mapping['request']['url'] for mapping in recorded])
+        self.assertEqual('recorded', recorded[0]['response']['body'])
+
+    def test_stop_without_start_is_rejected(self):
+        self.assertEqual(400, self.call('POST', '/__admin/recordings/stop').status_code)
+
+
+class RootDirTest(unittest.TestCase):
+    def test_invalid_mapping_file_names_the_file(self):
+        root_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root_dir)
+        os.makedirs(os.path.join(root_dir, 'mappings'))
+        with open(os.path.join(root_dir, 'mappings', 'bad.json'), 'w') as mapping_file:
+            json.dump(INVALID_MAPPINGS[0], mapping_file)
+
+        with self.assertRaisesRegex(ValueError, 'bad.json'):
+            WireMockServer(root_dir=root_dir).reset_to_default_mappings()
+
+    def test_valid_patterns_pass(self):
+        validate_request_pattern({'method': 'POST', 'urlPathPattern': '/a/[0-9]+', 'bodyPatterns': [
+            {'equalToJson': {'a': 1}, 'ignoreExtraElements': True}, {'matchesXPath': '/a/b'}, {'absent': False}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import unittest
+
+from tests.support import ServerTestCase
+from pywiremock.streaming import ArrayItemScanner, iter_array_items
+
+DOCUMENT = json.dumps({
+    'meta': {'total': 3},
+    'requests': [
+        {'id': '1', 'request': {'url': '/a', 'body': 'x{"]},y', 'headers': {'X': ['1', '2']}}},
+        {'id': '2', 'request': {'url': '/b\\"q', 'body': None}, 'response': {'body': [1, {'body': 2}]}},
+        {'id': '3', 'request': {'url': '/c', 'body': {'nested': [1, 2, 3]}}, 'tags': []},
+    ],
+    'after': [{'id': 'ignored'}],
+}).encode('utf-8')
+
+
+def _split(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+class ArrayItemScannerTest(unittest.TestCase):
+    def test_splits_elements(self):
+        items = [json.loads(item) for item in ArrayItemScanner('requests').feed(DOCUMENT)]
+
+        self.assertEqual(json.loads(DOCUMENT)['requests'], items)
+
+    def test_any_chunking_gives_the_same_elements(self):
+        expected = json.loads(DOCUMENT)['requests']
+        for size in (1, 2, 3, 7, 64):
+            self.assertEqual(expected, list(iter_array_items(_split(DOCUMENT, size), 'requests')), size)
+
+    def test_other_keys_are_ignored(self):
+        self.assertEqual([{'id': 'ignored'}], list(iter_array_items([DOCUMENT], 'after')))
+        self.assertEqual([], list(iter_array_items([DOCUMENT], 'missing')))
+
+    def test_empty_array(self):
+        self.assertEqual([], list(iter_array_items([b'{"requests": [ ]}'], 'requests')))
+
+    def test_drop_keys_replace_values_with_null(self):
+        for size in (1, 5, len(DOCUMENT)):
+            items = list(iter_array_items(_split(DOCUMENT, size), 'requests', drop_keys=('request.body',)))
+
+            self.assertEqual([None, None, None], [item['request']['body'] for item in items], size)
+            self.assertEqual(['/a', '/b\\"q', '/c'], [item['request']['url'] for item in items])
+            self.assertEqual(['1', '2'], items[0]['request']['headers']['X'])
+
+    def test_drop_keys_match_through_arrays(self):
+        items = list(iter_array_items([DOCUMENT], 'requests', drop_keys=('response.body.body',)))
+
+        self.assertEqual([1, {'body': None}], items[1]['response']['body'])
+
+    def test_drop_keys_only_match_from_the_element_root(self):
+        items = list(iter_array_items([DOCUMENT], 'requests', drop_keys=('body',)))
+
+        self.assertEqual('x{"]},y', items[0]['request']['body'])
+
+
+class IterRequestsTest(ServerTestCase):
+    def test_drop_bodies(self):
+        self.call('POST', '/upload', data='payload')
+
+        entries = list(self.client.iter_requests(drop_bodies=True))
+
+        self.assertEqual(1, len(entries))
+        self.assertEqual('/upload', entries[0]['request']['url'])
+        self.assertIsNone(entries[0]['request']['body'])
+        self.assertIsNone(entries[0]['request']['bodyAsBase64'])
+
+    def test_limit_and_drop_response(self):
+        for index in range(3):
+            self.call('GET', '/{}'.format(index))
+
+        entries = list(self.client.iter_requests(limit=2, drop_response=True))
+
+        self.assertEqual(['/2', '/1'], [entry['request']['url'] for entry in entries])
+        self.assertIsNone(entries[0]['responseDefinition'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.helpers import *
+from pywiremock.sync import fingerprint, plan_sync
+
+
+def _stub(url, body='ok'):
+    return stub_for(get(url_matching(url))).will_return(a_response().with_body(body))
+
+
+def _listed(mapping_id, stub):
+    # a mapping as the server lists it: the serialized stub plus server-assigned fields
+    mapping = dict(stub.serialize(), id=mapping_id, uuid=mapping_id)
+    mapping['response'] = dict(mapping['response'], headers=None)
+    return mapping
+
+
+class PlanSyncTest(unittest.TestCase):
+    def test_fingerprint_ignores_ids_and_empty_fields(self):
+        stub = _stub('/a')
+
+        self.assertEqual(fingerprint(stub.serialize()), fingerprint(_listed('1', stub)))
+        self.assertNotEqual(fingerprint(stub.serialize()), fingerprint(_stub('/a', 'other').serialize()))
+
+    def test_identical_content_is_unchanged(self):
+        to_add, to_update, to_remove, unchanged = plan_sync([_stub('/a')], [_listed('1', _stub('/a'))])
+
+        self.assertEqual(([], [], [], ['1']), (to_add, to_update, to_remove, unchanged))
+
+    def test_same_request_with_new_response_is_an_edit(self):
+        desired = _stub('/a', 'new')
+
+        to_add, to_update, to_remove, unchanged = plan_sync([desired], [_listed('1', _stub('/a', 'old'))])
+
+        self.assertEqual(([], [('1', desired)], [], []), (to_add, to_update, to_remove, unchanged))
+
+    def test_new_and_unlisted(self):
+        desired = _stub('/b')
+
+        to_add, to_update, to_remove, unchanged = plan_sync([desired], [_listed('1', _stub('/a'))])
+
+        self.assertEqual(([desired], [], ['1'], []), (to_add, to_update, to_remove, unchanged))
+
+    def test_stub_ids_pair_first(self):
+        desired = _stub('/a', 'new').with_id('2')
+        current = [_listed('1', _stub('/a', 'new')), _listed('2', _stub('/a', 'old'))]
+
+        to_add, to_update, to_remove, unchanged = plan_sync([desired], current)
+
+        self.assertEqual(([], [('2', desired)], ['1'], []), (to_add, to_update, to_remove, unchanged))
+
+    def test_duplicates_are_paired_once_each(self):
+        current = [_listed('1', _stub('/a')), _listed('2', _stub('/a'))]
+
+        to_add, to_update, to_remove, unchanged = plan_sync([_stub('/a')], current)
+
+        self.assertEqual((['1'], ['2']), (unchanged, to_remove))
+
+
+class SyncMappingsTest(ServerTestCase):
+    def test_only_changes_are_sent(self):
+        self.client.sync_mappings([a_stub('/keep'), a_stub('/change', 'old'), a_stub('/drop')])
+
+        result = self.client.sync_mappings([a_stub('/keep'), a_stub('/change', 'new'), a_stub('/add')])
+
+        self.assertEqual((1, 1, 1, 1), tuple(len(ids) for ids in result))
+        self.assertEqual('new', self.call('GET', '/change').text)
+        self.assertEqual(404, self.call('GET', '/drop').status_code)
+
+    def test_remove_unlisted_off_keeps_other_mappings(self):
+        self.client.register(a_stub('/other'))
+
+        result = self.client.sync_mappings([a_stub('/a')], remove_unlisted=False)
+
+        self.assertEqual([], result.removed)
+        self.assertEqual(200, self.call('GET', '/other').status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
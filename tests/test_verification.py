@@ -0,0 +1,58 @@
+import unittest
+
+from tests.support import ServerTestCase
+from pywiremock.errors import VerificationError
+from pywiremock.helpers import get, matching, post, url_matching
+from pywiremock.matching import JournalSnapshot, MatchableRequest, match_request
+
+
+def _event(method, url, body=None, headers=None):
+    return {'request': {'method': method, 'url': url, 'body': body, 'headers': headers or {}}}
+
+
+class MatchingTest(unittest.TestCase):
+    def test_url_forms(self):
+        request = MatchableRequest('GET', '/users/42?expand=1')
+
+        self.assertTrue(match_request({'url': '/users/42?expand=1'}, request))
+        self.assertTrue(match_request({'urlPath': '/users/42'}, request))
+        self.assertTrue(match_request({'urlPattern': '/users/[0-9]+\\?.*'}, request))
+        self.assertTrue(match_request({'urlPathPattern': '/users/[0-9]+'}, request))
+        self.assertFalse(match_request({'urlPath': '/users/4'}, request))
+
+    def test_headers_query_and_body(self):
+        request = MatchableRequest('POST', '/a?page=2', {'Content-Type': 'application/json'}, '{"b": [1, 2]}')
+        pattern = {'method': 'POST', 'urlPath': '/a', 'headers': {'content-type': {'contains': 'json'}},
+                   'queryParameters': {'page': {'equalTo': '2'}, 'missing': {'absent': True}},
+                   'bodyPatterns': [{'equalToJson': '{"b": [2, 1]}', 'ignoreArrayOrder': True}]}
+
+        self.assertTrue(match_request(pattern, request))
+        self.assertFalse(match_request(dict(pattern, method='PUT'), request))
+
+    def test_snapshot_counts_every_pattern_in_one_pass(self):
+        snapshot = JournalSnapshot([_event('GET', '/a'), _event('GET', '/a'), _event('POST', '/b', 'text value')])
+
+        counts = snapshot.count_all([get(url_matching('/a')), post(url_matching('/b')).with_request_body(
+            matching('text.*')), {'method': 'ANY'}])
+
+        self.assertEqual([2, 1, 3], counts)
+        self.assertEqual(3, len(snapshot))
+
+
+class VerifyAllTest(ServerTestCase):
+    def test_passes_when_every_count_holds(self):
+        self.call('GET', '/a')
+        self.call('GET', '/a')
+
+        self.client.verify_all([(2, get(url_matching('/a'))), (0, get(url_matching('/b')))])
+
+    def test_reports_every_mismatch(self):
+        self.call('GET', '/a')
+
+        with self.assertRaises(VerificationError) as raised:
+            self.client.verify_all([(2, get(url_matching('/a'))), (1, get(url_matching('/b')))])
+        self.assertEqual([(0, 2, 1), (1, 1, 0)], [failure[:3] for failure in raised.exception.failures])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import unittest
+
+from tests.support import ServerTestCase, a_stub
+from pywiremock.views import LoggedRequest, ServeEvent
+
+RAW_EVENT = json.dumps({'id': '1', 'wasMatched': False, 'request': {'url': '/a', 'method': 'GET', 'body': 'x'},
+                        'responseDefinition': {'status': 404}, 'timing': {'totalTime': 3}}).encode('utf-8')
+
+
+class _CountingCodec:
+    def __init__(self):
+        self.decodes = 0
+
+    def loads(self, data):
+        self.decodes += 1
+        return json.loads(data)
+
+
+class LazyViewTest(unittest.TestCase):
+    def test_cheap_fields_decode_once_and_skip_heavy_ones(self):
+        codec = _CountingCodec()
+        event = ServeEvent(RAW_EVENT, codec)
+
+        self.assertEqual(('1', False), (event.id, event.was_matched))
+        self.assertEqual(1, codec.decodes)
+        with self.assertRaises(AttributeError):
+            object.__getattribute__(event, 'request')
+
+    def test_heavy_fields_decode_once_between_them(self):
+        codec = _CountingCodec()
+        event = ServeEvent(RAW_EVENT, codec)
+
+        self.assertEqual({'status': 404}, event.response_definition)
+        self.assertEqual({'totalTime': 3}, event.timing)
+        self.assertEqual('/a', event.request.url)
+        self.assertEqual(1, codec.decodes)
+
+    def test_read_only_and_unknown_fields(self):
+        event = ServeEvent(RAW_EVENT)
+
+        with self.assertRaises(AttributeError):
+            event.id = '2'
+        with self.assertRaises(AttributeError):
+            event.nope
+
+    def test_binary_body(self):
+        self.assertEqual(b'\x00\x01', LoggedRequest({'bodyAsBase64': 'AAE=', 'body': None}).binary_body())
+        self.assertEqual(b'text', LoggedRequest({'body': 'text'}).binary_body())
+
+
+class LazyResponseTest(ServerTestCase):
+    def test_lazy_listings(self):
+        self.client.register(a_stub('/lazy'))
+        self.call('GET', '/lazy')
+
+        mapping = self.client.list_all_stub_mappings(lazy=True)[0]
+        serve_event = self.client.get_all_requests(lazy=True)[0]
+
+        self.assertEqual('/lazy', mapping.to_stub().serialize()['request']['url'])
+        self.assertEqual('/lazy', serve_event.request.url)
+        self.assertTrue(serve_event.was_matched)
+
+
+if __name__ == '__main__':
+    unittest.main()